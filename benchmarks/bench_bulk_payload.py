@@ -0,0 +1,71 @@
+"""Benchmark of the bulk payload generation of EventStoreElastic.
+
+Usage: python benchmarks/bench_bulk_payload.py [--jobs N] [--steps S] [--repeat R]
+
+Serializes the step documents into bulk request chunks, the way opensearch-py helpers.bulk does,
+with the default opensearch-py serializer and with OrjsonSerializer.
+"""
+
+import argparse
+import timeit
+
+from bench_step_events import generate_steps
+from opensearchpy.helpers.actions import _chunk_actions, expand_action
+from opensearchpy.serializer import JSONSerializer
+
+from prowjobsscraper.event import EventStoreElastic
+from prowjobsscraper.serializer import OrjsonSerializer
+
+
+def generate_payload(actions: list[dict], serializer: JSONSerializer) -> int:
+    size = 0
+    for _, bulk_actions in _chunk_actions(
+        map(expand_action, actions), 500, 100 * 1024 * 1024, serializer
+    ):
+        size += sum(len(a) + 1 for a in bulk_actions)
+    return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=100)
+    parser.add_argument("--steps", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    steps, jobs = generate_steps(args.jobs, args.steps)
+    # same actions as _EsIndex._gen_documents
+    actions = [
+        {
+            "_index": "steps-2023.01",
+            "_op_type": "update",
+            "_id": id,
+            "doc_as_upsert": True,
+            "doc": d,
+        }
+        for d, id in EventStoreElastic._gen_step_documents(steps, jobs)
+    ]
+
+    print(f"{len(actions)} step documents of {args.jobs} jobs")
+    baseline = None
+    for name, serializer in (
+        ("default serializer", JSONSerializer()),
+        ("orjson serializer", OrjsonSerializer()),
+    ):
+        size = generate_payload(actions, serializer)
+        elapsed = min(
+            timeit.repeat(
+                lambda: generate_payload(actions, serializer),
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+        baseline = baseline or elapsed
+        print(
+            f"  {name}: {len(actions) / elapsed:.0f} docs/s, {size / elapsed / 1024 / 1024:.1f} MiB/s"
+            f" ({baseline / elapsed:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
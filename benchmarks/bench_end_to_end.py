@@ -0,0 +1,100 @@
+"""Load test of the indexing, report and cleanup of a week of jobs against InMemoryOpenSearch.
+
+Usage: python benchmarks/bench_end_to_end.py [--jobs N] [--steps S]
+
+Indexes N synthetic jobs with S steps each and their Equinix usages through EventStoreElastic,
+builds the report of the week with the Querier and Reporter, then deduplicates the job indices
+with elasticsearch-cleanup, the same way the three tools would against a cluster.
+"""
+
+import argparse
+import time
+from datetime import timedelta
+from typing import Any, Callable
+
+from generators import (
+    START_TIME,
+    generate_equinix_usages_response,
+    generate_prow_job_items,
+)
+
+from elasticsearch_cleanup.main import remove_duplicates_from_index
+from jobsautoreport.query import Querier
+from jobsautoreport.report import Reporter
+from prowjobsscraper.equinix_usages import EquinixUsage
+from prowjobsscraper.event import EventStoreElastic
+from prowjobsscraper.inmemory_opensearch import InMemoryOpenSearch
+from prowjobsscraper.prowjob import ProwJob
+from prowjobsscraper.step import JobStep
+
+
+def _timed(name: str, func: Callable[[], Any]) -> Any:
+    start = time.perf_counter()
+    result = func()
+    print(f"  {name}: {time.perf_counter() - start:.2f} s")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=10000)
+    parser.add_argument("--steps", type=int, default=20)
+    args = parser.parse_args()
+
+    jobs = [
+        job
+        for item in generate_prow_job_items(args.jobs)
+        if (job := ProwJob.parse_obj(item)).status.state in ("success", "failure")
+    ]
+    steps = [
+        JobStep(
+            build_id=job.status.build_id,
+            name="baremetalds-packet-setup" if s == 0 else f"step{s}",
+            state="success",
+            duration=s * 60,
+        )
+        for job in jobs
+        for s in range(args.steps)
+    ]
+    usages = [
+        EquinixUsage.parse_obj(u)
+        for u in generate_equinix_usages_response(len(jobs))["usages"]
+    ]
+    client = InMemoryOpenSearch()
+    event_store = EventStoreElastic(
+        client=client,
+        job_index_basename="jobs",
+        step_index_basename="steps",
+        usage_index_basename="usages",
+    )
+    querier = Querier(
+        opensearch_client=client,
+        jobs_index="jobs-*",
+        steps_index="steps-*",
+        usages_index="usages-*",
+    )
+
+    print(f"{len(jobs)} jobs, {len(steps)} steps, {len(usages)} usages")
+    _timed("index jobs", lambda: event_store.index_prow_jobs(jobs))
+    _timed("index steps", lambda: event_store.index_job_steps(steps, jobs))
+    _timed("index usages", lambda: event_store.index_equinix_usages(usages))
+    _timed("scan build ids", event_store.scan_build_ids)
+    _timed(
+        "report",
+        lambda: Reporter(querier=querier).get_report(
+            from_date=START_TIME, to_date=START_TIME + timedelta(weeks=1)
+        ),
+    )
+    _timed(
+        "cleanup",
+        lambda: remove_duplicates_from_index(
+            opensearch_client=client,
+            index="jobs-*",
+            comparison_fields=["job.build_id"],
+            dry_run_mode=False,
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Benchmark of the junit parsing path of StepExtractor.
+
+Usage: python benchmarks/bench_junit.py [--testcases N] [--repeat R] [junit files...]
+
+Without files, a synthetic junit file of N testcases is generated. When junitparser is
+installed, the legacy junitparser-based parsing is timed as well and both outputs are
+checked to be identical.
+"""
+
+import argparse
+import timeit
+from datetime import timedelta
+from typing import Optional
+
+from prowjobsscraper.junit import parse_testcases
+from prowjobsscraper.prowjob import ProwJob
+from prowjobsscraper.step import JobStep, StepExtractor
+
+_JOB = ProwJob.parse_obj(
+    {
+        "metadata": {"labels": {}},
+        "spec": {
+            "job": "periodic-ci-openshift-assisted-test-infra-master-e2e-metal-assisted",
+            "type": "periodic",
+        },
+        "status": {"state": "success", "build_id": "1549300279667593216"},
+    }
+)
+
+
+def generate_junit(testcases: int) -> bytes:
+    cases = []
+    for i in range(testcases):
+        if i % 10 == 0:
+            cases.append(
+                f'<testcase name="step{i}" time="{i}.5"><failure message="">'
+                + "error output line\n" * 50
+                + "</failure></testcase>"
+            )
+        else:
+            cases.append(
+                f'<testcase name="step{i}" time="{i}.25"><system-out>'
+                + "collected output\n" * 10
+                + "</system-out></testcase>"
+            )
+    return (
+        f'<testsuites><testsuite name="step graph" tests="{testcases}">'
+        + "".join(cases)
+        + "</testsuite></testsuites>"
+    ).encode()
+
+
+def parse_with_junitparser(job: ProwJob, junit: bytes) -> Optional[list[JobStep]]:
+    try:
+        from junitparser import Failure, JUnitXml  # type: ignore
+    except ImportError:
+        return None
+
+    steps = []
+    for suite in JUnitXml.fromstring(junit):
+        for case in suite:
+            state, details = "success", None
+            for res in case.result:
+                if isinstance(res, Failure):
+                    state, details = "failure", res.text
+                    break
+            duration = timedelta(0)
+            try:
+                if case.time:
+                    duration = timedelta(seconds=float(case.time))
+            except ValueError:
+                pass
+            steps.append(
+                JobStep(
+                    build_id=job.status.build_id,
+                    name=case.name,
+                    state=state,
+                    duration=duration.seconds,
+                    details=details,
+                )
+            )
+    return steps
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--testcases", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("files", nargs="*")
+    args = parser.parse_args()
+
+    inputs = [(path, open(path, "rb").read()) for path in args.files] or [
+        (f"synthetic-{args.testcases}", generate_junit(args.testcases))
+    ]
+    extractor = StepExtractor(client=None, gcs_bucket_name="")
+
+    for name, junit in inputs:
+        steps = extractor._parse_junit_suite_into_steps(_JOB, junit)
+        current = min(
+            timeit.repeat(
+                lambda: extractor._parse_junit_suite_into_steps(_JOB, junit),
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+        records = min(
+            timeit.repeat(lambda: parse_testcases(junit), number=1, repeat=args.repeat)
+        )
+        print(f"{name}: {len(junit)} bytes, {len(steps)} steps")
+        print(f"  streaming parser (testcase records only): {records * 1000:.1f} ms")
+        print(f"  streaming parser: {current * 1000:.1f} ms")
+
+        legacy_steps = parse_with_junitparser(_JOB, junit)
+        if legacy_steps is None:
+            print("  junitparser is not installed, skipping comparison")
+            continue
+
+        legacy = min(
+            timeit.repeat(
+                lambda: parse_with_junitparser(_JOB, junit),
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+        print(f"  junitparser:      {legacy * 1000:.1f} ms ({legacy / current:.2f}x)")
+        print(f"  identical output: {legacy_steps == steps}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Benchmark of the decoding of OpenSearch documents by the Querier.
+
+Usage: python benchmarks/bench_querier_decoding.py [--jobs N] [--steps S] [--repeat R]
+
+Compares the strict pydantic validation of step documents with their trusted decoding.
+"""
+
+import argparse
+import timeit
+
+from bench_step_events import generate_steps
+
+from jobsautoreport.decoder import decode_trusted
+from prowjobsscraper.event import EventStoreElastic, StepEvent
+from prowjobsscraper.serializer import OrjsonSerializer
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=100)
+    parser.add_argument("--steps", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    steps, jobs = generate_steps(args.jobs, args.steps)
+    # documents as returned by a scroll, datetimes being strings
+    serializer = OrjsonSerializer()
+    documents = [
+        serializer.loads(serializer.dumps(d))
+        for d, _ in EventStoreElastic._gen_step_documents(steps, jobs)
+    ]
+    assert [decode_trusted(StepEvent, d) for d in documents] == [
+        StepEvent.parse_obj(d) for d in documents
+    ]
+
+    strict = min(
+        timeit.repeat(
+            lambda: [StepEvent.parse_obj(d) for d in documents],
+            number=1,
+            repeat=args.repeat,
+        )
+    )
+    trusted = min(
+        timeit.repeat(
+            lambda: [decode_trusted(StepEvent, d) for d in documents],
+            number=1,
+            repeat=args.repeat,
+        )
+    )
+
+    print(f"{len(documents)} step documents of {args.jobs} jobs")
+    print(f"  strict validation: {strict / len(documents) * 1e6:.1f} us/document")
+    print(
+        f"  trusted decoding:  {trusted / len(documents) * 1e6:.1f} us/document ({strict / trusted:.2f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
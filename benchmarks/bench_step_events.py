@@ -0,0 +1,94 @@
+"""Benchmark of the step documents generation of EventStoreElastic.
+
+Usage: python benchmarks/bench_step_events.py [--jobs N] [--steps S] [--repeat R]
+
+Compares the per-step StepEvent.create_from_job_step conversion with the documents
+generated by EventStoreElastic, which serialize the job part once per job.
+"""
+
+import argparse
+import timeit
+
+from prowjobsscraper.event import EventStoreElastic, StepEvent
+from prowjobsscraper.prowjob import ProwJob
+from prowjobsscraper.step import JobStep
+
+
+def generate_steps(jobs: int, steps: int) -> tuple[list[JobStep], list[ProwJob]]:
+    prow_jobs = []
+    job_steps = []
+    for i in range(jobs):
+        job = ProwJob.parse_obj(
+            {
+                "metadata": {
+                    "labels": {
+                        "ci-operator.openshift.io/cloud-cluster-profile": "packet-assisted",
+                        "prow.k8s.io/refs.base_ref": "master",
+                        "prow.k8s.io/refs.org": "openshift",
+                        "prow.k8s.io/refs.repo": "assisted-service",
+                        "ci-operator.openshift.io/variant": "edge",
+                    }
+                },
+                "spec": {
+                    "job": "periodic-ci-openshift-assisted-service-master-edge-e2e-metal-assisted",
+                    "type": "periodic",
+                },
+                "status": {
+                    "state": "success",
+                    "build_id": str(1549300279667593216 + i),
+                    "url": f"https://prow.ci.openshift.org/view/gs/test-platform-results/logs/job/{i}",
+                    "startTime": "2023-01-01T10:00:00Z",
+                    "completionTime": "2023-01-01T12:00:00Z",
+                },
+            }
+        )
+        prow_jobs.append(job)
+        job_steps.extend(
+            JobStep(
+                build_id=job.status.build_id,
+                name=f"step{s}",
+                state="success",
+                duration=s,
+            )
+            for s in range(steps)
+        )
+    return job_steps, prow_jobs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=100)
+    parser.add_argument("--steps", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    steps, jobs = generate_steps(args.jobs, args.steps)
+    jobs_by_build_id = {j.status.build_id: j for j in jobs}
+
+    per_step = min(
+        timeit.repeat(
+            lambda: [
+                StepEvent.create_from_job_step(s, jobs_by_build_id[s.build_id]).dict()
+                for s in steps
+            ],
+            number=1,
+            repeat=args.repeat,
+        )
+    )
+    shared = min(
+        timeit.repeat(
+            lambda: list(EventStoreElastic._gen_step_documents(steps, jobs)),
+            number=1,
+            repeat=args.repeat,
+        )
+    )
+
+    print(f"{len(steps)} steps of {args.jobs} jobs")
+    print(f"  per step conversion: {per_step / len(steps) * 1e6:.1f} us/step")
+    print(
+        f"  shared job document: {shared / len(steps) * 1e6:.1f} us/step ({per_step / shared:.2f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Benchmark suite of the scraper, report and cleanup hot paths on synthetic data.
+
+Usage: python benchmarks/bench_suite.py [--scales 1000,10000,100000] [--repeat R]
+                                        [--max-seconds S] [--only NAME] [--output FILE]
+                                        [--baseline FILE]
+
+Each benchmark is run at every scale on inputs of the generators module, the best of R runs
+is kept. Larger scales of a benchmark are skipped once a run takes longer than S seconds.
+Results are written as JSON to FILE, along with the commit they were measured on. With
+--baseline, results are compared with the ones of a previous run.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import timeit
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional
+
+from bench_junit import generate_junit
+from generators import (
+    START_TIME,
+    generate_equinix_metadata,
+    generate_equinix_usages_response,
+    generate_job_documents,
+    generate_prow_job_items,
+    generate_prowjobs_payload,
+    generate_step_documents,
+    generate_usage_documents,
+)
+
+from elasticsearch_cleanup.main import get_bulk_actions
+from jobsautoreport.query import Querier
+from jobsautoreport.report import Reporter
+from prowjobsscraper.equinix_usages import EquinixUsage, EquinixUsagesExtractor
+from prowjobsscraper.prowjob import EquinixMetadata, ProwJob, ProwJobs
+from prowjobsscraper.step import StepExtractor
+
+# a benchmark prepares its inputs for a scale and returns the function to time
+Benchmark = Callable[[int], Callable[[], Any]]
+
+
+class _InMemoryQuerier(Querier):
+    """
+    Querier returning pre-generated documents instead of scrolling OpenSearch, every document matches.
+    """
+
+    def __init__(self, documents: dict[str, list[dict[str, Any]]]):
+        super().__init__(
+            opensearch_client=None,  # type: ignore
+            jobs_index="jobs-*",
+            steps_index="steps-*",
+            usages_index="usages-*",
+        )
+        self._documents = documents
+
+    def _scan(self, query: dict[str, Any], index_name: str) -> list[dict[Any, Any]]:
+        return self._documents[index_name]
+
+
+def bench_prowjobs_create_from_string(scale: int) -> Callable[[], Any]:
+    payload = generate_prowjobs_payload(scale)
+    return lambda: ProwJobs.create_from_string(payload)
+
+
+def bench_prowjob_is_assisted(scale: int) -> Callable[[], Any]:
+    jobs = [ProwJob.parse_obj(item) for item in generate_prow_job_items(scale)]
+    return lambda: [j for j in jobs if j.is_assisted()]
+
+
+def bench_junit_parse_steps(scale: int) -> Callable[[], Any]:
+    job = ProwJob.parse_obj(generate_prow_job_items(1)[0])
+    junit = generate_junit(scale)
+    extractor = StepExtractor(client=None, gcs_bucket_name="")
+    return lambda: extractor._parse_junit_suite_into_steps(job, junit)
+
+
+def bench_equinix_metadata_parse(scale: int) -> Callable[[], Any]:
+    metadata = [generate_equinix_metadata(str(i)) for i in range(scale)]
+    return lambda: [EquinixMetadata.parse_raw(m) for m in metadata]
+
+
+def bench_equinix_process_usages(scale: int) -> Callable[[], Any]:
+    usages = [
+        EquinixUsage.parse_obj(u)
+        for u in generate_equinix_usages_response(scale)["usages"]
+    ]
+    extractor = EquinixUsagesExtractor(
+        project_id="",
+        project_token="",
+        start_time=START_TIME,
+        end_time=START_TIME + timedelta(weeks=1),
+    )
+    # bandwidth usages are updated in place, with the same result on every run
+    return lambda: extractor._process_usages(usages)
+
+
+def bench_reporter_get_report(scale: int) -> Callable[[], Any]:
+    reporter = Reporter(
+        querier=_InMemoryQuerier(
+            {
+                "jobs-*": generate_job_documents(scale),
+                "steps-*": generate_step_documents(scale),
+                "usages-*": generate_usage_documents(scale),
+            }
+        )
+    )
+    return lambda: reporter.get_report(
+        from_date=START_TIME, to_date=START_TIME + timedelta(weeks=1)
+    )
+
+
+def bench_cleanup_get_bulk_actions(scale: int) -> Callable[[], Any]:
+    documents = generate_job_documents(scale)
+    # one document out of ten is a duplicate
+    documents += documents[: scale // 10]
+    return lambda: list(get_bulk_actions(documents, ["job.build_id"]))
+
+
+BENCHMARKS: dict[str, Benchmark] = {
+    "prowjobs_create_from_string": bench_prowjobs_create_from_string,
+    "prowjob_is_assisted": bench_prowjob_is_assisted,
+    "junit_parse_steps": bench_junit_parse_steps,
+    "equinix_metadata_parse": bench_equinix_metadata_parse,
+    "equinix_process_usages": bench_equinix_process_usages,
+    "reporter_get_report": bench_reporter_get_report,
+    "cleanup_get_bulk_actions": bench_cleanup_get_bulk_actions,
+}
+
+
+def _get_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, check=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(
+    names: list[str], scales: list[int], repeat: int, max_seconds: float
+) -> list[dict[str, Any]]:
+    results = []
+    for name in names:
+        skipped = False
+        for scale in scales:
+            result: dict[str, Any] = {"benchmark": name, "scale": scale}
+            if skipped:
+                print(f"{name} x{scale}: skipped")
+                results.append(result | {"skipped": True})
+                continue
+
+            func = BENCHMARKS[name](scale)
+            seconds = min(timeit.repeat(func, number=1, repeat=repeat))
+            skipped = seconds > max_seconds
+            print(f"{name} x{scale}: {seconds * 1000:.1f} ms")
+            results.append(
+                result
+                | {
+                    "skipped": False,
+                    "seconds": seconds,
+                    "us_per_item": seconds / scale * 1e6,
+                }
+            )
+    return results
+
+
+def compare(results: list[dict[str, Any]], baseline: list[dict[str, Any]]) -> None:
+    baseline_seconds = {
+        (r["benchmark"], r["scale"]): r["seconds"] for r in baseline if not r["skipped"]
+    }
+    print("comparison with the baseline (> 1 is slower):")
+    for r in results:
+        base = baseline_seconds.get((r["benchmark"], r["scale"]))
+        if r["skipped"] or base is None:
+            continue
+        print(f"  {r['benchmark']} x{r['scale']}: {r['seconds'] / base:.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", default="1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-seconds", type=float, default=30)
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS))
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline")
+    args = parser.parse_args()
+
+    results = run(
+        names=args.only or list(BENCHMARKS),
+        scales=[int(s) for s in args.scales.split(",")],
+        repeat=args.repeat,
+        max_seconds=args.max_seconds,
+    )
+    with open(args.output, "w") as f:
+        json.dump(
+            {
+                "commit": _get_commit(),
+                "date": datetime.now(tz=timezone.utc).isoformat(),
+                "python": sys.version.split()[0],
+                "machine": platform.machine(),
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    print(f"results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f)["results"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""Synthetic data generators for the benchmarks.
+
+Every generator is deterministic for a given count and seed, so that results of different
+commits are measured on the same inputs.
+"""
+
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from prowjobsscraper.equinix_usages import EquinixUsage, EquinixUsageEvent
+from prowjobsscraper.event import EventStoreElastic, JobEvent
+from prowjobsscraper.prowjob import ProwJob
+from prowjobsscraper.serializer import OrjsonSerializer
+from prowjobsscraper.step import JobStep
+
+START_TIME = datetime(2023, 1, 2, tzinfo=timezone.utc)
+
+_REPOSITORIES = [
+    "assisted-service",
+    "assisted-installer",
+    "assisted-installer-agent",
+    "assisted-image-service",
+    "assisted-test-infra",
+    "release",
+]
+_VARIANTS = ["edge", "ocm-2.8", "ocm-2.9"]
+_TESTS = [
+    "e2e-metal-assisted",
+    "e2e-metal-assisted-ipv6",
+    "e2e-metal-assisted-single-node",
+    "subsystem-aws",
+    "subsystem-kubeapi-aws",
+    "unit-test",
+    "lint",
+]
+_TYPES = [
+    ("periodic", "periodic-ci"),
+    ("presubmit", "pull-ci"),
+    ("postsubmit", "branch-ci"),
+]
+_STATES = ["success", "success", "success", "failure", "pending", "aborted"]
+_PLANS = ["c3.medium.x86", "m3.large.x86", "s3.xlarge.x86"]
+_STEPS = [
+    "baremetalds-packet-setup",
+    "baremetalds-packet-gather-metadata",
+    "assisted-baremetal-setup",
+    "assisted-baremetal-test",
+    "gather-must-gather",
+]
+
+_serializer = OrjsonSerializer()
+
+
+def generate_prow_job_items(count: int, seed: int = 0) -> list[dict[str, Any]]:
+    """
+    Items of the Prow job list, about half of them being assisted jobs scraped by the scraper.
+    """
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        repo = rng.choice(_REPOSITORIES)
+        variant = rng.choice(_VARIANTS)
+        test = rng.choice(_TESTS)
+        job_type, prefix = rng.choice(_TYPES)
+        build_id = str(1549300279667593216 + i)
+        org = "openshift" if rng.random() < 0.8 else "openshift-priv"
+        job_name = f"{prefix}-{org}-{repo}-master-{variant}-{test}"
+        extra_refs = None
+        if repo == "release":
+            job_name = f"rehearse-{i % 1000}-{job_name}"
+            tested_repo = rng.choice(_REPOSITORIES[:-1])
+            extra_refs = [{"org": org, "repo": tested_repo, "base_ref": "master"}]
+        start_time = START_TIME + timedelta(minutes=i % 10080)
+        items.append(
+            {
+                "kind": "ProwJob",
+                "metadata": {
+                    "name": f"{i:08x}-0737-11ed-a2cd-0a580a810b83",
+                    "labels": {
+                        "ci-operator.openshift.io/cloud": "packet-edge",
+                        "ci-operator.openshift.io/cloud-cluster-profile": "packet-assisted",
+                        "ci-operator.openshift.io/variant": variant,
+                        "prow.k8s.io/build-id": build_id,
+                        "prow.k8s.io/context": f"{variant}-{test}",
+                        "prow.k8s.io/job": job_name,
+                        "prow.k8s.io/refs.base_ref": "master",
+                        "prow.k8s.io/refs.org": org,
+                        "prow.k8s.io/refs.pull": str(4000 + i % 500),
+                        "prow.k8s.io/refs.repo": repo,
+                        "prow.k8s.io/type": job_type,
+                    },
+                },
+                "spec": {
+                    "type": job_type,
+                    "agent": "kubernetes",
+                    "cluster": "build02",
+                    "job": job_name,
+                    "refs": {"org": org, "repo": repo, "base_ref": "master"},
+                    "extra_refs": extra_refs,
+                    "context": f"ci/prow/{variant}-{test}",
+                    "rerun_command": f"/test {variant}-{test}",
+                },
+                "status": {
+                    "startTime": start_time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "pendingTime": start_time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "completionTime": (
+                        start_time + timedelta(minutes=30 + i % 90)
+                    ).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "state": rng.choice(_STATES),
+                    "description": "Job succeeded.",
+                    "url": f"https://prow.ci.openshift.org/view/gs/test-platform-results/logs/{job_name}/{build_id}",
+                    "build_id": build_id,
+                },
+            }
+        )
+    return items
+
+
+def generate_prowjobs_payload(count: int, seed: int = 0) -> str:
+    """
+    prowjobs.js payload of count jobs.
+    """
+    return json.dumps({"items": generate_prow_job_items(count, seed)})
+
+
+def generate_equinix_metadata(build_id: str, seed: int = 0) -> str:
+    """
+    equinix-metadata.json of the machine of a job.
+    """
+    rng = random.Random(f"{seed}-{build_id}")
+    plan = rng.choice(_PLANS)
+    return json.dumps(
+        {
+            "id": f"{rng.getrandbits(128):032x}",
+            "hostname": f"ipi-ci-op-{rng.getrandbits(32):08x}-98f49-{build_id}",
+            "operating_system": {
+                "slug": "rocky_8",
+                "distro": "rocky",
+                "version": "8",
+                "image_tag": f"{rng.getrandbits(160):040x}",
+            },
+            "plan": plan,
+            "class": plan,
+            "facility": "dc13",
+            "metro": "dc",
+            "private_subnets": ["10.0.0.0/8"],
+            "tags": [],
+        }
+    )
+
+
+def generate_equinix_usages_response(count: int, seed: int = 0) -> dict[str, Any]:
+    """
+    Response of the Equinix usages API: one machine usage out of three comes with two bandwidth usages.
+    Usages start during the week following START_TIME, a few ones are still running.
+    """
+    rng = random.Random(seed)
+    usages = []
+    i = 0
+    while len(usages) < count:
+        name = f"ipi-ci-op-{i:08x}-98f49-{1549300279667593216 + i}"
+        start_date = START_TIME + timedelta(minutes=rng.randrange(10080))
+        end_date = start_date + timedelta(hours=rng.randint(1, 5))
+        plan = rng.choice(_PLANS)
+        machine = {
+            "description": None,
+            "facility": "dc13",
+            "metro": "dc",
+            "name": name,
+            "plan": plan,
+            "plan_version": plan,
+            "price": 1.5,
+            "quantity": 3.0,
+            "total": 4.5,
+            "type": "Instance",
+            "unit": "hour",
+            "start_date": start_date.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "end_date": (end_date.strftime("%Y-%m-%dT%H:%M:%SZ") if i % 50 else None),
+        }
+        usages.append(machine)
+        if i % 3 == 0:
+            for bandwidth in ("Outbound Bandwidth", "Backend Transfer Bandwidth"):
+                usages.append(
+                    machine
+                    | {
+                        "plan": bandwidth,
+                        "plan_version": bandwidth,
+                        "type": "Bandwidth",
+                        "unit": "GB",
+                        "price": 0.05,
+                        "total": 0.15,
+                        "start_date": START_TIME.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                        "end_date": (START_TIME + timedelta(weeks=1)).strftime(
+                            "%Y-%m-%dT%H:%M:%SZ"
+                        ),
+                    }
+                )
+        i += 1
+    return {"usages": usages[:count]}
+
+
+def _to_scan_hits(index: str, documents: list[tuple[dict[str, Any], str]]):
+    # as returned by a scroll: serialized then decoded, datetimes being strings
+    return [
+        {"_index": index, "_id": id, "_source": _serializer.loads(_serializer.dumps(d))}
+        for d, id in documents
+    ]
+
+
+def _generate_jobs(count: int, seed: int) -> list[ProwJob]:
+    jobs = []
+    for item in generate_prow_job_items(count, seed):
+        if item["status"]["state"] not in ("success", "failure"):
+            item["status"]["state"] = "success"
+        jobs.append(ProwJob.parse_obj(item))
+    return jobs
+
+
+def generate_job_documents(count: int, seed: int = 0) -> list[dict[str, Any]]:
+    """
+    Scan hits of the jobs index.
+    """
+    return _to_scan_hits(
+        "jobs-2023.01",
+        [
+            (JobEvent.create_from_prow_job(j).dict(), j.status.build_id)
+            for j in _generate_jobs(count, seed)
+        ],
+    )
+
+
+def generate_step_documents(count: int, seed: int = 0) -> list[dict[str, Any]]:
+    """
+    Scan hits of the steps index, count steps of count / len(_STEPS) jobs.
+    """
+    jobs = _generate_jobs(max(1, count // len(_STEPS)), seed)
+    rng = random.Random(seed)
+    steps = [
+        JobStep(
+            build_id=jobs[i % len(jobs)].status.build_id,
+            name=_STEPS[i // len(jobs) % len(_STEPS)],
+            state="failure" if rng.random() < 0.1 else "success",
+            duration=rng.randint(10, 3600),
+        )
+        for i in range(count)
+    ]
+    return _to_scan_hits(
+        "steps-2023.01", list(EventStoreElastic._gen_step_documents(steps, jobs))
+    )
+
+
+def generate_usage_documents(count: int, seed: int = 0) -> list[dict[str, Any]]:
+    """
+    Scan hits of the usages index.
+    """
+    usages = [
+        EquinixUsage.parse_obj(u)
+        for u in generate_equinix_usages_response(count, seed)["usages"]
+    ]
+    return _to_scan_hits(
+        "usages-2023.01",
+        [
+            (EquinixUsageEvent.create_from_equinix_usage(u).dict(), f"{u.name}-{i}")
+            for i, u in enumerate(usages)
+        ],
+    )
@@ -6,3 +6,6 @@ ES_PASSWORD = os.environ.get("ES_PASSWORD")
 ES_INDEX_FIELDS_PAIRS = os.environ.get("ES_INDEX_FIELDS_PAIRS")
 LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
 DRY_RUN = os.environ.get("DRY_RUN", "false")
+INCREMENTAL = os.environ.get("INCREMENTAL", "false")
+ES_STATE_INDEX = os.environ.get("ES_STATE_INDEX", "elasticsearch-cleanup-state")
+ES_RUN_INDEX = os.environ.get("ES_RUN_INDEX", "runs")
@@ -12,3 +12,9 @@ OPENSEARCH_QUERY_ALL_INDEX_DOCUMENTS: Final[dict[str, Any]] = {
         }
     ],
 }
+
+# Weekly indices are suffixed with the ISO year and week, e.g. 'jobs-2023.01'
+WEEKLY_INDEX_SUFFIX_PATTERN: Final[str] = r"-(\d{4})\.(\d{2})$"
+
+# Number of weeks, current one included, during which a weekly index may still receive documents
+LIVE_WEEKLY_INDICES_COUNT: Final[int] = 2
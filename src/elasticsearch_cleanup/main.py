@@ -6,12 +6,17 @@ The main logic includes:
 3. Identifying duplicate documents based on comparison fields.
 4. Removing the duplicates if not in dry-run mode or logging the bulk actions if in dry-run mode.
 
+In incremental mode, each concrete index matching an index pattern is deduplicated on its own.
+Weekly indices of the current and previous weeks are always processed, while older ones, which
+no longer receive documents, are processed once and then recorded in a marker index.
+
 This scripts assumes:
 1. fields name doesn't contain any of ';', ':', ',', '.'.
 2. '_source' field is Elasticsearch is enabled.
 """
 
 import json
+from datetime import datetime
 from itertools import tee
 from typing import Any, Iterator
 
@@ -19,10 +24,20 @@ from opensearchpy import OpenSearch, helpers
 
 from elasticsearch_cleanup import config, consts
 from elasticsearch_cleanup.logger import get_logger
+from elasticsearch_cleanup.models import IndexFieldSelector
+from elasticsearch_cleanup.state import CleanupState
 from elasticsearch_cleanup.utils import (
     get_value_from_dict,
+    is_live_weekly_index,
     parse_index_and_fields_pairs,
 )
+from prowjobsscraper.metrics import METRICS
+from prowjobsscraper.opensearch_client import (
+    OpenSearchClientSettings,
+    create_opensearch_client,
+)
+from prowjobsscraper.profiling import ProfilingSettings, profile_run
+from prowjobsscraper.run_history import record_run
 
 logger = get_logger(config.LOG_LEVEL)
 
@@ -39,11 +54,14 @@ def remove_documents(
         actions: List of actions to remove documents.
         index: The name of the index.
     """
-    successes, failures = helpers.bulk(
-        client=opensearch_client,
-        actions=actions,
-        stats_only=True,
-    )
+    with METRICS.time("es_bulk", index=index):
+        successes, failures = helpers.bulk(
+            client=opensearch_client,
+            actions=actions,
+            stats_only=True,
+        )
+    METRICS.add_items("es_bulk", successes, index=index)
+    METRICS.add_errors("es_bulk", failures, index=index)
 
     opensearch_client.indices.refresh(index=index)
 
@@ -86,6 +104,18 @@ def get_bulk_actions(
             seen_values.add(unique_fields_value)
 
 
+def _count_scanned_documents(
+    documents: Iterator[dict[str, Any]], index: str
+) -> Iterator[dict[str, Any]]:
+    count = 0
+    try:
+        for doc in documents:
+            count += 1
+            yield doc
+    finally:
+        METRICS.add_items("es_scan", count, index=index)
+
+
 def remove_duplicates_from_index(
     opensearch_client: OpenSearch,
     index: str,
@@ -110,11 +140,14 @@ def remove_duplicates_from_index(
         f"Processing index '{index}' with comparison fields '{comparison_fields}'"
     )
 
-    documents: Iterator = helpers.scan(
-        opensearch_client,
+    documents: Iterator = _count_scanned_documents(
+        helpers.scan(
+            opensearch_client,
+            index=index,
+            query=consts.OPENSEARCH_QUERY_ALL_INDEX_DOCUMENTS,
+            ignore_unavailable=True,
+        ),
         index=index,
-        query=consts.OPENSEARCH_QUERY_ALL_INDEX_DOCUMENTS,
-        ignore_unavailable=True,
     )
 
     bulk_actions = get_bulk_actions(
@@ -136,6 +169,64 @@ def remove_duplicates_from_index(
     )
 
 
+def get_concrete_indices(opensearch_client: OpenSearch, index: str) -> list[str]:
+    """Resolves an index pattern into the concrete indices it matches.
+
+    Args:
+        opensearch_client: The client to communicate with OpenSearch.
+        index: The index name or pattern.
+
+    Returns:
+        The sorted list of concrete index names.
+    """
+    indices = opensearch_client.indices.get(
+        index=index, ignore_unavailable=True, allow_no_indices=True
+    )
+    return sorted(indices)
+
+
+def remove_duplicates_incrementally(
+    opensearch_client: OpenSearch,
+    cleanup_state: CleanupState,
+    index: str,
+    comparison_fields: list[str],
+    dry_run_mode: bool,
+) -> None:
+    """Removes duplicates from the concrete indices of an index pattern that may contain new ones.
+
+    Live weekly indices are always deduplicated, older ones only if they were not already
+    deduplicated by a previous run. Duplicates are looked for within each concrete index.
+
+    Args:
+        opensearch_client: The client to communicate with OpenSearch.
+        cleanup_state: The record of the indices already deduplicated.
+        index: The name or pattern of the OpenSearch indices.
+        comparison_fields: List of fields in the document to use for identifying duplicates.
+        dry_run_mode: If set to True, the function will only log the potential
+                      removal actions without actually deleting any documents.
+    """
+    now = datetime.now()
+    cleaned_markers = cleanup_state.get_cleaned_markers()
+
+    for concrete_index in get_concrete_indices(opensearch_client, index):
+        is_live = is_live_weekly_index(concrete_index, now)
+        if not is_live and cleanup_state.is_cleaned(
+            cleaned_markers, concrete_index, comparison_fields
+        ):
+            logger.debug(f"Skipping index '{concrete_index}', already deduplicated")
+            continue
+
+        remove_duplicates_from_index(
+            opensearch_client=opensearch_client,
+            index=concrete_index,
+            comparison_fields=comparison_fields,
+            dry_run_mode=dry_run_mode,
+        )
+
+        if not is_live and not dry_run_mode:
+            cleanup_state.mark_cleaned(concrete_index, comparison_fields)
+
+
 def main() -> None:
     if (
         config.ES_INDEX_FIELDS_PAIRS is None
@@ -145,19 +236,51 @@ def main() -> None:
     ):
         raise ValueError("failed to get all required environment variables")
 
-    opensearch_client = OpenSearch(
+    opensearch_client = create_opensearch_client(
         config.ES_URL,
-        http_auth=(config.ES_USER, config.ES_PASSWORD),
+        config.ES_USER,
+        config.ES_PASSWORD,
+        settings=OpenSearchClientSettings.create_from_env(),
         verify_certs=False,
-        ssl_show_warn=False,
     )
 
     index_field_selectors = parse_index_and_fields_pairs(
         pairs=config.ES_INDEX_FIELDS_PAIRS
     )
 
+    with record_run(
+        opensearch_client, config.ES_RUN_INDEX, "elasticsearch-cleanup"
+    ), profile_run("elasticsearch-cleanup", ProfilingSettings.create_from_env()):
+        remove_duplicates(opensearch_client, index_field_selectors)
+
+
+def remove_duplicates(
+    opensearch_client: OpenSearch,
+    index_field_selectors: Iterator[IndexFieldSelector],
+) -> None:
+    """Removes the duplicates of every configured index.
+
+    Args:
+        opensearch_client: The client to communicate with OpenSearch.
+        index_field_selectors: The indices and the fields identifying their unique documents.
+    """
     dry_run_mode = not (config.DRY_RUN == "false")
 
+    if config.INCREMENTAL == "true":
+        cleanup_state = CleanupState(
+            opensearch_client=opensearch_client, index=config.ES_STATE_INDEX
+        )
+        for index_field_selector in index_field_selectors:
+            remove_duplicates_incrementally(
+                opensearch_client=opensearch_client,
+                cleanup_state=cleanup_state,
+                index=index_field_selector.index,
+                comparison_fields=index_field_selector.field_selection,
+                dry_run_mode=dry_run_mode,
+            )
+
+        return
+
     for index_field_selector in index_field_selectors:
         remove_duplicates_from_index(
             opensearch_client=opensearch_client,
@@ -0,0 +1,56 @@
+from datetime import datetime, timezone
+from typing import Iterator
+
+from opensearchpy import OpenSearch, helpers
+
+
+class CleanupState:
+    """CleanupState records in a marker index which concrete indices were already deduplicated.
+
+    A marker is bound to the comparison fields used during the cleanup, so that changing
+    the fields of an index pattern triggers a new cleanup of its indices.
+    """
+
+    def __init__(self, opensearch_client: OpenSearch, index: str):
+        self._client = opensearch_client
+        self._index = index
+
+    @staticmethod
+    def _marker_id(index: str, comparison_fields: list[str]) -> str:
+        return f"{index}:{','.join(comparison_fields)}"
+
+    def get_cleaned_markers(self) -> set[str]:
+        """Retrieves the markers of every index already deduplicated.
+
+        Returns:
+            The set of marker identifiers.
+        """
+        documents: Iterator = helpers.scan(
+            self._client,
+            index=self._index,
+            query={"query": {"match_all": {}}, "_source": False},
+            ignore_unavailable=True,
+        )
+        return {doc["_id"] for doc in documents}
+
+    def is_cleaned(
+        self, markers: set[str], index: str, comparison_fields: list[str]
+    ) -> bool:
+        return self._marker_id(index, comparison_fields) in markers
+
+    def mark_cleaned(self, index: str, comparison_fields: list[str]) -> None:
+        """Records that a concrete index has been deduplicated.
+
+        Args:
+            index: The concrete index name.
+            comparison_fields: The fields used to identify duplicates.
+        """
+        self._client.index(
+            index=self._index,
+            id=self._marker_id(index, comparison_fields),
+            body={
+                "index": index,
+                "comparison_fields": comparison_fields,
+                "cleaned_at": datetime.now(tz=timezone.utc).isoformat(),
+            },
+        )
@@ -1,5 +1,8 @@
+import re
+from datetime import datetime, timedelta
 from typing import Any, Iterator
 
+from elasticsearch_cleanup import consts
 from elasticsearch_cleanup.models import IndexFieldSelector
 
 
@@ -42,3 +45,42 @@ def parse_index_and_fields_pairs(pairs: str) -> Iterator[IndexFieldSelector]:
         IndexFieldSelector(index=pair[0], field_selection=pair[1].split(","))
         for pair in (pair.split(":") for pair in pairs.replace(" ", "").split(";"))
     )
+
+
+def format_weekly_index_suffix(date: datetime) -> str:
+    """Formats the suffix of the weekly index a document written at a given date goes to.
+
+    It follows the naming used by prow-jobs-scraper, e.g. '2023.01' for the first ISO week of 2023.
+
+    Args:
+        date: The date to compute the weekly suffix for.
+
+    Returns:
+        The weekly index suffix.
+    """
+    iso_calendar = date.isocalendar()
+    return f"{iso_calendar.year}.{iso_calendar.week:02d}"
+
+
+def is_live_weekly_index(index: str, now: datetime) -> bool:
+    """Checks whether a concrete index may still receive documents.
+
+    Weekly indices of the current and the previous weeks are considered live, as well as
+    any index that doesn't follow the weekly naming scheme since nothing can be assumed about it.
+
+    Args:
+        index: The concrete index name.
+        now: The reference date.
+
+    Returns:
+        True if the index may still be written to, False otherwise.
+    """
+    match = re.search(consts.WEEKLY_INDEX_SUFFIX_PATTERN, index)
+    if match is None:
+        return True
+
+    live_suffixes = {
+        format_weekly_index_suffix(now - timedelta(weeks=weeks))
+        for weeks in range(consts.LIVE_WEEKLY_INDICES_COUNT)
+    }
+    return f"{match.group(1)}.{match.group(2)}" in live_suffixes
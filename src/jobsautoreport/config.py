@@ -8,10 +8,18 @@ ES_PASSWORD = os.environ["ES_PASSWORD"]
 ES_JOB_INDEX = os.environ["ES_JOB_INDEX"]
 ES_STEP_INDEX = os.environ["ES_STEP_INDEX"]
 ES_USAGE_INDEX = os.environ["ES_USAGE_INDEX"]
+ES_RUN_INDEX = os.getenv("ES_RUN_INDEX", "runs")
+ES_ROLLUP_INDEX = os.getenv("ES_ROLLUP_INDEX", "")
+REPORT_FROM_ROLLUPS = os.getenv("REPORT_FROM_ROLLUPS", "false")
+ES_REPORT_CACHE_INDEX = os.getenv("ES_REPORT_CACHE_INDEX", "jobs-auto-report-cache")
+REPORT_CACHE_INVALIDATE_SINCE = os.getenv("REPORT_CACHE_INVALIDATE_SINCE", "")
 SLACK_BOT_TOKEN = os.environ["SLACK_BOT_TOKEN"]
 SLACK_CHANNEL_ID = os.environ["SLACK_CHANNEL_ID"]
 REPORT_INTERVAL = ReportInterval(os.environ["REPORT_INTERVAL"])
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+IO_RECORDING_MODE = os.getenv("IO_RECORDING_MODE", "")
+IO_RECORDING_PATH = os.getenv("IO_RECORDING_PATH", "io-recording.jsonl.gz")
+STRICT_VALIDATION = os.getenv("STRICT_VALIDATION", "false")
 
 # feature flags
 
@@ -0,0 +1,86 @@
+from datetime import datetime
+from functools import cache
+from typing import Any, Callable, Optional, TypeVar
+
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_LIST, SHAPE_SINGLETON
+
+Model = TypeVar("Model", bound=BaseModel)
+
+_Converter = Callable[[Any], Any]
+
+
+def _parse_datetime(value: Any) -> Any:
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+
+    return value
+
+
+def _create_model_converter(model: type[BaseModel]) -> _Converter:
+    def convert(value: Any) -> Any:
+        if isinstance(value, dict):
+            return decode_trusted(model, value)
+
+        return value
+
+    return convert
+
+
+def _create_list_converter(converter: _Converter) -> _Converter:
+    def convert(value: Any) -> Any:
+        if isinstance(value, list):
+            return [converter(v) for v in value]
+
+        return value
+
+    return convert
+
+
+@cache
+def _get_converters(
+    model: type[BaseModel],
+) -> tuple[tuple[str, _Converter], ...]:
+    converters = []
+    for name, field in model.__fields__.items():
+        converter: Optional[_Converter] = None
+        if isinstance(field.type_, type) and issubclass(field.type_, BaseModel):
+            converter = _create_model_converter(field.type_)
+        elif field.type_ is datetime:
+            converter = _parse_datetime
+
+        if converter is None:
+            continue
+        if field.shape == SHAPE_LIST:
+            converters.append((name, _create_list_converter(converter)))
+        elif field.shape == SHAPE_SINGLETON:
+            converters.append((name, converter))
+
+    return tuple(converters)
+
+
+def decode_trusted(model: type[Model], data: dict[str, Any]) -> Model:
+    """
+    Build a model from a document written by the scraper, without validating it: only nested models
+    and datetimes are converted, other values are used as is.
+    """
+    # like parse_obj, unknown keys are ignored and missing optional fields get their default
+    fields_set = set()
+    values = {}
+    for name, field in model.__fields__.items():
+        if name in data:
+            values[name] = data[name]
+            fields_set.add(name)
+        elif not field.required:
+            values[name] = field.get_default()
+
+    for name, converter in _get_converters(model):
+        if (value := values.get(name)) is not None:
+            values[name] = converter(value)
+
+    # same as construct(), without going through the fields a second time
+    m = model.__new__(model)
+    object.__setattr__(m, "__dict__", values)
+    object.__setattr__(m, "__fields_set__", fields_set)
+    m._init_private_attributes()
+    return m
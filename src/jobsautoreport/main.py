@@ -1,6 +1,7 @@
 import logging
 import sys
 from datetime import datetime, timezone
+from typing import Optional
 
 from dateutil.relativedelta import relativedelta
 from opensearchpy import OpenSearch
@@ -8,10 +9,18 @@ from slack_sdk import WebClient
 
 from jobsautoreport import config
 from jobsautoreport.models import FeatureFlags, ReportInterval
-from jobsautoreport.query import Querier
+from jobsautoreport.query import Querier, RollupQuerier
 from jobsautoreport.report import Reporter
+from jobsautoreport.report_cache import ReportCache
 from jobsautoreport.slack.slack_report import SlackReporter
 from jobsautoreport.trends import TrendDetector
+from prowjobsscraper.io_recording import record_io
+from prowjobsscraper.opensearch_client import (
+    OpenSearchClientSettings,
+    create_opensearch_client,
+)
+from prowjobsscraper.profiling import ProfilingSettings, profile_run
+from prowjobsscraper.run_history import record_run
 
 
 def get_reports_start_date(
@@ -34,8 +43,20 @@ def main() -> None:
     os_pwd = config.ES_PASSWORD
     os_host = config.ES_URL
 
-    client = OpenSearch(os_host, http_auth=(os_usr, os_pwd))
+    client = create_opensearch_client(
+        os_host,
+        os_usr,
+        os_pwd,
+        settings=OpenSearchClientSettings.create_from_env(),
+    )
+
+    with record_io(config.IO_RECORDING_MODE, config.IO_RECORDING_PATH), record_run(
+        client, config.ES_RUN_INDEX, "jobs-auto-report"
+    ), profile_run("jobs-auto-report", ProfilingSettings.create_from_env()):
+        send_reports(client)
+
 
+def send_reports(client: OpenSearch, web_client: Optional[WebClient] = None) -> None:
     now = datetime.now(tz=timezone.utc)
     if config.REPORT_INTERVAL == ReportInterval.WEEK:
         # Job execution takes 1-2 hours, and is timed out after 5. We want to have at least 6 hours for all the jobs in the report's interval to be indexed in elasticsearch
@@ -79,14 +100,40 @@ def main() -> None:
         flakiness_rates=config.FEATURE_FLAKINESS_RATES,  # type: ignore
     )
 
-    querier = Querier(
-        opensearch_client=client,
-        jobs_index=jobs_index,
-        steps_index=steps_index,
-        usages_index=usages_index,
-    )
+    querier: Querier
+    # the rollups only cover the jobs scraped once ES_ROLLUP_INDEX is set, they are read once they cover the reports
+    if config.REPORT_FROM_ROLLUPS == "true":
+        if not config.ES_ROLLUP_INDEX:
+            raise ValueError("REPORT_FROM_ROLLUPS requires ES_ROLLUP_INDEX to be set")
+        querier = RollupQuerier(
+            opensearch_client=client,
+            rollup_index=config.ES_ROLLUP_INDEX,
+            strict_validation=config.STRICT_VALIDATION == "true",
+        )
+    else:
+        querier = Querier(
+            opensearch_client=client,
+            jobs_index=jobs_index,
+            steps_index=steps_index,
+            usages_index=usages_index,
+            strict_validation=config.STRICT_VALIDATION == "true",
+        )
+
+    report_cache = None
+    if config.ES_REPORT_CACHE_INDEX:
+        report_cache = ReportCache(
+            opensearch_client=client,
+            index=config.ES_REPORT_CACHE_INDEX,
+            report_interval=config.REPORT_INTERVAL,
+        )
+        if config.REPORT_CACHE_INVALIDATE_SINCE:
+            report_cache.invalidate(
+                cached_before=datetime.fromisoformat(
+                    config.REPORT_CACHE_INVALIDATE_SINCE
+                ).replace(tzinfo=timezone.utc)
+            )
 
-    reporter = Reporter(querier=querier)
+    reporter = Reporter(querier=querier, report_cache=report_cache)
 
     current_report = reporter.get_report(
         from_date=current_report_start_time,
@@ -104,7 +151,8 @@ def main() -> None:
             last_report=last_report, current_report=current_report
         )
 
-    web_client = WebClient(token=config.SLACK_BOT_TOKEN)
+    if web_client is None:
+        web_client = WebClient(token=config.SLACK_BOT_TOKEN)
     slack_reporter = SlackReporter(
         web_client=web_client, channel_id=config.SLACK_CHANNEL_ID
     )
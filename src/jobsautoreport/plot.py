@@ -1,4 +1,5 @@
 import logging
+from typing import Optional
 
 import plotly.graph_objects as graph_objects  # type: ignore
 from plotly import express
@@ -186,9 +187,11 @@ class Plotter:
         self,
         labels: list[str],
         values: list[int],
-        colors: list[str],
         title: str,
+        colors: Optional[list[str]] = None,
     ) -> tuple[str, str]:
+        if colors is None:
+            colors = express.colors.sequential.Rainbow_r
         filename, file_path = self._file_name_proccesor(file_title=title)
         fig = graph_objects.Figure(
             data=[
@@ -1,17 +1,29 @@
 import logging
 from datetime import datetime
-from typing import Any
+from typing import Any, Iterator
 
 from opensearchpy import OpenSearch, helpers
 
-from prowjobsscraper.equinix_usages import EquinixUsageEvent
-from prowjobsscraper.event import JobDetails, StepEvent
+from jobsautoreport.decoder import Model, decode_trusted
+from prowjobsscraper.equinix_usages import EquinixUsage, EquinixUsageEvent
+from prowjobsscraper.event import JobDetails, StepDetails, StepEvent
+from prowjobsscraper.metrics import METRICS
+from prowjobsscraper.rollup import (
+    PACKET_SETUP_STEP_NAME,
+    JobRollup,
+    RollupRun,
+    UsageRollup,
+    get_day,
+)
 
 logger = logging.getLogger(__name__)
 
 
 class Querier:
-    """Querier queries data from elasticsearch database and parses it"""
+    """Querier queries data from elasticsearch database and parses it.
+
+    Documents are decoded without validation unless strict_validation is set.
+    """
 
     def __init__(
         self,
@@ -19,8 +31,10 @@ class Querier:
         jobs_index: str,
         steps_index: str,
         usages_index: str,
+        strict_validation: bool = False,
     ):
         self._os_client = opensearch_client
+        self._strict_validation = strict_validation
         self._jobs_index = jobs_index
         self._steps_index = steps_index
         self._usages_index = usages_index
@@ -134,12 +148,16 @@ class Querier:
         return self._parse_usage_events(elastic_search_usages=elastic_search_usages)
 
     def _scan(self, query: dict[str, Any], index_name: str) -> list[dict[Any, Any]]:
-        res = helpers.scan(
-            client=self._os_client,
-            query=query,
-            index=index_name,
-        )
-        return list(res)
+        with METRICS.time("es_scan", index=index_name):
+            res = list(
+                helpers.scan(
+                    client=self._os_client,
+                    query=query,
+                    index=index_name,
+                )
+            )
+        METRICS.add_items("es_scan", len(res), index=index_name)
+        return res
 
     def _parse_jobs(
         self, elastic_search_jobs: list[dict[Any, Any]]
@@ -162,14 +180,122 @@ class Querier:
             for usage_event in elastic_search_usages
         ]
 
-    @staticmethod
-    def _parse_job(elastic_search_job: dict[Any, Any]) -> JobDetails:
-        return JobDetails.parse_obj(elastic_search_job)
+    def _parse_job(self, elastic_search_job: dict[Any, Any]) -> JobDetails:
+        return self._decode(JobDetails, elastic_search_job)
 
-    @staticmethod
-    def _parse_step_event(elastic_search_step: dict[Any, Any]) -> StepEvent:
-        return StepEvent.parse_obj(elastic_search_step)
+    def _parse_step_event(self, elastic_search_step: dict[Any, Any]) -> StepEvent:
+        return self._decode(StepEvent, elastic_search_step)
 
-    @staticmethod
-    def _parse_usage_event(elastic_search_usage: dict[Any, Any]) -> EquinixUsageEvent:
-        return EquinixUsageEvent.parse_obj(elastic_search_usage)
+    def _parse_usage_event(
+        self, elastic_search_usage: dict[Any, Any]
+    ) -> EquinixUsageEvent:
+        return self._decode(EquinixUsageEvent, elastic_search_usage)
+
+    def _decode(self, model: type[Model], document: dict[Any, Any]) -> Model:
+        # documents are written by the scraper, validation is only needed when their schema is not trusted
+        if self._strict_validation:
+            return model.parse_obj(document)
+
+        return decode_trusted(model, document)
+
+
+class RollupQuerier(Querier):
+    """RollupQuerier rebuilds the jobs, packet setup steps and usages of a time window from the daily rollups the
+    scraper maintains, instead of scanning all their events. The rollups of a window are read once for its jobs and
+    steps.
+    """
+
+    def __init__(
+        self,
+        opensearch_client: OpenSearch,
+        rollup_index: str,
+        strict_validation: bool = False,
+    ):
+        super().__init__(
+            opensearch_client=opensearch_client,
+            jobs_index=rollup_index,
+            steps_index=rollup_index,
+            usages_index=rollup_index,
+            strict_validation=strict_validation,
+        )
+        self._rollup_index = rollup_index
+        self._job_rollups: dict[tuple[datetime, datetime], list[JobRollup]] = {}
+
+    def _query_job_rollups(
+        self, from_date: datetime, to_date: datetime
+    ) -> list[JobRollup]:
+        if (from_date, to_date) not in self._job_rollups:
+            query = {
+                "query": {
+                    "range": {
+                        "job_rollup.day": {"gte": get_day(from_date), "lte": to_date}
+                    }
+                }
+            }
+            logger.debug("OpenSearch query: %s", query)
+            self._job_rollups[from_date, to_date] = [
+                self._decode(JobRollup, row["_source"]["job_rollup"])
+                for row in self._scan(query=query, index_name=self._rollup_index)
+            ]
+        return self._job_rollups[from_date, to_date]
+
+    def _query_runs(
+        self, from_date: datetime, to_date: datetime
+    ) -> Iterator[tuple[JobDetails, RollupRun]]:
+        for job_rollup in self._query_job_rollups(from_date, to_date):
+            for run in job_rollup.runs:
+                # the first and last days of the window are partially covered
+                if from_date <= run.start_time <= to_date:
+                    job = job_rollup.job.copy(
+                        update={
+                            "build_id": run.build_id,
+                            "start_time": run.start_time,
+                            "state": run.state,
+                        }
+                    )
+                    yield job, run
+
+    def query_jobs(self, from_date: datetime, to_date: datetime) -> list[JobDetails]:
+        return [job for job, _ in self._query_runs(from_date, to_date)]
+
+    def query_packet_setup_step_events(
+        self, from_date: datetime, to_date: datetime
+    ) -> list[StepEvent]:
+        return [
+            StepEvent(
+                job=job,
+                step=StepDetails(
+                    details=None, duration=0, name=PACKET_SETUP_STEP_NAME, state=lease
+                ),
+            )
+            for job, run in self._query_runs(from_date, to_date)
+            for lease in run.leases
+        ]
+
+    def query_usage_events(
+        self, from_date: datetime, to_date: datetime
+    ) -> list[EquinixUsageEvent]:
+        query = {
+            "query": {
+                "bool": {
+                    "filter": [
+                        {"range": {"usage_rollup.start_date": {"lte": to_date}}},
+                        {"range": {"usage_rollup.end_date": {"gte": from_date}}},
+                    ]
+                }
+            }
+        }
+        logger.debug("OpenSearch query: %s", query)
+        usage_rollups = [
+            self._decode(UsageRollup, row["_source"]["usage_rollup"])
+            for row in self._scan(query=query, index_name=self._rollup_index)
+        ]
+        # the reports only read the plan and the total of the usages
+        return [
+            EquinixUsageEvent.construct(
+                job=EquinixUsageEvent.JobBuildID(build_id=usage_rollup.build_id),
+                usage=EquinixUsage.construct(plan=plan, total=total),
+            )
+            for usage_rollup in usage_rollups
+            for plan, total in usage_rollup.cost_by_plan.items()
+        ]
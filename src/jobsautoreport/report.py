@@ -1,10 +1,9 @@
 import json
 import logging
+from collections import defaultdict
 from datetime import datetime
 from typing import Callable, Optional
 
-import numpy as np
-
 from jobsautoreport.consts import (
     ASSISTED_REPOSITORIES,
     E2E,
@@ -30,17 +29,20 @@ from jobsautoreport.models import (
     StepState,
 )
 from jobsautoreport.query import Querier
+from jobsautoreport.report_cache import ReportCache
 from prowjobsscraper.equinix_usages import EquinixUsageEvent
-from prowjobsscraper.event import JobDetails, StepEvent
+from prowjobsscraper.event import JobDetails, JobEquinixCost, StepEvent
 
 logger = logging.getLogger(__name__)
 
 
 class Reporter:
-    """Reporter computes metrics from the data Querier retrieves, and generates report"""
+    """Reporter computes metrics from the data Querier retrieves, and generates report, the reports of the windows
+    already computed are served from report_cache when given"""
 
-    def __init__(self, querier: Querier):
+    def __init__(self, querier: Querier, report_cache: Optional[ReportCache] = None):
         self._querier = querier
+        self._report_cache = report_cache
 
     @staticmethod
     def _get_job_triggers_count(job_name: str, jobs: list[JobDetails]) -> int:
@@ -53,20 +55,15 @@ class Reporter:
         return len([job for job in jobs if job.state == job_state.value])
 
     def _get_job_metrics(
-        self,
-        job_identifier: JobIdentifier,
-        jobs: list[JobDetails],
-        usages: list[EquinixUsageEvent],
+        self, job_identifier: JobIdentifier, jobs: list[JobDetails]
     ) -> IdentifiedJobMetrics:
         job_by_name = [job for job in jobs if job.name == job_identifier.name]
         return IdentifiedJobMetrics(
             job_identifier=job_identifier,
-            metrics=self._compute_job_metrics(job_by_name, usages),
+            metrics=self._compute_job_metrics(job_by_name),
         )
 
-    def _compute_job_metrics(
-        self, jobs: list[JobDetails], usages: list[EquinixUsageEvent]
-    ) -> JobMetrics:
+    def _compute_job_metrics(self, jobs: list[JobDetails]) -> JobMetrics:
         total_jobs_number = len(jobs)
         if total_jobs_number == 0:
             return JobMetrics(successes=0, failures=0, cost=0, flakiness=None)
@@ -74,13 +71,7 @@ class Reporter:
         successful_jobs_number = self._get_number_of_jobs_by_state(
             jobs=jobs, job_state=JobState.SUCCESS
         )
-        total_cost = sum(
-            [
-                self._compute_job_cost(usages, job.build_id)
-                for job in jobs
-                if job.build_id is not None
-            ]
-        )
+        total_cost = sum(self._get_job_cost(job) for job in jobs)
         flakiness = self._compute_flakiness(jobs)
 
         return JobMetrics(
@@ -109,6 +100,8 @@ class Reporter:
         elif len(jobs_states_by_start_time) == 1:
             return 0
 
+        import numpy as np
+
         # Flakiness is defined as the weighted average of adjacent absolute differences between job executions (weight is increasing)
         # that way recent flakiness counts more than old flakiness
         states_array = np.array(numeral_jobs_states_by_start_time)
@@ -123,21 +116,42 @@ class Reporter:
         return weighted_average_diffs
 
     @staticmethod
-    def _compute_job_cost(usages: list[EquinixUsageEvent], build_id: str) -> float:
-        return sum(
-            [usage.usage.total for usage in usages if usage.job.build_id == build_id]
-        )
+    def _get_job_cost(job: JobDetails) -> float:
+        return job.equinix_cost.total if job.equinix_cost is not None else 0
+
+    @staticmethod
+    def _attach_equinix_costs(
+        jobs: list[JobDetails], usages: list[EquinixUsageEvent]
+    ) -> list[JobDetails]:
+        """Jobs indexed before their costs were materialized get the cost of their usages of the report"""
+        usages_by_build_id = defaultdict(list)
+        for usage in usages:
+            usages_by_build_id[usage.job.build_id].append(usage.usage)
+
+        return [
+            (
+                job.copy(
+                    update={
+                        "equinix_cost": JobEquinixCost.create_from_usages(
+                            usages_by_build_id[job.build_id]
+                        )
+                    }
+                )
+                if job.equinix_cost is None and job.build_id in usages_by_build_id
+                else job
+            )
+            for job in jobs
+        ]
 
     def _get_top_n_jobs(
         self,
         jobs: list[JobDetails],
         n: int,
         comparison_func: Callable,
-        usages: list[EquinixUsageEvent],
     ) -> list[IdentifiedJobMetrics]:
         distinct_jobs = {JobIdentifier.create_from_job_details(job) for job in jobs}
         res = [
-            self._get_job_metrics(job_identifier, jobs, usages)
+            self._get_job_metrics(job_identifier, jobs)
             for job_identifier in distinct_jobs
         ]
         res = sorted(res, key=comparison_func, reverse=True)
@@ -146,7 +160,7 @@ class Reporter:
         return res
 
     def _get_top_n_failed_jobs(
-        self, jobs: list[JobDetails], n: int, usages: list[EquinixUsageEvent]
+        self, jobs: list[JobDetails], n: int
     ) -> list[IdentifiedJobMetrics]:
         top_failed_jobs = self._get_top_n_jobs(
             jobs=jobs,
@@ -156,7 +170,6 @@ class Reporter:
                 identified_job_metrics.metrics.failures,
                 identified_job_metrics.job_identifier.name,
             ),
-            usages=usages,
         )
         return [
             identified_job
@@ -200,32 +213,21 @@ class Reporter:
         )
 
     @classmethod
-    def _get_job_type_metrics(
-        cls, usages: list[EquinixUsageEvent], jobs: list[JobDetails]
-    ) -> JobTypeMetrics:
+    def _get_job_type_metrics(cls, jobs: list[JobDetails]) -> JobTypeMetrics:
         job_types = {job.type for job in jobs}
         return JobTypeMetrics(
             metrics={
-                job_type: cls._count_cost_by_job_type(usages, jobs, job_type)
+                job_type: cls._count_cost_by_job_type(jobs, job_type)
                 for job_type in job_types
             }
         )
 
-    @staticmethod
-    def _count_cost_by_job_type(
-        usages: list[EquinixUsageEvent], jobs: list[JobDetails], job_type: str
-    ) -> float:
-        jobs_build_id_to_type = {job.build_id: job.type for job in jobs}
-        return sum(
-            [
-                usage.usage.total
-                for usage in usages
-                if jobs_build_id_to_type.get(usage.job.build_id) == job_type
-            ]
-        )
+    @classmethod
+    def _count_cost_by_job_type(cls, jobs: list[JobDetails], job_type: str) -> float:
+        return sum(cls._get_job_cost(job) for job in jobs if job.type == job_type)
 
     def _get_top_n_most_expensive_jobs(
-        self, jobs: list[JobDetails], usages: list[EquinixUsageEvent], n: int
+        self, jobs: list[JobDetails], n: int
     ) -> list[IdentifiedJobMetrics]:
         most_expensive_jobs = self._get_top_n_jobs(
             jobs=jobs,
@@ -234,7 +236,6 @@ class Reporter:
                 identified_job_metrics.metrics.cost,
                 identified_job_metrics.job_identifier.name,
             ),
-            usages=usages,
         )
         return [
             identified_job
@@ -242,16 +243,12 @@ class Reporter:
             if identified_job.metrics.cost > 0
         ]
 
-    def _get_flaky_jobs(
-        self, jobs: list[JobDetails], usages: list[EquinixUsageEvent]
-    ) -> list[IdentifiedJobMetrics]:
+    def _get_flaky_jobs(self, jobs: list[JobDetails]) -> list[IdentifiedJobMetrics]:
         distinct_jobs = {JobIdentifier.create_from_job_details(job) for job in jobs}
         flaky_jobs: list[IdentifiedJobMetrics] = []
         for job_identifier in distinct_jobs:
             jobs_by_name = [job for job in jobs if job_identifier.name == job.name]
-            job_metrics: JobMetrics = self._compute_job_metrics(
-                jobs=jobs_by_name, usages=usages
-            )
+            job_metrics: JobMetrics = self._compute_job_metrics(jobs=jobs_by_name)
             if job_metrics.is_flaky():
                 flaky_jobs.append(
                     IdentifiedJobMetrics(
@@ -268,7 +265,6 @@ class Reporter:
     def _get_periodics_report(
         self,
         periodic_subsystem_and_e2e_jobs: list[JobDetails],
-        usages: list[EquinixUsageEvent],
     ) -> PeriodicJobsReport:
         return PeriodicJobsReport(
             type=JobType.PERIODIC,
@@ -280,17 +276,16 @@ class Reporter:
                 jobs=periodic_subsystem_and_e2e_jobs, job_state=JobState.FAILURE
             ),
             success_rate=self._compute_job_metrics(
-                jobs=periodic_subsystem_and_e2e_jobs, usages=usages
+                jobs=periodic_subsystem_and_e2e_jobs
             ).success_rate,
             top_10_failing=self._get_top_n_failed_jobs(
-                jobs=periodic_subsystem_and_e2e_jobs, n=10, usages=usages
+                jobs=periodic_subsystem_and_e2e_jobs, n=10
             ),
         )
 
     def _get_presubmits_report(
         self,
         presubmit_subsystem_and_e2e_jobs: list[JobDetails],
-        usages: list[EquinixUsageEvent],
         rehearsal_jobs: list[JobDetails],
     ) -> PresubmitJobsReport:
         return PresubmitJobsReport(
@@ -303,16 +298,16 @@ class Reporter:
                 jobs=presubmit_subsystem_and_e2e_jobs, job_state=JobState.FAILURE
             ),
             success_rate=self._compute_job_metrics(
-                jobs=presubmit_subsystem_and_e2e_jobs, usages=usages
+                jobs=presubmit_subsystem_and_e2e_jobs
             ).success_rate,
             top_10_failing=self._get_top_n_failed_jobs(
-                jobs=presubmit_subsystem_and_e2e_jobs, n=10, usages=usages
+                jobs=presubmit_subsystem_and_e2e_jobs, n=10
             ),
             rehearsals=len(rehearsal_jobs),
         )
 
     def _get_postsubmits_report(
-        self, postsubmit_jobs: list[JobDetails], usages: list[EquinixUsageEvent]
+        self, postsubmit_jobs: list[JobDetails]
     ) -> PostSubmitJobsReport:
         return PostSubmitJobsReport(
             type=JobType.POSTSUBMIT,
@@ -323,12 +318,8 @@ class Reporter:
             failures=self._get_number_of_jobs_by_state(
                 jobs=postsubmit_jobs, job_state=JobState.FAILURE
             ),
-            success_rate=self._compute_job_metrics(
-                jobs=postsubmit_jobs, usages=usages
-            ).success_rate,
-            top_10_failing=self._get_top_n_failed_jobs(
-                jobs=postsubmit_jobs, n=10, usages=usages
-            ),
+            success_rate=self._compute_job_metrics(jobs=postsubmit_jobs).success_rate,
+            top_10_failing=self._get_top_n_failed_jobs(jobs=postsubmit_jobs, n=10),
         )
 
     @staticmethod
@@ -359,11 +350,9 @@ class Reporter:
         return EquinixCostReport(
             total_equinix_machines_cost=sum(usage.usage.total for usage in usages),
             cost_by_machine_type=self._get_machine_metrics(usages),
-            cost_by_job_type=self._get_job_type_metrics(
-                usages, assisted_components_jobs
-            ),
+            cost_by_job_type=self._get_job_type_metrics(assisted_components_jobs),
             top_5_most_expensive_jobs=self._get_top_n_most_expensive_jobs(
-                jobs=assisted_components_jobs, usages=usages, n=5
+                jobs=assisted_components_jobs, n=5
             ),
         )
 
@@ -375,7 +364,18 @@ class Reporter:
         )  # for logging with identation
 
     def get_report(self, from_date: datetime, to_date: datetime) -> Report:
-        jobs = self._querier.query_jobs(from_date=from_date, to_date=to_date)
+        if self._report_cache is not None:
+            report = self._report_cache.get(from_date=from_date, to_date=to_date)
+            if report is not None:
+                logger.info(
+                    "Report from %s to %s served from the cache", from_date, to_date
+                )
+                return report
+
+        usages = self._querier.query_usage_events(from_date=from_date, to_date=to_date)
+        jobs = self._attach_equinix_costs(
+            self._querier.query_jobs(from_date=from_date, to_date=to_date), usages
+        )
         logger.debug("%d jobs queried from elasticsearch", len(jobs))
         step_events = self._querier.query_packet_setup_step_events(
             from_date=from_date, to_date=to_date
@@ -401,22 +401,19 @@ class Reporter:
             for job in assisted_components_jobs
             if job.type == JobType.POSTSUBMIT.value
         ]
-        usages = self._querier.query_usage_events(from_date=from_date, to_date=to_date)
 
         report = Report(
             from_date=from_date,
             to_date=to_date,
             periodics_report=self._get_periodics_report(
                 periodic_subsystem_and_e2e_jobs=periodic_subsystem_and_e2e_jobs,
-                usages=usages,
             ),
             presubmits_report=self._get_presubmits_report(
                 presubmit_subsystem_and_e2e_jobs=presubmit_subsystem_and_e2e_jobs,
-                usages=usages,
                 rehearsal_jobs=rehearsal_jobs,
             ),
             postsubmits_report=self._get_postsubmits_report(
-                postsubmit_jobs=postsubmit_jobs, usages=usages
+                postsubmit_jobs=postsubmit_jobs
             ),
             top_5_most_triggered_e2e_or_subsystem_jobs=self._get_top_n_jobs(
                 jobs=presubmit_subsystem_and_e2e_jobs,
@@ -425,7 +422,6 @@ class Reporter:
                     identified_job_metrics.metrics.total,
                     identified_job_metrics.job_identifier.name,
                 ),
-                usages=usages,
             ),
             equinix_usage_report=self._get_equinix_usage_report(
                 step_events=step_events
@@ -433,11 +429,11 @@ class Reporter:
             equinix_cost_report=self._get_equinix_cost(
                 assisted_components_jobs=assisted_components_jobs, usages=usages
             ),
-            flaky_jobs=self._get_flaky_jobs(
-                jobs=periodic_subsystem_and_e2e_jobs, usages=usages
-            ),
+            flaky_jobs=self._get_flaky_jobs(jobs=periodic_subsystem_and_e2e_jobs),
         )
 
         self.log_report(report)
+        if self._report_cache is not None:
+            self._report_cache.put(report)
 
         return report
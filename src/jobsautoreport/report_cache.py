@@ -0,0 +1,111 @@
+import logging
+from datetime import datetime, timezone
+from importlib import metadata
+from typing import Iterator, Optional
+
+from opensearchpy import OpenSearch, helpers
+from opensearchpy.exceptions import NotFoundError
+from pydantic import ValidationError
+
+from jobsautoreport.models import Report, ReportInterval
+
+logger = logging.getLogger(__name__)
+
+
+def get_code_version() -> str:
+    # the version is derived from git by setuptools_scm, so that any change to the code invalidates the cache
+    try:
+        return metadata.version("prow-jobs-scraper")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+class ReportCache:
+    """ReportCache persists the reports already computed in an index, keyed by their interval, their time window and
+    the version of the code that computed them, so that the window of the last report isn't computed again from the
+    raw documents. A failure to read or write the cache is only logged, the report being computed instead.
+    """
+
+    def __init__(
+        self,
+        opensearch_client: OpenSearch,
+        index: str,
+        report_interval: ReportInterval,
+        code_version: Optional[str] = None,
+    ):
+        self._client = opensearch_client
+        self._index = index
+        self._report_interval = report_interval
+        self._code_version = code_version or get_code_version()
+
+    def _report_id(self, from_date: datetime, to_date: datetime) -> str:
+        return ":".join(
+            [
+                self._report_interval.value,
+                from_date.isoformat(),
+                to_date.isoformat(),
+                self._code_version,
+            ]
+        )
+
+    def get(self, from_date: datetime, to_date: datetime) -> Optional[Report]:
+        try:
+            document = self._client.get(
+                index=self._index, id=self._report_id(from_date, to_date)
+            )
+            return Report.parse_raw(document["_source"]["report"])
+        except NotFoundError:
+            return None
+        except (ValidationError, KeyError) as e:
+            logger.warning("Ignoring invalid cached report: %s", e)
+            return None
+        except Exception as e:
+            logger.warning("Report cache cannot be read: %s", e)
+            return None
+
+    def put(self, report: Report) -> None:
+        try:
+            self._client.index(
+                index=self._index,
+                id=self._report_id(report.from_date, report.to_date),
+                body={
+                    "interval": self._report_interval.value,
+                    "from_date": report.from_date.isoformat(),
+                    "to_date": report.to_date.isoformat(),
+                    "code_version": self._code_version,
+                    "created_at": datetime.now(tz=timezone.utc).isoformat(),
+                    # stored as a string, so that the fields of the report aren't mapped
+                    "report": report.json(),
+                },
+            )
+        except Exception as e:
+            logger.warning("Report cannot be cached: %s", e)
+
+    def invalidate(self, cached_before: datetime) -> int:
+        """Removes the reports cached before cached_before, of every interval and code version, for the documents
+        indexed late to be reported. The reports cached afterwards are kept, so that invalidating again with the same
+        date removes nothing more.
+
+        Returns:
+            The number of reports removed.
+        """
+        try:
+            documents: Iterator = helpers.scan(
+                self._client,
+                index=self._index,
+                query={
+                    "query": {
+                        "range": {"created_at": {"lt": cached_before.isoformat()}}
+                    },
+                    "_source": False,
+                },
+                ignore_unavailable=True,
+            )
+            ids = [doc["_id"] for doc in documents]
+            for id in ids:
+                self._client.delete(index=self._index, id=id, ignore=404)
+        except Exception as e:
+            logger.warning("Report cache cannot be invalidated: %s", e)
+            return 0
+        logger.info("%d reports cached before %s invalidated", len(ids), cached_before)
+        return len(ids)
@@ -1,7 +1,6 @@
 import logging
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-from plotly import express  # type: ignore
 from retry import retry
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
@@ -27,10 +26,12 @@ from jobsautoreport.models import (
     SlackMessage,
     Trends,
 )
-from jobsautoreport.plot import Plotter
 from jobsautoreport.slack.slack_generate import SlackGenerator
 from jobsautoreport.trends import TrendSlackIntegrator
 
+if TYPE_CHECKING:
+    from jobsautoreport.plot import Plotter
+
 logger = logging.getLogger(__name__)
 
 
@@ -76,7 +77,7 @@ class SlackReporter:
         self,
         report: Report,
         trends: Optional[Trends],
-        plotter: Plotter,
+        plotter: "Plotter",
         thread_time_stamp: str,
     ) -> None:
         if report.periodics_report.success_rate is not None:
@@ -164,7 +165,7 @@ class SlackReporter:
                 )
 
     def _send_flakiness_rates(
-        self, report: Report, plotter: Plotter, thread_time_stamp: str
+        self, report: Report, plotter: "Plotter", thread_time_stamp: str
     ):
         if len(report.flaky_jobs) > 0:
             filename, file_path = plotter.create_flaky_jobs_graph(
@@ -183,7 +184,7 @@ class SlackReporter:
         report: Report,
         trends: Optional[Trends],
         feature_flags: FeatureFlags,
-        plotter: Plotter,
+        plotter: "Plotter",
         thread_time_stamp: str,
     ):
         if report.equinix_cost_report.total_equinix_machines_cost > 0:
@@ -220,7 +221,6 @@ class SlackReporter:
                 filename, file_path = plotter.create_pie_chart(
                     labels=labels,
                     values=values,
-                    colors=express.colors.sequential.Rainbow_r,
                     title=COST_BY_MACHINE_TYPE_TITLE,
                 )
                 self._upload_file(
@@ -233,6 +233,9 @@ class SlackReporter:
     def send_report(
         self, report: Report, trends: Optional[Trends], feature_flags: FeatureFlags
     ) -> None:
+        # plotly takes most of the startup time of the report, it is only loaded to send one
+        from jobsautoreport.plot import Plotter
+
         plotter = Plotter()
         thread_time_stamp = self._post_message(
             message=SlackGenerator.create_header_message(report=report),
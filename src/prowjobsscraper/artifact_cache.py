@@ -0,0 +1,103 @@
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachedArtifact:
+    content: Optional[bytes]
+
+    @property
+    def is_missing(self) -> bool:
+        return self.content is None
+
+
+class ArtifactCache:
+    """
+    ArtifactCache persists on local storage the GCS artifacts already downloaded, as well as the ones known to be missing,
+    so that re-scraped jobs don't hit GCS again. Entries expire after ttl and the least recently used ones are evicted
+    once the cached content exceeds max_size bytes.
+    """
+
+    def __init__(self, path: str, ttl: timedelta, max_size: int):
+        self._ttl = ttl
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS artifacts ("
+                "key TEXT PRIMARY KEY, content BLOB, size INTEGER NOT NULL, "
+                "stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS artifacts_accessed_at ON artifacts (accessed_at)"
+            )
+            self._connection.execute(
+                "DELETE FROM artifacts WHERE stored_at < ?", (self._expiry(),)
+            )
+
+    def _expiry(self) -> float:
+        return time.time() - self._ttl.total_seconds()
+
+    def get(self, key: str) -> Optional[CachedArtifact]:
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT content FROM artifacts WHERE key = ? AND stored_at >= ?",
+                (key, self._expiry()),
+            ).fetchone()
+            if row is None:
+                return None
+
+            self._connection.execute(
+                "UPDATE artifacts SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            return CachedArtifact(content=row[0])
+
+    def set_present(self, key: str, content: Union[str, bytes]) -> None:
+        if isinstance(content, str):
+            content = content.encode()
+        self._set(key, content)
+
+    def set_missing(self, key: str) -> None:
+        self._set(key, None)
+
+    def _set(self, key: str, content: Optional[bytes]) -> None:
+        now = time.time()
+        size = len(content) if content is not None else 0
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?, ?)",
+                (key, content, size, now, now),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        (total_size,) = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM artifacts"
+        ).fetchone()
+        if total_size <= self._max_size:
+            return
+
+        evicted_keys = []
+        for key, size in self._connection.execute(
+            "SELECT key, size FROM artifacts WHERE size > 0 ORDER BY accessed_at"
+        ):
+            if total_size <= self._max_size:
+                break
+            evicted_keys.append((key,))
+            total_size -= size
+
+        self._connection.executemany(
+            "DELETE FROM artifacts WHERE key = ?", evicted_keys
+        )
+        logger.debug("%d artifacts evicted from cache", len(evicted_keys))
+
+    def close(self) -> None:
+        self._connection.close()
@@ -0,0 +1,113 @@
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+from google.cloud import exceptions, storage  # type: ignore
+
+from prowjobsscraper import utils
+from prowjobsscraper.artifact_cache import ArtifactCache
+from prowjobsscraper.equinix_metadata import EquinixMetadataExtractor
+from prowjobsscraper.metrics import METRICS
+from prowjobsscraper.prowjob import ProwJob, ProwJobs
+from prowjobsscraper.step import JobStep, StepExtractor
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactFetcher:
+    """
+    ArtifactFetcher downloads every GCS artifact needed for a job (equinix metadata and junit file)
+    on a single worker pool sharing one bucket handle, and routes them back to their extractor.
+    When a cache is provided, artifacts already downloaded or known to be missing are not requested again.
+    """
+
+    def __init__(
+        self,
+        client: storage.Client,
+        gcs_bucket_name: str,
+        step_extractor: StepExtractor,
+        equinix_metadata_extractor: EquinixMetadataExtractor,
+        max_workers: int,
+        cache: Optional[ArtifactCache] = None,
+    ):
+        self._gcs_bucket_name = gcs_bucket_name
+        self._bucket = client.bucket(gcs_bucket_name)
+        self._cache = cache
+        self._step_extractor = step_extractor
+        self._equinix_metadata_extractor = equinix_metadata_extractor
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="gcs"
+        )
+
+    def fetch(self, jobs: ProwJobs) -> list[JobStep]:
+        """
+        Hydrate the jobs with their equinix metadata and return their steps.
+        Downloads are scheduled for every job upfront and consumed in order.
+        """
+        scheduled_jobs = [(job, self._schedule(job)) for job in jobs.items]
+
+        steps = []
+        for job, (metadata, junit) in scheduled_jobs:
+            steps.extend(self._route(job, metadata, junit))
+        return steps
+
+    def fetch_job(self, job: ProwJob) -> list[JobStep]:
+        metadata, junit = self._schedule(job)
+        return self._route(job, metadata, junit)
+
+    def _schedule(
+        self, job: ProwJob
+    ) -> tuple[Optional[Future[Optional[str]]], Future[Optional[str]]]:
+        metadata = None
+        if (
+            metadata_path := self._equinix_metadata_extractor.get_metadata_path(job)
+        ) is not None:
+            metadata = self._executor.submit(
+                self._download, metadata_path, "equinix_metadata"
+            )
+
+        junit = self._executor.submit(
+            self._download, self._step_extractor.get_junit_path(job), "junit"
+        )
+        return metadata, junit
+
+    def _route(
+        self,
+        job: ProwJob,
+        metadata: Optional[Future[Optional[str]]],
+        junit: Future[Optional[str]],
+    ) -> list[JobStep]:
+        if metadata is not None:
+            self._equinix_metadata_extractor.set_equinix_metadata(
+                job, metadata.result()
+            )
+
+        return self._step_extractor.create_job_steps(job, junit.result())
+
+    def _download(self, path: str, artifact: str) -> Optional[str]:
+        cache_key = f"{self._gcs_bucket_name}/{path}"
+        if (
+            self._cache is not None
+            and (cached := self._cache.get(cache_key)) is not None
+        ):
+            logger.debug("Found GCS artifact in cache: %s", path)
+            METRICS.add_items("gcs_cache_hit", 1, artifact=artifact)
+            return cached.content  # type: ignore
+
+        try:
+            with METRICS.time("gcs_download", artifact=artifact):
+                content = utils.download_blob_as_string(self._bucket, path)
+        except exceptions.NotFound as e:
+            logger.debug("GCS artifact is missing from %s: %s", path, e)
+            if self._cache is not None:
+                self._cache.set_missing(cache_key)
+            return None
+        except exceptions.ClientError as e:
+            logger.debug("GCS artifact cannot be retrieved from %s: %s", path, e)
+            return None
+
+        logger.debug("Found GCS artifact: %s", path)
+        METRICS.add_bytes("gcs_download", len(content), artifact=artifact)
+        if self._cache is not None:
+            self._cache.set_present(cache_key, content)
+        return content
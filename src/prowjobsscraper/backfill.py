@@ -0,0 +1,260 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from typing import Any, Final, Optional
+
+import orjson
+from google.cloud import exceptions, storage  # type: ignore
+
+from prowjobsscraper import utils
+from prowjobsscraper.event import EventStoreElastic
+from prowjobsscraper.metrics import METRICS
+from prowjobsscraper.prowjob import ProwJob, ProwJobs, is_assisted_job_name
+from prowjobsscraper.scraper import Scraper
+
+logger = logging.getLogger(__name__)
+
+# Prow build ids are snowflake ids: the milliseconds elapsed since this epoch, shifted by 22 bits.
+# They have 19 digits since 2018, so that their lexicographic order, used by GCS listings, is chronological.
+_BUILD_ID_EPOCH_MS: Final[int] = 1288834974657
+_BUILD_ID_TIMESTAMP_SHIFT: Final[int] = 22
+
+# Periodic and postsubmit runs are stored under logs/{job}/{build_id}/, presubmit runs under
+# pr-logs/pull/{org}_{repo}/{pull}/{job}/{build_id}/ and linked from pr-logs/directory/{job}/{build_id}.txt
+_LOGS_PREFIX: Final[str] = "logs/"
+_PR_LOGS_DIRECTORY_PREFIX: Final[str] = "pr-logs/directory/"
+
+_JOB_URL_TEMPLATE: Final[str] = "https://prow.ci.openshift.org/view/gs/{bucket}/{path}"
+
+# runs are listed by build id, their start time may be a little later than the time of their build id
+_START_TIME_MARGIN: Final[timedelta] = timedelta(days=1)
+
+
+def get_build_id_lower_bound(time: datetime) -> str:
+    """
+    Return the smallest build id of the jobs started at time or later.
+    """
+    elapsed_ms = int(time.timestamp() * 1000) - _BUILD_ID_EPOCH_MS
+    return str(elapsed_ms << _BUILD_ID_TIMESTAMP_SHIFT)
+
+
+class JobHistory:
+    """
+    JobHistory lists the runs of the assisted jobs from the layout of Prow's GCS bucket, and rebuilds their ProwJob
+    from the prowjob.json and finished.json stored with their artifacts, so that jobs no longer in Prow's job list
+    can be scraped.
+    """
+
+    def __init__(self, client: storage.Client, gcs_bucket_name: str):
+        self._client = client
+        self._gcs_bucket_name = gcs_bucket_name
+        self._bucket = client.bucket(gcs_bucket_name)
+
+    def list_job_names(self) -> list[str]:
+        names = set()
+        for prefix in (_LOGS_PREFIX, _PR_LOGS_DIRECTORY_PREFIX):
+            for job_prefix in self._list_prefixes(prefix):
+                name = job_prefix.removeprefix(prefix).rstrip("/")
+                if is_assisted_job_name(name):
+                    names.add(name)
+        return sorted(names)
+
+    def list_job_runs(self, job_name: str, start: datetime, end: datetime) -> list[str]:
+        """
+        Return the GCS paths of the runs of the job started between start (included) and end (excluded).
+        """
+        start_build_id = get_build_id_lower_bound(start)
+        end_build_id = get_build_id_lower_bound(end)
+
+        logs_prefix = f"{_LOGS_PREFIX}{job_name}/"
+        paths = [
+            path.rstrip("/")
+            for path in self._list_prefixes(
+                logs_prefix,
+                start_offset=f"{logs_prefix}{start_build_id}",
+                end_offset=f"{logs_prefix}{end_build_id}",
+            )
+        ]
+
+        directory_prefix = f"{_PR_LOGS_DIRECTORY_PREFIX}{job_name}/"
+        links = self._client.list_blobs(
+            self._gcs_bucket_name,
+            prefix=directory_prefix,
+            start_offset=f"{directory_prefix}{start_build_id}",
+            end_offset=f"{directory_prefix}{end_build_id}",
+        )
+        for link in links:
+            if not link.name.endswith(".txt"):
+                continue
+            target = link.download_as_text().strip()
+            paths.append(target.removeprefix(f"gs://{self._gcs_bucket_name}/"))
+        return paths
+
+    def _list_prefixes(self, prefix: str, **kwargs: Any) -> list[str]:
+        blobs = self._client.list_blobs(
+            self._gcs_bucket_name, prefix=prefix, delimiter="/", **kwargs
+        )
+        # prefixes are collected while the pages are consumed
+        for _ in blobs:
+            pass
+        return sorted(blobs.prefixes)
+
+    def get_prow_job(self, path: str) -> Optional[ProwJob]:
+        """
+        Rebuild the ProwJob of the run stored at path, the prowjob.json uploaded when the run started is completed
+        with the result of the run from its finished.json. None is returned when the run has no prowjob.json.
+        """
+        prowjob = self._download_json(f"{path}/prowjob.json")
+        if prowjob is None:
+            logger.warning("No prowjob.json found for %s, the run is skipped", path)
+            return None
+
+        status = prowjob.setdefault("status", {})
+        status.setdefault("build_id", path.rsplit("/", 1)[-1])
+        status.setdefault(
+            "url", _JOB_URL_TEMPLATE.format(bucket=self._gcs_bucket_name, path=path)
+        )
+        if status.get("completionTime") is None:
+            finished = self._download_json(f"{path}/finished.json")
+            if finished is not None and finished.get("result"):
+                status["state"] = finished["result"].lower()
+                status["completionTime"] = datetime.fromtimestamp(
+                    finished["timestamp"], tz=timezone.utc
+                )
+
+        return ProwJob.parse_obj(prowjob)
+
+    def _download_json(self, path: str) -> Optional[dict[str, Any]]:
+        try:
+            with METRICS.time("gcs_download", artifact="history"):
+                content = utils.download_blob_as_string(self._bucket, path)
+        except exceptions.NotFound:
+            return None
+        METRICS.add_bytes("gcs_download", len(content), artifact="history")
+        return orjson.loads(content)
+
+
+class Backfiller:
+    """
+    Backfiller scrapes the runs of the assisted jobs between two dates from their GCS history. The date range is
+    split into shards of shard_duration, processed by max_workers parallel workers. The shards completed are saved
+    to the state file, so that an interrupted backfill resumes where it stopped when run again with the same range
+    and shard duration.
+    """
+
+    def __init__(
+        self,
+        job_history: JobHistory,
+        scraper: Scraper,
+        event_store: EventStoreElastic,
+        max_workers: int,
+        state_path: Optional[str] = None,
+    ):
+        self._job_history = job_history
+        self._scraper = scraper
+        self._event_store = event_store
+        self._max_workers = max_workers
+        self._state_path = state_path
+        self._state_lock = threading.Lock()
+        self._completed_shards = self._load_state()
+
+    def _load_state(self) -> set[str]:
+        if self._state_path is None or not os.path.exists(self._state_path):
+            return set()
+
+        try:
+            with open(self._state_path, "rb") as f:
+                return set(orjson.loads(f.read())["completed_shards"])
+        except (orjson.JSONDecodeError, KeyError) as e:
+            logger.warning("Ignoring invalid backfill state: %s", e)
+            return set()
+
+    def _save_state(self, shard: str) -> None:
+        with self._state_lock:
+            self._completed_shards.add(shard)
+            if self._state_path is None:
+                return
+
+            tmp_path = f"{self._state_path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(
+                    orjson.dumps({"completed_shards": sorted(self._completed_shards)})
+                )
+            os.replace(tmp_path, self._state_path)
+
+    @staticmethod
+    def _get_shards(
+        start: datetime, end: datetime, shard_duration: timedelta
+    ) -> list[tuple[datetime, datetime]]:
+        shards = []
+        while start < end:
+            shards.append((start, min(start + shard_duration, end)))
+            start += shard_duration
+        return shards
+
+    @staticmethod
+    def _format_shard(shard: tuple[datetime, datetime]) -> str:
+        return f"{shard[0].isoformat()}/{shard[1].isoformat()}"
+
+    def run(self, start: datetime, end: datetime, shard_duration: timedelta) -> None:
+        shards = [
+            shard
+            for shard in self._get_shards(start, end, shard_duration)
+            if self._format_shard(shard) not in self._completed_shards
+        ]
+        logger.info("%s shards will be backfilled", len(shards))
+        if not shards:
+            return
+
+        job_names = self._job_history.list_job_names()
+        logger.info("%s assisted jobs found in the history", len(job_names))
+        # the jobs of the range may be stored in the indices of their weeks, older than the ones scraped last
+        known_jobs_build_ids = self._event_store.scan_build_ids()
+        known_jobs_build_ids |= self._event_store.scan_build_ids_started_between(
+            start - _START_TIME_MARGIN, end + _START_TIME_MARGIN
+        )
+
+        failed_shards = []
+        with ThreadPoolExecutor(
+            max_workers=self._max_workers, thread_name_prefix="backfill"
+        ) as executor:
+            futures = {
+                executor.submit(
+                    self._backfill_shard, shard, job_names, known_jobs_build_ids
+                ): self._format_shard(shard)
+                for shard in shards
+            }
+            for future in as_completed(futures):
+                shard = futures[future]
+                try:
+                    future.result()
+                except Exception:
+                    logger.exception("Shard %s cannot be backfilled", shard)
+                    failed_shards.append(shard)
+                else:
+                    self._save_state(shard)
+
+        if failed_shards:
+            raise RuntimeError(
+                f"{len(failed_shards)} shards cannot be backfilled, run the backfill again to retry them"
+            )
+
+    def _backfill_shard(
+        self,
+        shard: tuple[datetime, datetime],
+        job_names: list[str],
+        known_jobs_build_ids: set[str],
+    ) -> None:
+        with METRICS.time("backfill_list"):
+            paths = [
+                path
+                for job_name in job_names
+                for path in self._job_history.list_job_runs(job_name, *shard)
+            ]
+        METRICS.add_items("backfill_list", len(paths))
+        logger.info("%s runs found in shard %s", len(paths), self._format_shard(shard))
+
+        jobs = [job for path in paths if (job := self._job_history.get_prow_job(path))]
+        self._scraper.backfill(ProwJobs(items=jobs), known_jobs_build_ids)
@@ -6,8 +6,33 @@ ES_PASSWORD = os.environ["ES_PASSWORD"]
 ES_STEP_INDEX = os.environ["ES_STEP_INDEX"]
 ES_JOB_INDEX = os.environ["ES_JOB_INDEX"]
 ES_USAGE_INDEX = os.environ["ES_USAGE_INDEX"]
+ES_RUN_INDEX = os.getenv("ES_RUN_INDEX", "runs")
+ES_ROLLUP_INDEX = os.getenv("ES_ROLLUP_INDEX", "")
 JOB_LIST_URL = os.environ["JOB_LIST_URL"]
+JOB_LIST_SNAPSHOT_PATH = os.getenv("JOB_LIST_SNAPSHOT_PATH")
+JOB_LIST_PARSE_WORKERS = os.getenv("JOB_LIST_PARSE_WORKERS", "1")
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+IO_RECORDING_MODE = os.getenv("IO_RECORDING_MODE", "")
+IO_RECORDING_PATH = os.getenv("IO_RECORDING_PATH", "io-recording.jsonl.gz")
 EQUINIX_PROJECT_ID = os.environ["EQUINIX_PROJECT_ID"]
 EQUINIX_PROJECT_TOKEN = os.environ["EQUINIX_PROJECT_TOKEN"]
 GCS_BUCKET_NAME = os.getenv("GCS_BUCKET_NAME", "test-platform-results")
+SCRAPER_ASYNC = os.getenv("SCRAPER_ASYNC", "false")
+SCRAPER_MAX_CONCURRENCY = os.getenv("SCRAPER_MAX_CONCURRENCY", "10")
+SCRAPER_SHARD_COUNT = os.getenv("SCRAPER_SHARD_COUNT", "1")
+# set by kubernetes for each pod of an indexed job
+SCRAPER_SHARD_INDEX = os.getenv(
+    "SCRAPER_SHARD_INDEX", os.getenv("JOB_COMPLETION_INDEX", "0")
+)
+GCS_MAX_WORKERS = os.getenv("GCS_MAX_WORKERS", "10")
+GCS_ARTIFACT_CACHE_PATH = os.getenv("GCS_ARTIFACT_CACHE_PATH")
+GCS_ARTIFACT_CACHE_TTL = os.getenv("GCS_ARTIFACT_CACHE_TTL", "604800")
+GCS_ARTIFACT_CACHE_MAX_SIZE = os.getenv("GCS_ARTIFACT_CACHE_MAX_SIZE", "1073741824")
+METRICS_TEXTFILE_PATH = os.getenv("METRICS_TEXTFILE_PATH")
+METRICS_PUSHGATEWAY_URL = os.getenv("METRICS_PUSHGATEWAY_URL")
+METRICS_SUMMARY_PATH = os.getenv("METRICS_SUMMARY_PATH")
+DAEMON_SCRAPE_SCHEDULE = os.getenv("DAEMON_SCRAPE_SCHEDULE", "@hourly")
+DAEMON_REPORT_SCHEDULE = os.getenv("DAEMON_REPORT_SCHEDULE", "")
+DAEMON_CLEANUP_SCHEDULE = os.getenv("DAEMON_CLEANUP_SCHEDULE", "")
+DAEMON_JITTER = os.getenv("DAEMON_JITTER", "60")
+DAEMON_SCAN_CACHE_TTL = os.getenv("DAEMON_SCAN_CACHE_TTL", "86400")
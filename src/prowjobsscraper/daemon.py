@@ -0,0 +1,281 @@
+import logging
+import random
+import signal
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from types import ModuleType
+from typing import Callable, Final, Optional
+
+from dateutil.relativedelta import relativedelta
+from opensearchpy import OpenSearch
+
+from prowjobsscraper.metrics import METRICS
+from prowjobsscraper.opensearch_client import (
+    OpenSearchClientSettings,
+    create_opensearch_client,
+)
+from prowjobsscraper.profiling import ProfilingSettings, profile_run
+from prowjobsscraper.run_history import record_run
+
+logger = logging.getLogger(__name__)
+
+
+def _start_of_hour(time: datetime) -> datetime:
+    return time.replace(minute=0, second=0, microsecond=0)
+
+
+def _start_of_day(time: datetime) -> datetime:
+    return _start_of_hour(time).replace(hour=0)
+
+
+# same shortcuts as the schedules of the CronJobs, weeks start on Sunday
+_SCHEDULES: Final[dict[str, Callable[[datetime], datetime]]] = {
+    "@hourly": lambda t: _start_of_hour(t) + timedelta(hours=1),
+    "@daily": lambda t: _start_of_day(t) + timedelta(days=1),
+    "@weekly": lambda t: _start_of_day(t) + timedelta(days=7 - t.isoweekday() % 7),
+    "@monthly": lambda t: _start_of_day(t).replace(day=1) + relativedelta(months=1),
+}
+
+
+def get_next_run_time(schedule: str, after: datetime) -> datetime:
+    """
+    Return the first time after the given one matching the schedule, either @hourly, @daily, @weekly, @monthly
+    or a number of seconds.
+    """
+    if (next_run_time := _SCHEDULES.get(schedule)) is not None:
+        return next_run_time(after)
+
+    try:
+        return after + timedelta(seconds=int(schedule))
+    except ValueError:
+        raise ValueError(f"invalid schedule '{schedule}'") from None
+
+
+@dataclass(frozen=True)
+class DaemonSettings:
+    """
+    DaemonSettings schedules the tasks of the daemon, a task with an empty schedule is disabled. Each run is delayed
+    by up to jitter seconds. The build ids and usage identifiers already indexed are scanned every scan_cache_ttl
+    seconds, instead of at every scrape.
+    """
+
+    scrape_schedule: str = "@hourly"
+    report_schedule: str = ""
+    cleanup_schedule: str = ""
+    jitter: int = 60
+    scan_cache_ttl: int = 86400
+    run_index: str = "runs"
+
+    @classmethod
+    def create_from_config(cls, config: ModuleType) -> "DaemonSettings":
+        """
+        Read the settings from the configuration module of the scraper, prowjobsscraper.config.
+        """
+        return cls(
+            scrape_schedule=config.DAEMON_SCRAPE_SCHEDULE,
+            report_schedule=config.DAEMON_REPORT_SCHEDULE,
+            cleanup_schedule=config.DAEMON_CLEANUP_SCHEDULE,
+            jitter=int(config.DAEMON_JITTER),
+            scan_cache_ttl=int(config.DAEMON_SCAN_CACHE_TTL),
+            run_index=config.ES_RUN_INDEX,
+        )
+
+
+@dataclass(frozen=True)
+class Task:
+    name: str
+    schedule: str
+    run: Callable[[], None]
+
+
+class Scheduler:
+    """
+    Scheduler runs the tasks on their schedule, one at a time, so that a run never overlaps another one. A task due
+    while another one runs waits for it, and the runs missed by a long task are coalesced into one. Each run is
+    delayed by a random jitter of up to jitter seconds, so that the services called aren't hit on the hour.
+    """
+
+    def __init__(
+        self,
+        tasks: list[Task],
+        jitter: float,
+        clock: Callable[[], datetime] = lambda: datetime.now(tz=timezone.utc),
+    ):
+        self._tasks = tasks
+        self._jitter = jitter
+        self._clock = clock
+        self._stopped = threading.Event()
+        now = self._clock()
+        self._next_run_times = {
+            task.name: self._get_next_run_time(task, now) for task in tasks
+        }
+
+    def _get_next_run_time(self, task: Task, after: datetime) -> datetime:
+        return get_next_run_time(task.schedule, after) + timedelta(
+            seconds=random.uniform(0, self._jitter)
+        )
+
+    def run_pending(self) -> Optional[datetime]:
+        """
+        Run the tasks due, in the order they are due, and return when the next one is due.
+        """
+        now = self._clock()
+        due_tasks = sorted(
+            (task for task in self._tasks if self._next_run_times[task.name] <= now),
+            key=lambda task: self._next_run_times[task.name],
+        )
+        for task in due_tasks:
+            if self._stopped.is_set():
+                break
+
+            logger.info("Running task %s", task.name)
+            try:
+                task.run()
+            except Exception:
+                logger.exception("Task %s failed", task.name)
+            self._next_run_times[task.name] = self._get_next_run_time(
+                task, self._clock()
+            )
+
+        return min(self._next_run_times.values(), default=None)
+
+    def run_forever(self) -> None:
+        while not self._stopped.is_set():
+            next_run_time = self.run_pending()
+            if next_run_time is None:
+                logger.warning("No task is scheduled")
+                return
+
+            logger.info("Next task due at %s", next_run_time.isoformat())
+            self._stopped.wait(max((next_run_time - self._clock()).total_seconds(), 0))
+
+    def stop(self) -> None:
+        """
+        Stop once the running task, if any, is completed.
+        """
+        self._stopped.set()
+
+
+def _recorded(
+    es_client: OpenSearch, settings: DaemonSettings, tool: str, run: Callable[[], None]
+) -> Callable[[], None]:
+    profiling_settings = ProfilingSettings.create_from_env()
+
+    def recorded_run() -> None:
+        # the stages of a run are recorded from scratch, as with a process per run
+        METRICS.reset()
+        with record_run(es_client, settings.run_index, tool), profile_run(
+            tool, profiling_settings
+        ):
+            run()
+
+    return recorded_run
+
+
+def _create_scrape_task(es_client: OpenSearch, settings: DaemonSettings) -> Task:
+    # the configuration and the clients of each tool are only loaded when its task is enabled
+    from prowjobsscraper import main as scraper_main
+
+    event_store = scraper_main.create_event_store(
+        es_client, scan_cache_ttl=timedelta(seconds=settings.scan_cache_ttl)
+    )
+    gcloud_client = scraper_main.create_gcloud_client()
+    artifact_fetcher = scraper_main.create_artifact_fetcher(gcloud_client)
+    job_list_fetcher = scraper_main.create_job_list_fetcher()
+    rollup_store = scraper_main.create_rollup_store(es_client)
+
+    def scrape() -> None:
+        start_time = datetime.now(tz=timezone.utc)
+        try:
+            with METRICS.time("scrape"):
+                scraper_main.run_scrape(
+                    job_list_fetcher,
+                    scraper_main.create_scraper(
+                        event_store, gcloud_client, artifact_fetcher, rollup_store
+                    ),
+                )
+        finally:
+            scraper_main.export_metrics(start_time, "prow-jobs-daemon", "scrape")
+
+    return Task(
+        "prow-jobs-scraper",
+        settings.scrape_schedule,
+        _recorded(es_client, settings, "prow-jobs-scraper", scrape),
+    )
+
+
+def _create_report_task(es_client: OpenSearch, settings: DaemonSettings) -> Task:
+    from slack_sdk import WebClient
+
+    from jobsautoreport import config as report_config
+    from jobsautoreport import main as report_main
+
+    web_client = WebClient(token=report_config.SLACK_BOT_TOKEN)
+    return Task(
+        "jobs-auto-report",
+        settings.report_schedule,
+        _recorded(
+            es_client,
+            settings,
+            "jobs-auto-report",
+            lambda: report_main.send_reports(es_client, web_client),
+        ),
+    )
+
+
+def _create_cleanup_task(es_client: OpenSearch, settings: DaemonSettings) -> Task:
+    from elasticsearch_cleanup import config as cleanup_config
+    from elasticsearch_cleanup import main as cleanup_main
+    from elasticsearch_cleanup.utils import parse_index_and_fields_pairs
+
+    if (pairs := cleanup_config.ES_INDEX_FIELDS_PAIRS) is None:
+        raise ValueError("failed to get all required environment variables")
+
+    return Task(
+        "elasticsearch-cleanup",
+        settings.cleanup_schedule,
+        _recorded(
+            es_client,
+            settings,
+            "elasticsearch-cleanup",
+            lambda: cleanup_main.remove_duplicates(
+                es_client, parse_index_and_fields_pairs(pairs=pairs)
+            ),
+        ),
+    )
+
+
+def create_tasks(es_client: OpenSearch, settings: DaemonSettings) -> list[Task]:
+    tasks = []
+    if settings.scrape_schedule:
+        tasks.append(_create_scrape_task(es_client, settings))
+    if settings.report_schedule:
+        tasks.append(_create_report_task(es_client, settings))
+    if settings.cleanup_schedule:
+        tasks.append(_create_cleanup_task(es_client, settings))
+    return tasks
+
+
+def main() -> None:
+    # the configuration is read from the environment when imported
+    from prowjobsscraper import config
+
+    logging.basicConfig(stream=sys.stdout, level=config.LOG_LEVEL)
+
+    settings = DaemonSettings.create_from_config(config)
+    es_client = create_opensearch_client(
+        config.ES_URL,
+        config.ES_USER,
+        config.ES_PASSWORD,
+        settings=OpenSearchClientSettings.create_from_env(),
+        verify_certs=False,
+    )
+    scheduler = Scheduler(create_tasks(es_client, settings), jitter=settings.jitter)
+    signal.signal(signal.SIGTERM, lambda signum, frame: scheduler.stop())
+    scheduler.run_forever()
+
+
+if __name__ == "__main__":
+    main()
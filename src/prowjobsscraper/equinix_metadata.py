@@ -1,9 +1,10 @@
 import logging
-from typing import Final
+from typing import Final, Optional
 
 from google.cloud import exceptions, storage  # type: ignore
 
 from prowjobsscraper import utils
+from prowjobsscraper.metrics import METRICS
 from prowjobsscraper.prowjob import EquinixMetadata, ProwJob, ProwJobs
 
 logger = logging.getLogger(__name__)
@@ -24,28 +25,43 @@ class EquinixMetadataExtractor:
 
     def hydrate(self, jobs: ProwJobs) -> None:
         for job in jobs.items:
-            self._set_equinix_metadata(job)
+            self.hydrate_job(job)
 
-    def _set_equinix_metadata(self, job: ProwJob) -> None:
-        if not (
-            job.metadata.labels.cloudClusterProfile
-            and "packet" in job.metadata.labels.cloudClusterProfile
-        ):
+    def hydrate_job(self, job: ProwJob) -> None:
+        metadata_path = self.get_metadata_path(job)
+        if metadata_path is None:
             return
 
-        base_path = utils.get_gcs_base_path_from_job_url(job.status.url)
-
         raw_metadata = None
-        metadata_path = self._METADATA_PATH_TEMPLATE.format(base_path, job.context)
         try:
-            raw_metadata = utils.download_from_gcs_as_string(
-                self._client, self._gcs_bucket_name, metadata_path
+            with METRICS.time("gcs_download", artifact="equinix_metadata"):
+                raw_metadata = utils.download_from_gcs_as_string(
+                    self._client, self._gcs_bucket_name, metadata_path
+                )
+            METRICS.add_bytes(
+                "gcs_download", len(raw_metadata), artifact="equinix_metadata"
             )
             logger.debug("Found equinix metadata: %s", metadata_path)
 
         except exceptions.ClientError as e:
             logger.debug("Equinix metadata are missing from %s: %s", metadata_path, e)
 
+        self.set_equinix_metadata(job, raw_metadata)
+
+    def get_metadata_path(self, job: ProwJob) -> Optional[str]:
+        """
+        Path of the equinix metadata in the GCS bucket, None when the job doesn't run on Equinix.
+        """
+        if not (
+            job.metadata.labels.cloudClusterProfile
+            and "packet" in job.metadata.labels.cloudClusterProfile
+        ):
+            return None
+
+        base_path = utils.get_gcs_base_path_from_job_url(job.status.url)
+        return self._METADATA_PATH_TEMPLATE.format(base_path, job.context)
+
+    def set_equinix_metadata(self, job: ProwJob, raw_metadata: Optional[str]) -> None:
         if raw_metadata:
             job.equinixMetadata = EquinixMetadata.parse_raw(raw_metadata)
         else:
@@ -6,6 +6,8 @@ from typing import Any, Final, Optional
 import requests
 from pydantic import BaseModel
 
+from prowjobsscraper.metrics import METRICS
+
 logger = logging.getLogger(__name__)
 
 
@@ -92,14 +94,18 @@ class EquinixUsagesExtractor:
     def get_project_usages(
         self,
     ) -> list[EquinixUsage]:
-        equinix_project_usages = requests.get(
-            url=self._EQUINIX_METAL_ENDPOINT.format(
-                self._project_id,
-                self._start_time.strftime(self._USAGES_TIME_FORMAT),
-                self._end_time.strftime(self._USAGES_TIME_FORMAT),
-            ),
-            headers={self._EQUINIX_ENDPOINT_HEADER: self._project_token},
-        ).json()["usages"]
+        with METRICS.time("equinix_api"):
+            response = requests.get(
+                url=self._EQUINIX_METAL_ENDPOINT.format(
+                    self._project_id,
+                    self._start_time.strftime(self._USAGES_TIME_FORMAT),
+                    self._end_time.strftime(self._USAGES_TIME_FORMAT),
+                ),
+                headers={self._EQUINIX_ENDPOINT_HEADER: self._project_token},
+            )
+            equinix_project_usages = response.json()["usages"]
+        METRICS.add_bytes("equinix_api", len(response.content))
+        METRICS.add_items("equinix_api", len(equinix_project_usages))
         logger.info("%s usages retrieved successfully", len(equinix_project_usages))
         return self._process_usages(
             [EquinixUsage.parse_obj(usage) for usage in equinix_project_usages]
@@ -1,20 +1,44 @@
+import logging
+import threading
+import time
+from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import Any, Iterator, Optional
+from importlib import resources
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Final,
+    Generic,
+    Iterable,
+    Iterator,
+    Optional,
+    TypeVar,
+)
 
-import pkg_resources
 from opensearchpy import OpenSearch, helpers
 from pydantic import BaseModel
 
-from prowjobsscraper.equinix_metadata import EquinixMetadata
 from prowjobsscraper.equinix_usages import (
     EquinixUsage,
     EquinixUsageEvent,
     EquinixUsageIdentifier,
 )
-from prowjobsscraper.prowjob import ProwJob
-from prowjobsscraper.step import JobStep
+from prowjobsscraper.metrics import METRICS, Metrics
+from prowjobsscraper.prowjob import EquinixMetadata, ProwJob
 from prowjobsscraper.utils import generate_hash_from_strings
 
+if TYPE_CHECKING:
+    # jobs-auto-report reads the events without the GCS client needed to extract steps
+    from prowjobsscraper.step import JobStep
+
+logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# fields of the job documents written by materialization passes rather than by the indexing of the jobs
+_MATERIALIZED_FIELDS: Final[dict[str, Any]] = {"job": {"equinix_cost"}}
+
 
 class JobRefs(BaseModel):
     base_ref: Optional[str]
@@ -59,6 +83,34 @@ class JobEquinixDetails(BaseModel):
         return None
 
 
+class JobPlanCost(BaseModel):
+    plan: str
+    total: float
+
+
+class JobEquinixCost(BaseModel):
+    """
+    JobEquinixCost is the cost of the Equinix usages of a job, materialized on its document once the usages are
+    indexed so that the cost reports don't join the usages to the jobs.
+    """
+
+    total: float
+    plans: list[JobPlanCost]
+
+    @classmethod
+    def create_from_usages(cls, usages: Iterable[EquinixUsage]) -> "JobEquinixCost":
+        cost_by_plan: dict[str, float] = defaultdict(float)
+        for u in usages:
+            cost_by_plan[u.plan] += u.total
+        return cls(
+            total=sum(cost_by_plan.values()),
+            plans=[
+                JobPlanCost(plan=plan, total=total)
+                for plan, total in sorted(cost_by_plan.items())
+            ],
+        )
+
+
 class JobDetails(BaseModel):
     build_id: Optional[str]
     cloud_cluster_profile: Optional[str]
@@ -66,6 +118,7 @@ class JobDetails(BaseModel):
     context: Optional[str]
     duration: int
     equinix: Optional[JobEquinixDetails]
+    equinix_cost: Optional[JobEquinixCost] = None
     name: str
     refs: JobRefs
     start_time: Optional[datetime]
@@ -117,41 +170,196 @@ class StepEvent(BaseModel):
     step: StepDetails
 
     @classmethod
-    def create_from_job_step(cls, step: JobStep) -> "StepEvent":
+    def create_from_job_step(cls, step: "JobStep", job: ProwJob) -> "StepEvent":
         return cls(
-            job=JobEvent.create_from_prow_job(step.job).job,
+            job=JobEvent.create_from_prow_job(job).job,
             step=StepDetails(
                 details=step.details,
-                duration=step.duration.seconds,
+                duration=step.duration,
                 name=step.name,
                 state=step.state,
             ),
         )
 
 
+class RunStage(BaseModel):
+    name: str
+    labels: dict[str, str]
+    calls: int
+    seconds: float
+    items: int
+    bytes: int
+    errors: int
+
+
+class RunDetails(BaseModel):
+    tool: str
+    start_time: datetime
+    end_time: datetime
+    duration: float
+    documents_read: int
+    documents_written: int
+    peak_rss: int
+    errors: int
+    error: Optional[str]
+    stages: list[RunStage]
+
+
+class RunEvent(BaseModel):
+    run: RunDetails
+
+    @classmethod
+    def create_from_metrics(
+        cls,
+        tool: str,
+        start_time: datetime,
+        end_time: datetime,
+        metrics: Metrics,
+        peak_rss: int,
+        error: Optional[str] = None,
+    ) -> "RunEvent":
+        stages = []
+        for s in metrics.summary():
+            s = dict(s)
+            stages.append(
+                RunStage(
+                    name=s.pop("stage"),
+                    calls=s.pop("calls"),
+                    seconds=s.pop("seconds"),
+                    items=s.pop("items"),
+                    bytes=s.pop("bytes"),
+                    errors=s.pop("errors"),
+                    labels=s,
+                )
+            )
+
+        return cls(
+            run=RunDetails(
+                tool=tool,
+                start_time=start_time,
+                end_time=end_time,
+                duration=(end_time - start_time).total_seconds(),
+                documents_read=sum(s.items for s in stages if s.name == "es_scan"),
+                documents_written=sum(s.items for s in stages if s.name == "es_bulk"),
+                peak_rss=peak_rss,
+                errors=sum(s.errors for s in stages) + (error is not None),
+                error=error,
+                stages=stages,
+            )
+        )
+
+
+class RunStoreElastic:
+    def __init__(self, client, run_index_basename):
+        self._runs_index = _EsIndex(client, run_index_basename)
+
+    def index_run(self, run: RunEvent):
+        run_id = generate_hash_from_strings(
+            run.run.tool, run.run.start_time.isoformat()
+        )
+        self._runs_index.index(iter([(run.dict(), run_id)]))
+
+
+class _ScanCache(Generic[_T]):
+    """
+    _ScanCache keeps the result of a scan for ttl seconds, completed with the values indexed meanwhile,
+    so that a long-running process doesn't scan the indices again at every run.
+    """
+
+    def __init__(self, ttl: float):
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._values: Optional[set[_T]] = None
+        self._expiry = 0.0
+
+    def get(self, scan: Callable[[], set[_T]]) -> set[_T]:
+        with self._lock:
+            if self._values is None or time.monotonic() >= self._expiry:
+                self._values = scan()
+                self._expiry = time.monotonic() + self._ttl
+            return set(self._values)
+
+    def update(self, values: Iterable[_T]) -> None:
+        with self._lock:
+            if self._values is not None:
+                self._values.update(values)
+
+
 class EventStoreElastic:
+    """
+    EventStoreElastic indexes jobs, steps and usages in weekly indices. When scan_cache_ttl is set, the build ids
+    and usage identifiers already stored are only scanned once per scan_cache_ttl and kept up to date with the
+    documents indexed by this store, which is meant for long-running processes.
+    """
+
     def __init__(
-        self, client, job_index_basename, step_index_basename, usage_index_basename
+        self,
+        client,
+        job_index_basename,
+        step_index_basename,
+        usage_index_basename,
+        scan_cache_ttl: Optional[timedelta] = None,
     ):
         self._jobs_index = _EsIndex(client, job_index_basename)
         self._steps_index = _EsIndex(client, step_index_basename)
         self._usages_index = _EsIndex(client, usage_index_basename)
-
-    def index_job_steps(self, steps: list[JobStep]):
-        step_events = (
-            (
-                StepEvent.create_from_job_step(s).dict(),
-                generate_hash_from_strings(s.job.status.build_id, s.name),
-            )
-            for s in steps
+        self._build_ids_cache: Optional[_ScanCache[str]] = None
+        self._usages_identifiers_cache: Optional[_ScanCache[EquinixUsageIdentifier]] = (
+            None
         )
-        self._steps_index.index(step_events)
+        if scan_cache_ttl is not None:
+            self._build_ids_cache = _ScanCache(scan_cache_ttl.total_seconds())
+            self._usages_identifiers_cache = _ScanCache(scan_cache_ttl.total_seconds())
+
+    def index_job_steps(self, steps: list["JobStep"], jobs: list[ProwJob]):
+        self._steps_index.index(self._gen_step_documents(steps, jobs))
+
+    @staticmethod
+    def _gen_step_documents(
+        steps: list["JobStep"], jobs: list[ProwJob]
+    ) -> Iterator[tuple[dict[str, Any], str]]:
+        """
+        Same documents as StepEvent.create_from_job_step(step, job).dict(), the job of each step being looked up
+        by build id. The job part is serialized once per job and shared by all its steps.
+        """
+        jobs_by_build_id = {j.status.build_id: j for j in jobs}
+        job_documents: dict[Optional[str], dict[str, Any]] = {}
+        for s in steps:
+            job_document = job_documents.get(s.build_id)
+            if job_document is None:
+                if (job := jobs_by_build_id.get(s.build_id)) is None:
+                    logger.warning(
+                        "Step %s skipped, job %s is not indexed", s.name, s.build_id
+                    )
+                    continue
+                job_document = JobEvent.create_from_prow_job(job).job.dict()
+                job_documents[s.build_id] = job_document
+
+            step_document = {
+                "details": s.details,
+                "duration": s.duration,
+                "name": s.name,
+                "state": s.state,
+            }
+            yield {
+                "job": job_document,
+                "step": step_document,
+            }, generate_hash_from_strings(s.build_id, s.name)
 
     def index_prow_jobs(self, jobs: list[ProwJob]):
+        # the cost materialized on a job indexed again is kept
         job_events = (
-            (JobEvent.create_from_prow_job(j).dict(), j.status.build_id) for j in jobs
+            (
+                JobEvent.create_from_prow_job(j).dict(exclude=_MATERIALIZED_FIELDS),
+                j.status.build_id,
+            )
+            for j in jobs
         )
         self._jobs_index.index(job_events)
+        if self._build_ids_cache is not None:
+            self._build_ids_cache.update(
+                j.status.build_id for j in jobs if j.status.build_id is not None
+            )
 
     def index_equinix_usages(self, usages: list[EquinixUsage]):
         equinix_usages = (
@@ -162,12 +370,85 @@ class EventStoreElastic:
             for u in usages
         )
         self._usages_index.index(equinix_usages)
+        if self._usages_identifiers_cache is not None:
+            self._usages_identifiers_cache.update(u.to_identifier() for u in usages)
+
+    def materialize_job_costs(self, build_ids: Iterable[str]) -> None:
+        """
+        Sum the cost of the usages of the given builds by plan and write it on their job documents with partial
+        updates. The totals are computed from the usage index, so that a job indexed after its usages gets them as
+        well, and materializing the cost of a job again gives the same result.
+        """
+        build_ids = list(set(build_ids))
+        if not build_ids:
+            return
+
+        usages_by_build_id = defaultdict(list)
+        for r in self._usages_index.scan(
+            {"query": {"terms": {"job.build_id": build_ids}}}
+        ):
+            usage_event = EquinixUsageEvent.parse_obj(r["_source"])
+            usages_by_build_id[usage_event.job.build_id].append(usage_event.usage)
+
+        jobs = self._jobs_index.scan(
+            {
+                "query": {"terms": {"job.build_id": list(usages_by_build_id)}},
+                "_source": ["job.build_id"],
+            }
+        )
+        self._jobs_index.update(
+            (
+                r["_index"],
+                r["_id"],
+                {
+                    "job": {
+                        "equinix_cost": JobEquinixCost.create_from_usages(
+                            usages_by_build_id[r["_source"]["job"]["build_id"]]
+                        ).dict()
+                    }
+                },
+            )
+            for r in list(jobs)
+        )
 
     def scan_build_ids(self) -> set[str]:
+        if self._build_ids_cache is not None:
+            return self._build_ids_cache.get(self._scan_build_ids)
+        return self._scan_build_ids()
+
+    def _scan_build_ids(self) -> set[str]:
         results = self._jobs_index.scan({"_source": ["job.build_id"]})
         return {r["_source"]["job"]["build_id"] for r in results}
 
+    def scan_build_ids_started_between(
+        self, start: datetime, end: datetime
+    ) -> set[str]:
+        """
+        Return the build ids of the jobs started between start (included) and end (excluded), stored in any weekly
+        index rather than only the last two, for jobs older than two weeks not to be indexed again.
+        """
+        results = self._jobs_index.scan(
+            {
+                "query": {
+                    "range": {
+                        "job.start_time": {
+                            "gte": start.isoformat(),
+                            "lt": end.isoformat(),
+                        }
+                    }
+                },
+                "_source": ["job.build_id"],
+            },
+            all_indices=True,
+        )
+        return {r["_source"]["job"]["build_id"] for r in results}
+
     def scan_usages_identifiers(self) -> set[EquinixUsageIdentifier]:
+        if self._usages_identifiers_cache is not None:
+            return self._usages_identifiers_cache.get(self._scan_usages_identifiers)
+        return self._scan_usages_identifiers()
+
+    def _scan_usages_identifiers(self) -> set[EquinixUsageIdentifier]:
         results = self._usages_index.scan({"query": {"match_all": {}}})
         return {
             EquinixUsageIdentifier(
@@ -180,20 +461,32 @@ class EventStoreElastic:
 class _EsIndex:
     def __init__(self, client: OpenSearch, index_prefix: str):
         self._client = client
+        self._index_prefix = index_prefix
+        self._index_schema = (
+            resources.files("prowjobsscraper")
+            .joinpath(f"indices/{index_prefix}_schema.json")
+            .read_bytes()
+        )
+        self._index_name = ""
+        self._previous_index_name = ""
+        self._roll_over()
 
-        # Let's create one index per week
+    def _roll_over(self) -> None:
+        # Let's create one index per week, long-running processes move to the next one when the week changes
         now = datetime.now()
-        self._index_name = self._format_index_name(index_prefix, now)
+        index_name = self._format_index_name(self._index_prefix, now)
+        if index_name == self._index_name:
+            return
 
         a_week_ago = now - timedelta(weeks=1)
-        self._previous_index_name = self._format_index_name(index_prefix, a_week_ago)
+        self._previous_index_name = self._format_index_name(
+            self._index_prefix, a_week_ago
+        )
 
         # apply the index template
-        index_schema = pkg_resources.resource_string(
-            __name__, f"indices/{index_prefix}_schema.json"
-        )
-        if not self._client.indices.exists(index=self._index_name):
-            self._client.indices.create(index=self._index_name, body=index_schema)
+        if not self._client.indices.exists(index=index_name):
+            self._client.indices.create(index=index_name, body=self._index_schema)
+        self._index_name = index_name
 
     @staticmethod
     def _format_index_name(prefix: str, date: datetime) -> str:
@@ -204,24 +497,66 @@ class _EsIndex:
     def _gen_documents(
         self, data: Iterator[tuple[dict[str, Any], str]]
     ) -> Iterator[dict[str, Any]]:
-        for d, id in data:
-            yield {
-                "_index": self._index_name,
+        count = 0
+        try:
+            for d, id in data:
+                count += 1
+                yield {
+                    "_index": self._index_name,
+                    "_op_type": "update",
+                    "_id": id,
+                    "doc_as_upsert": True,
+                    "doc": d,
+                }
+        finally:
+            METRICS.add_items("es_bulk", count, index=self._index_prefix)
+
+    def index(self, data: Iterator[tuple[dict[str, Any], str]]) -> None:
+        self._roll_over()
+        with METRICS.time("es_bulk", index=self._index_prefix):
+            helpers.bulk(self._client, self._gen_documents(data))
+            self._client.indices.refresh(index=self._index_name)
+
+    def update(self, data: Iterable[tuple[str, str, dict[str, Any]]]) -> None:
+        """
+        Update some fields of documents of any index of the prefix, given as (index, id, fields).
+        """
+        updates = [
+            {
+                "_index": index,
                 "_op_type": "update",
                 "_id": id,
-                "doc_as_upsert": True,
+                # the update may race with the upsert of the same document by another shard
+                "retry_on_conflict": 3,
                 "doc": d,
             }
-
-    def index(self, data: Iterator[tuple[dict[str, Any], str]]) -> None:
-        helpers.bulk(self._client, self._gen_documents(data))
-
-        self._client.indices.refresh(index=self._index_name)
-
-    def scan(self, query: str) -> Iterator[Any]:
-        return helpers.scan(
-            self._client,
-            index=f"{self._index_name},{self._previous_index_name}",
-            ignore_unavailable=True,
-            query=query,
-        )
+            for index, id, d in data
+        ]
+        if not updates:
+            return
+
+        with METRICS.time("es_bulk", index=self._index_prefix):
+            helpers.bulk(self._client, updates)
+            self._client.indices.refresh(index=f"{self._index_prefix}-*")
+        METRICS.add_items("es_bulk", len(updates), index=self._index_prefix)
+
+    def scan(self, query: dict[str, Any], all_indices: bool = False) -> Iterator[Any]:
+        """
+        Scan the indices of the current and previous weeks, or every index of the prefix when all_indices is set.
+        """
+        # the scroll is consumed lazily, its time includes the processing of the results
+        self._roll_over()
+        index = f"{self._index_name},{self._previous_index_name}"
+        if all_indices:
+            index = f"{self._index_prefix}-*"
+        count = 0
+        with METRICS.time("es_scan", index=self._index_prefix):
+            for r in helpers.scan(
+                self._client,
+                index=index,
+                ignore_unavailable=True,
+                query=query,
+            ):
+                count += 1
+                yield r
+        METRICS.add_items("es_scan", count, index=self._index_prefix)
@@ -0,0 +1,645 @@
+import fnmatch
+import functools
+import re
+import threading
+import uuid
+from datetime import datetime, timezone
+from itertools import islice
+from types import SimpleNamespace
+from typing import Any, Callable, Iterator, Optional
+
+from opensearchpy.exceptions import NotFoundError, RequestError, TransportError
+
+from prowjobsscraper.serializer import OrjsonSerializer
+
+_Document = dict[str, Any]
+
+# sort scripts are not evaluated, the ones used by the project are implemented here
+_SORT_SCRIPTS: dict[str, Callable[[_Document], Any]] = {
+    "doc['_id'].value.length()": lambda hit: len(hit["_id"]),
+}
+
+_TOKEN_SEPARATOR = re.compile(r"[^0-9a-z]+")
+_PRIMARY_TERM = 1
+
+
+def _ignorable(func: Callable) -> Callable:
+    # same as the ignore parameter of opensearch-py: errors of ignored statuses are returned
+    @functools.wraps(func)
+    def wrapper(*args: Any, ignore: Any = (), **kwargs: Any) -> Any:
+        try:
+            return func(*args, **kwargs)
+        except TransportError as e:
+            ignore = ignore if isinstance(ignore, (list, tuple)) else (ignore,)
+            if e.status_code in ignore:
+                return e.info
+            raise
+
+    return wrapper
+
+
+def _error(
+    cls: type[TransportError], status: int, type: str, **details: Any
+) -> TransportError:
+    return cls(status, type, {"error": {"type": type, **details}, "status": status})
+
+
+def _index_not_found(index: str) -> TransportError:
+    return _error(NotFoundError, 404, "index_not_found_exception", index=index)
+
+
+def _get_values(source: Any, path: str) -> list[Any]:
+    """
+    Values of a dotted field, objects of arrays are traversed the same way OpenSearch flattens them.
+    """
+    values = [source]
+    for key in path.split("."):
+        next_values = []
+        for value in values:
+            for v in value if isinstance(value, list) else [value]:
+                if isinstance(v, dict) and key in v:
+                    next_values.append(v[key])
+        values = next_values
+
+    flattened = []
+    for value in values:
+        if isinstance(value, list):
+            flattened.extend(value)
+        elif value is not None:
+            flattened.append(value)
+    return flattened
+
+
+def _get_field_values(hit: _Document, field: str) -> list[Any]:
+    if field == "_id":
+        return [hit["_id"]]
+    if field == "_index":
+        return [hit["_index"]]
+    values = _get_values(hit["_source"], field)
+    if not values and field.endswith(".keyword"):
+        values = _get_values(hit["_source"], field.removesuffix(".keyword"))
+    return values
+
+
+def _parse_date(value: str) -> Optional[datetime]:
+    try:
+        date = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return date if date.tzinfo else date.replace(tzinfo=timezone.utc)
+
+
+def _comparable(value: Any, bound: Any) -> tuple[Any, Any]:
+    if isinstance(value, str) and isinstance(bound, str):
+        value_date, bound_date = _parse_date(value), _parse_date(bound)
+        if value_date is not None and bound_date is not None:
+            return value_date, bound_date
+    return value, bound
+
+
+def _in_range(value: Any, bounds: dict[str, Any]) -> bool:
+    comparisons = {
+        "gt": lambda v, b: v > b,
+        "gte": lambda v, b: v >= b,
+        "lt": lambda v, b: v < b,
+        "lte": lambda v, b: v <= b,
+    }
+    for op, compare in comparisons.items():
+        if op not in bounds or bounds[op] is None:
+            continue
+        try:
+            if not compare(*_comparable(value, bounds[op])):
+                return False
+        except TypeError:
+            return False
+    return True
+
+
+def _tokens(value: Any) -> set[str]:
+    return {t for t in _TOKEN_SEPARATOR.split(str(value).lower()) if t}
+
+
+def _as_list(clauses: Any) -> list[Any]:
+    return clauses if isinstance(clauses, list) else [clauses]
+
+
+def _single_field(clause: dict[str, Any]) -> tuple[str, Any]:
+    ((field, params),) = clause.items()
+    return field, params
+
+
+def _matches(hit: _Document, query: dict[str, Any]) -> bool:
+    ((kind, clause),) = query.items()
+    if kind == "match_all":
+        return True
+    if kind == "match_none":
+        return False
+    if kind == "bool":
+        return _matches_bool(hit, clause)
+    if kind == "ids":
+        return hit["_id"] in clause["values"]
+    if kind == "exists":
+        return bool(_get_field_values(hit, clause["field"]))
+
+    field, params = _single_field(clause)
+    values = _get_field_values(hit, field)
+    if kind == "term":
+        expected = params["value"] if isinstance(params, dict) else params
+        return expected in values
+    if kind == "terms":
+        return any(v in params for v in values)
+    if kind == "range":
+        return any(_in_range(v, params) for v in values)
+    if kind == "match":
+        params = params if isinstance(params, dict) else {"query": params}
+        expected = _tokens(params["query"])
+        actual = set().union(*(_tokens(v) for v in values))
+        if params.get("operator", "or").lower() == "and":
+            return expected <= actual
+        return bool(expected & actual)
+
+    raise NotImplementedError(f"query '{kind}' is not supported")
+
+
+def _matches_bool(hit: _Document, clause: dict[str, Any]) -> bool:
+    must = _as_list(clause.get("must", [])) + _as_list(clause.get("filter", []))
+    if not all(_matches(hit, q) for q in must):
+        return False
+    if any(_matches(hit, q) for q in _as_list(clause.get("must_not", []))):
+        return False
+
+    should = _as_list(clause.get("should", []))
+    minimum_should_match = int(
+        clause.get("minimum_should_match", 0 if must or not should else 1)
+    )
+    return sum(_matches(hit, q) for q in should) >= minimum_should_match
+
+
+def _sort_key(sort: Any) -> tuple[Callable[[_Document], Any], bool]:
+    if isinstance(sort, str):
+        field, params = sort, {}
+    else:
+        field, params = _single_field(sort)
+    if isinstance(params, str):
+        params = {"order": params}
+    reverse = params.get("order", "asc") == "desc"
+
+    if field == "_doc":
+        # index order, documents being kept in their insertion order
+        return lambda hit: 0, False
+    if field == "_script":
+        source = params["script"]["source"]
+        if source not in _SORT_SCRIPTS:
+            raise NotImplementedError(f"sort script '{source}' is not supported")
+        return _SORT_SCRIPTS[source], reverse
+
+    def key(hit: _Document) -> Any:
+        values = _get_field_values(hit, field)
+        # documents missing the field come last
+        return (not values, min(values) if values else None)
+
+    return key, reverse
+
+
+def _aggregate(hits: list[_Document], aggs: dict[str, Any]) -> dict[str, Any]:
+    results = {}
+    for name, agg in aggs.items():
+        sub_aggs = agg.get("aggs", agg.get("aggregations", {}))
+        ((kind, params),) = (
+            (k, v) for k, v in agg.items() if k not in ("aggs", "aggregations")
+        )
+        if kind == "terms":
+            buckets: dict[Any, list[_Document]] = {}
+            for hit in hits:
+                for value in set(_get_field_values(hit, params["field"])):
+                    buckets.setdefault(value, []).append(hit)
+            ordered = sorted(buckets.items(), key=lambda b: (-len(b[1]), b[0]))
+            results[name] = {
+                "doc_count_error_upper_bound": 0,
+                "sum_other_doc_count": sum(
+                    len(b) for _, b in ordered[params.get("size", 10) :]
+                ),
+                "buckets": [
+                    {"key": key, "doc_count": len(bucket_hits)}
+                    | _aggregate(bucket_hits, sub_aggs)
+                    for key, bucket_hits in ordered[: params.get("size", 10)]
+                ],
+            }
+            continue
+        if kind == "filter":
+            filtered = [h for h in hits if _matches(h, params)]
+            results[name] = {"doc_count": len(filtered)} | _aggregate(
+                filtered, sub_aggs
+            )
+            continue
+
+        values = [v for h in hits for v in _get_field_values(h, params["field"])]
+        if kind == "value_count":
+            results[name] = {"value": len(values)}
+        elif kind == "cardinality":
+            results[name] = {"value": len(set(values))}
+        elif kind == "sum":
+            results[name] = {"value": float(sum(values))}
+        elif kind == "avg":
+            results[name] = {"value": sum(values) / len(values) if values else None}
+        elif kind == "min":
+            results[name] = {"value": min(values) if values else None}
+        elif kind == "max":
+            results[name] = {"value": max(values) if values else None}
+        else:
+            raise NotImplementedError(f"aggregation '{kind}' is not supported")
+    return results
+
+
+def _filter_source(source: _Document, includes: Any) -> Optional[_Document]:
+    if includes is False:
+        return None
+    if includes is True or includes is None:
+        return source
+    if isinstance(includes, str):
+        includes = [includes]
+    if isinstance(includes, dict):
+        includes = includes.get("includes", [])
+
+    filtered: _Document = {}
+    for path in includes:
+        keys = path.split(".")
+        value: Any = source
+        for key in keys:
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            target = filtered
+            for key in keys[:-1]:
+                target = target.setdefault(key, {})
+            target[keys[-1]] = value
+    return filtered
+
+
+class _InMemoryIndicesClient:
+    def __init__(self, client: "InMemoryOpenSearch"):
+        self._client = client
+
+    @_ignorable
+    def create(self, index: str, body: Any = None, **kwargs: Any) -> dict[str, Any]:
+        with self._client._lock:
+            if index in self._client._indices:
+                raise _error(
+                    RequestError, 400, "resource_already_exists_exception", index=index
+                )
+            self._client._create_index(index, body)
+        return {"acknowledged": True, "index": index}
+
+    def exists(self, index: str, **kwargs: Any) -> bool:
+        with self._client._lock:
+            try:
+                return bool(self._client._resolve(index, ignore_unavailable=False))
+            except NotFoundError:
+                return False
+
+    @_ignorable
+    def get(
+        self,
+        index: str,
+        ignore_unavailable: bool = False,
+        allow_no_indices: bool = True,
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        with self._client._lock:
+            names = self._client._resolve(index, ignore_unavailable, allow_no_indices)
+            return {
+                name: {"aliases": {}, **self._client._schemas[name]} for name in names
+            }
+
+    @_ignorable
+    def delete(self, index: str, **kwargs: Any) -> dict[str, Any]:
+        with self._client._lock:
+            for name in self._client._resolve(index, ignore_unavailable=False):
+                del self._client._indices[name]
+                del self._client._schemas[name]
+        return {"acknowledged": True}
+
+    def refresh(self, index: Optional[str] = None, **kwargs: Any) -> dict[str, Any]:
+        # documents are searchable as soon as they are written
+        return {"_shards": {"total": 1, "successful": 1, "failed": 0}}
+
+
+class InMemoryOpenSearch:
+    """
+    InMemoryOpenSearch is an in-process stand-in for an OpenSearch client, to run the scraper, the report and
+    the cleanup offline, at scale, without a cluster. It supports the subset of the API they rely on: bulk
+    index/create/update/delete, index/get/delete/count, search and scroll with match_all, bool, term, terms,
+    match, range, exists and ids queries, field sorts, source filtering and terms/filter/metric aggregations,
+    optimistic concurrency control with seq_no_primary_term and if_seq_no/if_primary_term bulk operations,
+    and the create/exists/get/delete/refresh index operations. Index names may be comma-separated lists of
+    wildcard patterns. Documents go through the serializer, dates are therefore stored as strings the same
+    way a cluster returns them. Scripts, analyzers and relevance scoring are not supported.
+    """
+
+    def __init__(self, serializer: Any = None):
+        self.transport = SimpleNamespace(serializer=serializer or OrjsonSerializer())
+        self.indices = _InMemoryIndicesClient(self)
+        self._lock = threading.RLock()
+        self._indices: dict[str, dict[str, _Document]] = {}
+        self._schemas: dict[str, dict[str, Any]] = {}
+        self._scrolls: dict[str, Iterator[list[_Document]]] = {}
+        # sequence number of the last write of each document, a single primary term is ever used
+        self._seq_nos: dict[tuple[str, str], int] = {}
+        self._seq_no = 0
+
+    def _roundtrip(self, data: Any) -> Any:
+        serializer = self.transport.serializer
+        return serializer.loads(serializer.dumps(data))
+
+    def _create_index(self, index: str, body: Any = None) -> None:
+        if isinstance(body, (bytes, str)):
+            # index schemas are usually sent as read from their json file
+            schema = self.transport.serializer.loads(body)
+        else:
+            schema = self._roundtrip(body) if body else {}
+        self._indices[index] = {}
+        self._schemas[index] = {
+            "mappings": schema.get("mappings", {}),
+            "settings": schema.get("settings", {}),
+        }
+
+    def _resolve(
+        self,
+        index: Optional[str],
+        ignore_unavailable: bool = False,
+        allow_no_indices: bool = True,
+    ) -> list[str]:
+        if index is None or index in ("_all", "*"):
+            return sorted(self._indices)
+
+        names: list[str] = []
+        for pattern in index.split(","):
+            if any(c in pattern for c in "*?"):
+                names += fnmatch.filter(sorted(self._indices), pattern)
+            elif pattern in self._indices:
+                names.append(pattern)
+            elif not ignore_unavailable:
+                raise _index_not_found(pattern)
+        if not names and not allow_no_indices:
+            raise _index_not_found(index)
+        return list(dict.fromkeys(names))
+
+    def _write(self, index: str) -> dict[str, _Document]:
+        # indices are created on first write, without mappings
+        if index not in self._indices:
+            self._create_index(index)
+        return self._indices[index]
+
+    @staticmethod
+    def _merge(target: _Document, doc: _Document) -> None:
+        for key, value in doc.items():
+            if isinstance(value, dict) and isinstance(target.get(key), dict):
+                InMemoryOpenSearch._merge(target[key], value)
+            else:
+                target[key] = value
+
+    def _apply(
+        self,
+        op_type: str,
+        index: str,
+        id: Optional[str],
+        body: Any,
+        if_seq_no: Optional[int] = None,
+        if_primary_term: Optional[int] = None,
+    ) -> dict[str, Any]:
+        documents = self._write(index)
+        if op_type != "delete" and id is None:
+            id = uuid.uuid4().hex
+        item = {"_index": index, "_id": id}
+
+        if if_seq_no is not None or if_primary_term is not None:
+            if (
+                id not in documents
+                or self._seq_nos.get((index, id)) != if_seq_no
+                or if_primary_term != _PRIMARY_TERM
+            ):
+                return item | {
+                    "status": 409,
+                    "error": {"type": "version_conflict_engine_exception"},
+                }
+        result = self._apply_unconditionally(op_type, documents, id, body)
+        if 200 <= result["status"] < 300:
+            if op_type == "delete":
+                self._seq_nos.pop((index, id), None)
+            else:
+                self._seq_no += 1
+                self._seq_nos[index, id] = self._seq_no
+                result |= {"_seq_no": self._seq_no, "_primary_term": _PRIMARY_TERM}
+        return item | result
+
+    @classmethod
+    def _apply_unconditionally(
+        cls, op_type: str, documents: dict[str, _Document], id: Any, body: Any
+    ) -> dict[str, Any]:
+        if op_type == "index":
+            result = "updated" if id in documents else "created"
+            documents[id] = body
+            return {
+                "result": result,
+                "status": 201 if result == "created" else 200,
+            }
+        if op_type == "create":
+            if id in documents:
+                return {
+                    "status": 409,
+                    "error": {"type": "version_conflict_engine_exception"},
+                }
+            documents[id] = body
+            return {"result": "created", "status": 201}
+        if op_type == "delete":
+            if documents.pop(id, None) is None:
+                return {"result": "not_found", "status": 404}
+            return {"result": "deleted", "status": 200}
+        if op_type == "update":
+            if id in documents:
+                cls._merge(documents[id], body.get("doc", {}))
+                return {"result": "updated", "status": 200}
+            if body.get("doc_as_upsert"):
+                documents[id] = body.get("doc", {})
+            elif "upsert" in body:
+                documents[id] = body["upsert"]
+            else:
+                return {
+                    "status": 404,
+                    "error": {"type": "document_missing_exception"},
+                }
+            return {"result": "created", "status": 201}
+
+        raise NotImplementedError(f"bulk operation '{op_type}' is not supported")
+
+    def bulk(
+        self, body: Any, index: Optional[str] = None, **kwargs: Any
+    ) -> dict[str, Any]:
+        serializer = self.transport.serializer
+        lines = body.splitlines() if isinstance(body, str) else body
+        lines = iter(
+            serializer.loads(line) if isinstance(line, str) else self._roundtrip(line)
+            for line in lines
+            if not isinstance(line, str) or line.strip()
+        )
+
+        items = []
+        with self._lock:
+            for action in lines:
+                ((op_type, meta),) = action.items()
+                source = None if op_type == "delete" else next(lines)
+                item = self._apply(
+                    op_type,
+                    meta.get("_index", index),
+                    meta.get("_id"),
+                    source,
+                    if_seq_no=meta.get("if_seq_no"),
+                    if_primary_term=meta.get("if_primary_term"),
+                )
+                items.append({op_type: item})
+        return {
+            "took": 0,
+            "errors": any(not 200 <= i[op]["status"] < 300 for i in items for op in i),
+            "items": items,
+        }
+
+    def index(
+        self, index: str, body: Any, id: Optional[str] = None, **kwargs: Any
+    ) -> dict[str, Any]:
+        with self._lock:
+            return self._apply("index", index, id, self._roundtrip(body))
+
+    @_ignorable
+    def get(self, index: str, id: str, **kwargs: Any) -> dict[str, Any]:
+        with self._lock:
+            documents = self._indices.get(index)
+            if documents is None:
+                raise _index_not_found(index)
+            if id not in documents:
+                raise _error(NotFoundError, 404, "not_found", index=index, id=id)
+            return {"_index": index, "_id": id, "found": True, "_source": documents[id]}
+
+    @_ignorable
+    def delete(self, index: str, id: str, **kwargs: Any) -> dict[str, Any]:
+        with self._lock:
+            item = self._apply("delete", index, id, None)
+        if item["status"] == 404:
+            raise _error(NotFoundError, 404, "not_found", index=index, id=id)
+        return item
+
+    def _search(
+        self, body: Any, index: Optional[str], ignore_unavailable: bool
+    ) -> tuple[list[_Document], dict[str, Any]]:
+        body = self._roundtrip(body) if body else {}
+        query = body.get("query", {"match_all": {}})
+        with self._lock:
+            hits = [
+                {"_index": name, "_id": id, "_score": None, "_source": source}
+                for name in self._resolve(index, ignore_unavailable)
+                for id, source in self._indices[name].items()
+                if _matches(
+                    {"_index": name, "_id": id, "_source": source},
+                    query,
+                )
+            ]
+            if body.get("seq_no_primary_term"):
+                for hit in hits:
+                    hit["_seq_no"] = self._seq_nos[hit["_index"], hit["_id"]]
+                    hit["_primary_term"] = _PRIMARY_TERM
+
+        # sort keys are applied from the last to the first one, python's sort being stable
+        for sort in reversed(_as_list(body.get("sort", []))):
+            key, reverse = _sort_key(sort)
+            hits.sort(key=key, reverse=reverse)
+
+        aggregations = _aggregate(hits, body.get("aggs", body.get("aggregations", {})))
+        includes = body.get("_source", True)
+        for hit in hits:
+            source = _filter_source(hit["_source"], includes)
+            if source is None:
+                del hit["_source"]
+            else:
+                hit["_source"] = source
+        return hits, aggregations
+
+    @staticmethod
+    def _response(
+        hits: list[_Document], total: int, aggregations: dict[str, Any]
+    ) -> dict[str, Any]:
+        response = {
+            "took": 0,
+            "timed_out": False,
+            "_shards": {"total": 1, "successful": 1, "skipped": 0, "failed": 0},
+            "hits": {
+                "total": {"value": total, "relation": "eq"},
+                "max_score": None,
+                "hits": hits,
+            },
+        }
+        if aggregations:
+            response["aggregations"] = aggregations
+        return response
+
+    @_ignorable
+    def search(
+        self,
+        body: Any = None,
+        index: Optional[str] = None,
+        scroll: Optional[str] = None,
+        size: Optional[int] = None,
+        ignore_unavailable: bool = False,
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        hits, aggregations = self._search(body, index, ignore_unavailable)
+        if size is None:
+            size = (body or {}).get("size", 10)
+        from_ = (body or {}).get("from", 0)
+
+        if scroll is None:
+            return self._response(hits[from_ : from_ + size], len(hits), aggregations)
+
+        pages = iter(lambda it=iter(hits): list(islice(it, size)), [])
+        scroll_id = uuid.uuid4().hex
+        with self._lock:
+            self._scrolls[scroll_id] = pages
+        response = self._response(next(pages, []), len(hits), aggregations)
+        response["_scroll_id"] = scroll_id
+        return response
+
+    @_ignorable
+    def scroll(self, body: dict[str, Any], **kwargs: Any) -> dict[str, Any]:
+        scroll_id = body["scroll_id"]
+        with self._lock:
+            pages = self._scrolls.get(scroll_id)
+        if pages is None:
+            raise _error(
+                NotFoundError,
+                404,
+                "search_context_missing_exception",
+                scroll_id=scroll_id,
+            )
+        page = next(pages, [])
+        response = self._response(page, len(page), {})
+        response["_scroll_id"] = scroll_id
+        return response
+
+    @_ignorable
+    def clear_scroll(self, body: dict[str, Any], **kwargs: Any) -> dict[str, Any]:
+        with self._lock:
+            freed = 0
+            for scroll_id in _as_list(body["scroll_id"]):
+                freed += self._scrolls.pop(scroll_id, None) is not None
+        return {"succeeded": True, "num_freed": freed}
+
+    @_ignorable
+    def count(
+        self,
+        body: Any = None,
+        index: Optional[str] = None,
+        ignore_unavailable: bool = False,
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        body = {"query": (body or {}).get("query", {"match_all": {}})}
+        hits, _ = self._search(body, index, ignore_unavailable)
+        return {"count": len(hits)}
@@ -0,0 +1,294 @@
+import base64
+import gzip
+import hashlib
+import logging
+import threading
+from collections import deque
+from contextlib import ExitStack, contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Optional
+from urllib.parse import urlsplit
+
+import orjson
+import requests
+from opensearchpy.exceptions import HTTP_EXCEPTIONS, TransportError
+from opensearchpy.transport import Transport
+from requests.structures import CaseInsensitiveDict
+
+from prowjobsscraper import utils
+
+if TYPE_CHECKING:
+    import slack_sdk
+    from slack_sdk.web import SlackResponse
+
+logger = logging.getLogger(__name__)
+
+RECORD = "record"
+REPLAY = "replay"
+
+
+class ReplayError(Exception):
+    """
+    ReplayError is raised when a request has no recorded response left in the archive.
+    """
+
+
+def _encode_bytes(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+
+def _decode_bytes(data: str) -> bytes:
+    return base64.b64decode(data)
+
+
+def _hash(data: Any) -> str:
+    if data is None:
+        return ""
+    if not isinstance(data, bytes):
+        data = orjson.dumps(data, option=orjson.OPT_SORT_KEYS, default=str)
+    return hashlib.sha1(data).hexdigest()
+
+
+class IOArchive:
+    """
+    IOArchive holds the responses of external services, as gzipped JSON lines, one line per response.
+    A response is identified by its service, the request it answers and a fallback, usually the request without
+    its query or body. A replayed request is served the first unused response of the same request, or else of
+    the same fallback, as requests may slightly differ between runs, e.g. when they embed the current time.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: list[dict[str, Any]] = []
+        self._by_key: dict[tuple[str, str], deque[int]] = {}
+        self._by_fallback: dict[tuple[str, str], deque[int]] = {}
+        self._used: set[int] = set()
+
+    @classmethod
+    def load(cls, path: str) -> "IOArchive":
+        archive = cls()
+        with gzip.open(path, "rb") as f:
+            for line in f:
+                archive.add(**orjson.loads(line))
+        logger.info("%s recorded responses loaded from %s", len(archive), path)
+        return archive
+
+    def save(self, path: str) -> None:
+        with self._lock:
+            with gzip.open(path, "wb") as f:
+                for entry in self._entries:
+                    f.write(orjson.dumps(entry) + b"\n")
+        logger.info("%s responses recorded to %s", len(self), path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, service: str, key: str, fallback: str, response: Any) -> None:
+        with self._lock:
+            i = len(self._entries)
+            self._entries.append(
+                {
+                    "service": service,
+                    "key": key,
+                    "fallback": fallback,
+                    "response": response,
+                }
+            )
+            self._by_key.setdefault((service, key), deque()).append(i)
+            self._by_fallback.setdefault((service, fallback), deque()).append(i)
+
+    def _pop(self, index: dict[tuple[str, str], deque[int]], key: tuple[str, str]):
+        candidates = index.get(key, deque())
+        while candidates:
+            i = candidates.popleft()
+            if i not in self._used:
+                self._used.add(i)
+                return self._entries[i]["response"]
+        return None
+
+    def get(self, service: str, key: str, fallback: str) -> Any:
+        with self._lock:
+            response = self._pop(self._by_key, (service, key))
+            if response is None:
+                response = self._pop(self._by_fallback, (service, fallback))
+        if response is None:
+            raise ReplayError(f"no recorded {service} response for {key}")
+        return response
+
+
+def _record_http(archive: IOArchive, mode: str, request: Callable) -> Callable:
+    def wrapper(method: str, url: str, **kwargs: Any) -> requests.Response:
+        key = (
+            f"{method.upper()} {url} {_hash(kwargs.get('data') or kwargs.get('json'))}"
+        )
+        fallback = f"{method.upper()} {urlsplit(url)._replace(query='').geturl()}"
+        if mode == RECORD:
+            response = request(method, url, **kwargs)
+            archive.add(
+                "http",
+                key,
+                fallback,
+                {
+                    "status_code": response.status_code,
+                    "headers": dict(response.headers),
+                    "content": _encode_bytes(response.content),
+                },
+            )
+            return response
+
+        recorded = archive.get("http", key, fallback)
+        response = requests.Response()
+        response.status_code = recorded["status_code"]
+        response.headers = CaseInsensitiveDict(recorded["headers"])
+        response._content = _decode_bytes(recorded["content"])
+        response.url = url
+        return response
+
+    return wrapper
+
+
+def _record_gcs(archive: IOArchive, mode: str, download: Callable) -> Callable:
+    from google.api_core import exceptions as google_exceptions  # type: ignore
+
+    def wrapper(bucket: Any, path: str) -> Any:
+        key = f"{bucket.name}/{path}"
+        if mode == RECORD:
+            try:
+                content = download(bucket, path)
+            except google_exceptions.GoogleAPICallError as e:
+                archive.add("gcs", key, key, {"error": [e.code or 500, e.message]})
+                raise
+            archive.add("gcs", key, key, {"content": _encode_bytes(content)})
+            return content
+
+        recorded = archive.get("gcs", key, key)
+        if "error" in recorded:
+            raise google_exceptions.from_http_status(*recorded["error"])
+        return _decode_bytes(recorded["content"])
+
+    return wrapper
+
+
+def _record_opensearch(archive: IOArchive, mode: str, perform: Callable) -> Callable:
+    def wrapper(
+        transport: Transport,
+        method: str,
+        url: str,
+        params: Any = None,
+        body: Any = None,
+        **kwargs: Any,
+    ) -> Any:
+        serialized_body = None if body is None else transport.serializer.dumps(body)
+        key = f"{method} {url} {_hash(params)} {_hash(serialized_body)}"
+        fallback = f"{method} {url}"
+        if mode == RECORD:
+            try:
+                data = perform(transport, method, url, params, body, **kwargs)
+            except TransportError as e:
+                archive.add(
+                    "opensearch",
+                    key,
+                    fallback,
+                    {"error": [e.status_code, e.error, e.info]},
+                )
+                raise
+            archive.add("opensearch", key, fallback, {"data": data})
+            return data
+
+        recorded = archive.get("opensearch", key, fallback)
+        if "error" in recorded:
+            status, error, info = recorded["error"]
+            ignore = (params or {}).get("ignore", kwargs.get("ignore", ()))
+            if status in (ignore if isinstance(ignore, (list, tuple)) else (ignore,)):
+                return info
+            raise HTTP_EXCEPTIONS.get(status, TransportError)(status, error, info)
+        return recorded["data"]
+
+    return wrapper
+
+
+def _record_slack(archive: IOArchive, mode: str, api_call: Callable) -> Callable:
+    from slack_sdk.web import SlackResponse
+
+    def wrapper(
+        client: "slack_sdk.WebClient", api_method: str, **kwargs: Any
+    ) -> "SlackResponse":
+        key = f"{api_method} {_hash(kwargs.get('json') or kwargs.get('data'))}"
+        if mode == RECORD:
+            response = api_call(client, api_method, **kwargs)
+            archive.add(
+                "slack",
+                key,
+                api_method,
+                {
+                    "http_verb": response.http_verb,
+                    "data": response.data,
+                    "headers": dict(response.headers),
+                    "status_code": response.status_code,
+                },
+            )
+            return response
+
+        recorded = archive.get("slack", key, api_method)
+        return SlackResponse(
+            client=client,
+            http_verb=recorded["http_verb"],
+            api_url=f"{client.base_url}{api_method}",
+            req_args=kwargs,
+            data=recorded["data"],
+            headers=recorded["headers"],
+            status_code=recorded["status_code"],
+        ).validate()
+
+    return wrapper
+
+
+def _patch(
+    stack: ExitStack, target: Any, name: str, wrap: Callable[[Callable], Callable]
+) -> None:
+    original = getattr(target, name)
+    setattr(target, name, wrap(original))
+    stack.callback(setattr, target, name, original)
+
+
+@contextmanager
+def record_io(mode: Optional[str], path: str) -> Iterator[Optional[IOArchive]]:
+    """
+    Record to path the responses of the external services called by the block, or replay the ones recorded.
+    The Prow job list and the Equinix API (requests), GCS artifacts, OpenSearch and Slack are recorded, so that
+    a production run can be reproduced and profiled offline. Nothing is done when mode is not set.
+    """
+    if not mode:
+        yield None
+        return
+    if mode not in (RECORD, REPLAY):
+        raise ValueError(f"invalid I/O recording mode '{mode}'")
+
+    # only imported when recording, as the scraper doesn't use Slack
+    import slack_sdk
+
+    archive = IOArchive.load(path) if mode == REPLAY else IOArchive()
+    with ExitStack() as stack:
+        _patch(stack, requests.api, "request", lambda f: _record_http(archive, mode, f))
+        _patch(
+            stack,
+            utils,
+            "download_blob_as_string",
+            lambda f: _record_gcs(archive, mode, f),
+        )
+        _patch(
+            stack,
+            Transport,
+            "perform_request",
+            lambda f: _record_opensearch(archive, mode, f),
+        )
+        _patch(
+            stack,
+            slack_sdk.WebClient,
+            "api_call",
+            lambda f: _record_slack(archive, mode, f),
+        )
+        try:
+            yield archive
+        finally:
+            if mode == RECORD:
+                archive.save(path)
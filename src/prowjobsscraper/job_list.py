@@ -0,0 +1,116 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from typing import Any, Optional
+
+import orjson
+import requests
+
+from prowjobsscraper.metrics import METRICS
+from prowjobsscraper.prowjob import ProwJob, ProwJobs
+from prowjobsscraper.utils import generate_hash_from_strings
+
+logger = logging.getLogger(__name__)
+
+# number of chunks per worker, so that workers stay busy when chunks take uneven time
+_CHUNKS_PER_WORKER = 4
+
+
+def _parse_assisted_jobs(items: list[dict[str, Any]]) -> list[ProwJob]:
+    return [job for item in items if (job := ProwJob.parse_obj(item)).is_assisted()]
+
+
+class JobListFetcher:
+    """
+    JobListFetcher downloads Prow's job list, gzipped, and only returns the assisted jobs that are new or changed
+    since the last snapshot. The snapshot holds the ETag and Last-Modified headers of the list, used to send
+    conditional requests, and a fingerprint of each job. It is saved by save_snapshot, once the jobs have been
+    processed, so that a long-running process reusing the fetcher only gets the jobs changed since its last run.
+    Jobs are validated on parse_workers processes.
+    """
+
+    def __init__(
+        self, url: str, snapshot_path: Optional[str] = None, parse_workers: int = 1
+    ):
+        self._url = url
+        self._snapshot_path = snapshot_path
+        self._parse_workers = parse_workers
+        self._snapshot = self._load_snapshot()
+        self._next_snapshot: Optional[dict[str, Any]] = None
+
+    def _load_snapshot(self) -> dict[str, Any]:
+        if self._snapshot_path is None or not os.path.exists(self._snapshot_path):
+            return {}
+
+        try:
+            with open(self._snapshot_path, "rb") as f:
+                return orjson.loads(f.read())
+        except orjson.JSONDecodeError as e:
+            logger.warning("Ignoring invalid job list snapshot: %s", e)
+            return {}
+
+    def fetch(self) -> Optional[ProwJobs]:
+        """
+        Return the new or changed assisted jobs of the list, None when the list didn't change since the last snapshot.
+        """
+        headers = {"Accept-Encoding": "gzip"}
+        if etag := self._snapshot.get("etag"):
+            headers["If-None-Match"] = etag
+        if last_modified := self._snapshot.get("last_modified"):
+            headers["If-Modified-Since"] = last_modified
+
+        with METRICS.time("prow_fetch"):
+            r = requests.get(self._url, headers=headers)
+            if r.status_code == requests.codes.not_modified:
+                logger.info("Job list not modified since the last snapshot")
+                return None
+            r.raise_for_status()
+
+            items = orjson.loads(r.content)["items"]
+        METRICS.add_bytes("prow_fetch", len(r.content))
+        METRICS.add_items("prow_fetch", len(items))
+        known_fingerprints = self._snapshot.get("fingerprints", {})
+        fingerprints = {}
+        changed_items = []
+        for item in items:
+            build_id = item.get("status", {}).get("build_id")
+            fingerprint = generate_hash_from_strings(
+                orjson.dumps(item, option=orjson.OPT_SORT_KEYS).decode()
+            )
+            if build_id is not None:
+                fingerprints[build_id] = fingerprint
+                if known_fingerprints.get(build_id) == fingerprint:
+                    continue
+            changed_items.append(item)
+
+        logger.info("%s of %s jobs are new or changed", len(changed_items), len(items))
+        with METRICS.time("prow_parse"):
+            jobs = self._parse_jobs(changed_items)
+        METRICS.add_items("prow_parse", len(jobs))
+        self._next_snapshot = {
+            "etag": r.headers.get("ETag"),
+            "last_modified": r.headers.get("Last-Modified"),
+            "fingerprints": fingerprints,
+        }
+        return ProwJobs(items=jobs)
+
+    def _parse_jobs(self, items: list[dict[str, Any]]) -> list[ProwJob]:
+        if self._parse_workers <= 1 or len(items) < self._parse_workers:
+            return _parse_assisted_jobs(items)
+
+        chunk_size = -(-len(items) // (self._parse_workers * _CHUNKS_PER_WORKER))
+        chunks = [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+        with ProcessPoolExecutor(max_workers=self._parse_workers) as executor:
+            return list(chain.from_iterable(executor.map(_parse_assisted_jobs, chunks)))
+
+    def save_snapshot(self) -> None:
+        if self._next_snapshot is None:
+            return
+
+        if self._snapshot_path is not None:
+            tmp_path = f"{self._snapshot_path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(orjson.dumps(self._next_snapshot))
+            os.replace(tmp_path, self._snapshot_path)
+        self._snapshot, self._next_snapshot = self._next_snapshot, None
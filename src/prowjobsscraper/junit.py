@@ -0,0 +1,95 @@
+from io import BytesIO
+from itertools import chain
+from typing import NamedTuple, Optional, Union
+from xml.etree import ElementTree
+
+
+class JUnitTestCase(NamedTuple):
+    """
+    A JUnitTestCase holds the only fields of a junit testcase a JobStep is made of.
+    """
+
+    name: Optional[str]
+    time: Optional[str]
+    failed: bool
+    failure: Optional[str]
+
+
+class _Suite:
+    __slots__ = ("cases", "suites")
+
+    def __init__(self) -> None:
+        self.cases: list[JUnitTestCase] = []
+        self.suites: list[list[JUnitTestCase]] = []
+
+    def flatten(self) -> list[JUnitTestCase]:
+        # a suite's own testcases come before those of its nested suites
+        return list(chain(self.cases, *self.suites))
+
+
+def _create_testcase(element: ElementTree.Element) -> JUnitTestCase:
+    for child in element.iter("failure"):
+        return JUnitTestCase(
+            name=element.get("name"),
+            time=element.get("time"),
+            failed=True,
+            failure=child.text,
+        )
+
+    return JUnitTestCase(
+        name=element.get("name"), time=element.get("time"), failed=False, failure=None
+    )
+
+
+def parse_testcases(junit: Union[str, bytes]) -> list[JUnitTestCase]:
+    """
+    Stream a junit file and return its testcases, in the order junitparser iterates over them:
+    the testsuites directly under the root element, and for each one its testcases followed by the
+    testcases of its nested testsuites. A root testsuite element is handled as the only testsuite.
+    Only the name, time and first failure of testcases are kept and their elements are released
+    as soon as they are parsed.
+    """
+    if isinstance(junit, str):
+        junit = junit.encode()
+
+    testcases: list[JUnitTestCase] = []
+    # one entry per open element: the suite it represents, if it contributes testcases
+    stack: list[Optional[_Suite]] = []
+    in_testcase = 0
+    for event, element in ElementTree.iterparse(
+        BytesIO(junit), events=("start", "end")
+    ):
+        if event == "start":
+            if in_testcase:
+                in_testcase += 1
+                stack.append(None)
+                continue
+
+            if not stack and element.tag not in ("testsuites", "testsuite"):
+                raise ValueError(f"Invalid junit root element: {element.tag}")
+
+            is_top_level = len(stack) <= 1
+            parent = stack[-1] if stack else None
+            if element.tag == "testsuite" and (is_top_level or parent is not None):
+                stack.append(_Suite())
+            else:
+                if element.tag == "testcase" and parent is not None:
+                    in_testcase = 1
+                stack.append(None)
+            continue
+
+        suite = stack.pop()
+        parent = stack[-1] if stack else None
+        if in_testcase:
+            in_testcase -= 1
+            if in_testcase == 0 and parent is not None:
+                parent.cases.append(_create_testcase(element))
+                element.clear()
+        elif suite is not None:
+            if parent is not None:
+                parent.suites.append(suite.flatten())
+            else:
+                testcases.extend(suite.flatten())
+            element.clear()
+
+    return testcases
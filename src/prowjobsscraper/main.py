@@ -1,39 +1,164 @@
+import argparse
+import asyncio
+import json
 import logging
 import sys
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 
+import requests
 from dateutil.relativedelta import relativedelta
 from google.cloud import storage  # type: ignore
 from opensearchpy import OpenSearch
 
 from prowjobsscraper import (
+    artifact_cache,
+    artifacts,
+    backfill,
     config,
     equinix_metadata,
     equinix_usages,
     event,
-    prowjob,
+    io_recording,
+    job_list,
+    opensearch_client,
+    profiling,
+    rollup,
+    run_history,
     scraper,
     step,
+    utils,
 )
+from prowjobsscraper.metrics import METRICS
+
+logger = logging.getLogger(__name__)
 
 
 def main() -> None:
+    args = _parse_args()
     logging.basicConfig(stream=sys.stdout, level=config.LOG_LEVEL)
 
-    es_client = OpenSearch(
+    # the clients and stores are built inside the recording, as creating the indices calls OpenSearch
+    with io_recording.record_io(config.IO_RECORDING_MODE, config.IO_RECORDING_PATH):
+        _run(args)
+
+
+def _run(args: argparse.Namespace) -> None:
+    es_client = create_es_client()
+    event_store = create_event_store(es_client)
+    gcloud_client = create_gcloud_client()
+    artifact_fetcher = create_artifact_fetcher(gcloud_client)
+    job_list_fetcher = create_job_list_fetcher()
+    scrape = create_scraper(
+        event_store, gcloud_client, artifact_fetcher, create_rollup_store(es_client)
+    )
+
+    if args.command == "backfill":
+        tool, stage = "prow-jobs-scraper-backfill", "backfill"
+        backfiller = backfill.Backfiller(
+            backfill.JobHistory(
+                client=gcloud_client, gcs_bucket_name=config.GCS_BUCKET_NAME
+            ),
+            scrape,
+            event_store,
+            max_workers=args.workers,
+            state_path=args.state_path,
+        )
+        run = lambda: backfiller.run(
+            args.start_date, args.end_date, timedelta(days=args.shard_days)
+        )
+    else:
+        tool, stage = "prow-jobs-scraper", "scrape"
+        run = lambda: run_scrape(job_list_fetcher, scrape)
+
+    profiling_settings = profiling.ProfilingSettings.create_from_env()
+    start_time = datetime.now(tz=timezone.utc)
+    try:
+        with run_history.record_run(
+            es_client, config.ES_RUN_INDEX, tool
+        ), profiling.profile_run(tool, profiling_settings):
+            with METRICS.time(stage):
+                run()
+    finally:
+        export_metrics(start_time, tool, stage)
+
+
+def create_es_client() -> OpenSearch:
+    return opensearch_client.create_opensearch_client(
         config.ES_URL,
-        http_auth=(config.ES_USER, config.ES_PASSWORD),
+        config.ES_USER,
+        config.ES_PASSWORD,
+        settings=opensearch_client.OpenSearchClientSettings.create_from_env(),
         verify_certs=False,
-        ssl_show_warn=False,
     )
-    event_store = event.EventStoreElastic(
+
+
+def create_event_store(
+    es_client: OpenSearch, scan_cache_ttl: Optional[timedelta] = None
+) -> event.EventStoreElastic:
+    return event.EventStoreElastic(
         client=es_client,
         job_index_basename=config.ES_JOB_INDEX,
         step_index_basename=config.ES_STEP_INDEX,
         usage_index_basename=config.ES_USAGE_INDEX,
+        scan_cache_ttl=scan_cache_ttl,
     )
 
-    gcloud_client = storage.Client.create_anonymous_client()
+
+def create_rollup_store(es_client: OpenSearch) -> Optional[rollup.RollupStoreElastic]:
+    if not config.ES_ROLLUP_INDEX:
+        return None
+
+    return rollup.RollupStoreElastic(
+        es_client, config.ES_ROLLUP_INDEX, shard_index=int(config.SCRAPER_SHARD_INDEX)
+    )
+
+
+def create_gcloud_client() -> storage.Client:
+    # the connections are shared by the downloads of the artifact fetcher
+    return utils.create_anonymous_gcs_client(int(config.GCS_MAX_WORKERS))
+
+
+def create_artifact_fetcher(gcloud_client: storage.Client) -> artifacts.ArtifactFetcher:
+    cache = None
+    if config.GCS_ARTIFACT_CACHE_PATH:
+        cache = artifact_cache.ArtifactCache(
+            path=config.GCS_ARTIFACT_CACHE_PATH,
+            ttl=timedelta(seconds=int(config.GCS_ARTIFACT_CACHE_TTL)),
+            max_size=int(config.GCS_ARTIFACT_CACHE_MAX_SIZE),
+        )
+
+    return artifacts.ArtifactFetcher(
+        client=gcloud_client,
+        gcs_bucket_name=config.GCS_BUCKET_NAME,
+        step_extractor=step.StepExtractor(
+            client=gcloud_client, gcs_bucket_name=config.GCS_BUCKET_NAME
+        ),
+        equinix_metadata_extractor=equinix_metadata.EquinixMetadataExtractor(
+            client=gcloud_client, gcs_bucket_name=config.GCS_BUCKET_NAME
+        ),
+        max_workers=int(config.GCS_MAX_WORKERS),
+        cache=cache,
+    )
+
+
+def create_job_list_fetcher() -> job_list.JobListFetcher:
+    return job_list.JobListFetcher(
+        config.JOB_LIST_URL,
+        snapshot_path=config.JOB_LIST_SNAPSHOT_PATH,
+        parse_workers=int(config.JOB_LIST_PARSE_WORKERS),
+    )
+
+
+def create_scraper(
+    event_store: event.EventStoreElastic,
+    gcloud_client: storage.Client,
+    artifact_fetcher: artifacts.ArtifactFetcher,
+    rollup_store: Optional[rollup.RollupStoreElastic] = None,
+) -> scraper.Scraper:
+    """
+    Create a scraper of the Equinix usages of the last week, to be created again for every run.
+    """
     step_extractor = step.StepExtractor(
         client=gcloud_client, gcs_bucket_name=config.GCS_BUCKET_NAME
     )
@@ -51,14 +176,93 @@ def main() -> None:
         end_time=usages_scrape_end_time,
     )
 
-    jobs = prowjob.ProwJobs.create_from_url(config.JOB_LIST_URL)
-    scrape = scraper.Scraper(
+    return scraper.Scraper(
         event_store,
         step_extractor,
         equinix_metadate_extractor,
         equinix_usages_extractor,
+        artifact_fetcher,
+        shard_index=int(config.SCRAPER_SHARD_INDEX),
+        shard_count=int(config.SCRAPER_SHARD_COUNT),
+        rollup_store=rollup_store,
+    )
+
+
+def _parse_date(value: str) -> datetime:
+    date = datetime.fromisoformat(value)
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="prow-jobs-scraper")
+    subparsers = parser.add_subparsers(dest="command")
+    backfill_parser = subparsers.add_parser(
+        "backfill",
+        help="scrape the assisted jobs run between two dates from their GCS history",
+    )
+    backfill_parser.add_argument(
+        "--start-date", type=_parse_date, required=True, help="e.g. 2024-01-01"
+    )
+    backfill_parser.add_argument(
+        "--end-date",
+        type=_parse_date,
+        default=datetime.now(tz=timezone.utc),
+        help="excluded, default: now",
     )
-    scrape.execute(jobs)
+    backfill_parser.add_argument(
+        "--shard-days",
+        type=int,
+        default=1,
+        help="days of history scraped by a worker at a time",
+    )
+    backfill_parser.add_argument("--workers", type=int, default=4)
+    backfill_parser.add_argument(
+        "--state-path",
+        default="backfill-state.json",
+        help="shards already backfilled, skipped when the backfill is run again",
+    )
+    return parser.parse_args()
+
+
+def run_scrape(job_list_fetcher: job_list.JobListFetcher, scrape: scraper.Scraper):
+    jobs = job_list_fetcher.fetch()
+    if jobs is None:
+        return
+
+    if config.SCRAPER_ASYNC == "true":
+        asyncio.run(
+            scrape.execute_async(
+                jobs, max_concurrency=int(config.SCRAPER_MAX_CONCURRENCY)
+            )
+        )
+    else:
+        scrape.execute(jobs)
+
+    job_list_fetcher.save_snapshot()
+
+
+def export_metrics(start_time: datetime, tool: str, stage: str) -> None:
+    summary = {"start_time": start_time.isoformat(), "stages": METRICS.summary()}
+    logger.info("Run summary: %s", json.dumps(summary))
+    if config.METRICS_SUMMARY_PATH:
+        with open(config.METRICS_SUMMARY_PATH, "w") as f:
+            json.dump(summary, f)
+
+    if config.METRICS_TEXTFILE_PATH:
+        METRICS.write_textfile(config.METRICS_TEXTFILE_PATH)
+
+    if config.METRICS_PUSHGATEWAY_URL:
+        try:
+            # each tool, stage and shard has its own group, not to replace the metrics of the others
+            METRICS.push(
+                config.METRICS_PUSHGATEWAY_URL,
+                job=tool,
+                grouping_key={"stage": stage, "shard": config.SCRAPER_SHARD_INDEX},
+            )
+        except requests.RequestException as e:
+            logger.warning("Metrics cannot be pushed to the pushgateway: %s", e)
 
 
 if __name__ == "__main__":
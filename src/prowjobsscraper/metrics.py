@@ -0,0 +1,168 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+from urllib.parse import quote
+
+import requests
+
+# latency buckets in seconds, from a single GCS download to a full bulk indexing
+_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+_Labels = tuple[tuple[str, str], ...]
+
+
+class _Histogram:
+    __slots__ = ("buckets", "count", "sum")
+
+    def __init__(self) -> None:
+        self.buckets = [0] * len(_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(_BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+        self.count += 1
+        self.sum += value
+
+
+class Metrics:
+    """
+    Metrics records, for each stage of a scrape, its wall time as a latency histogram, as well as the number of
+    processed items, transferred bytes and errors. Stages are identified by a name and optional labels.
+    Metrics are exported in the Prometheus text format, to a textfile or a pushgateway, and as a run summary.
+    """
+
+    def __init__(self, namespace: str = "prow_jobs_scraper"):
+        self._namespace = namespace
+        self._lock = threading.Lock()
+        self._durations: dict[_Labels, _Histogram] = {}
+        self._counters: dict[str, dict[_Labels, float]] = {
+            "items": {},
+            "bytes": {},
+            "errors": {},
+        }
+
+    @staticmethod
+    def _labels(stage: str, labels: dict[str, str]) -> _Labels:
+        return (("stage", stage),) + tuple(sorted(labels.items()))
+
+    @contextmanager
+    def time(self, stage: str, **labels: str) -> Iterator[None]:
+        """
+        Record the wall time of the block, an exception raised by the block is counted as an error.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.add_errors(stage, 1, **labels)
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start, **labels)
+
+    def observe(self, stage: str, seconds: float, **labels: str) -> None:
+        key = self._labels(stage, labels)
+        with self._lock:
+            self._durations.setdefault(key, _Histogram()).observe(seconds)
+
+    def _add(self, counter: str, stage: str, value: float, labels: dict[str, str]):
+        key = self._labels(stage, labels)
+        with self._lock:
+            self._counters[counter][key] = self._counters[counter].get(key, 0) + value
+
+    def add_items(self, stage: str, count: int, **labels: str) -> None:
+        self._add("items", stage, count, labels)
+
+    def add_bytes(self, stage: str, size: int, **labels: str) -> None:
+        self._add("bytes", stage, size, labels)
+
+    def add_errors(self, stage: str, count: int, **labels: str) -> None:
+        self._add("errors", stage, count, labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._durations.clear()
+            for values in self._counters.values():
+                values.clear()
+
+    @staticmethod
+    def _format_labels(labels: _Labels) -> str:
+        return ",".join(
+            '{}="{}"'.format(
+                k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            )
+            for k, v in labels
+        )
+
+    def render_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            name = f"{self._namespace}_stage_duration_seconds"
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in sorted(self._durations.items()):
+                formatted = self._format_labels(labels)
+                for bound, count in zip(_BUCKETS, histogram.buckets):
+                    lines.append(f'{name}_bucket{{{formatted},le="{bound}"}} {count}')
+                lines.append(
+                    f'{name}_bucket{{{formatted},le="+Inf"}} {histogram.count}'
+                )
+                lines.append(f"{name}_sum{{{formatted}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{formatted}}} {histogram.count}")
+
+            for counter, values in self._counters.items():
+                name = f"{self._namespace}_stage_{counter}_total"
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(values.items()):
+                    lines.append(f"{name}{{{self._format_labels(labels)}}} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> list[dict[str, Any]]:
+        """
+        One entry per stage with its total wall time, number of calls and counters.
+        """
+        with self._lock:
+            keys = set(self._durations).union(*self._counters.values())
+            stages = []
+            for key in sorted(keys):
+                histogram = self._durations.get(key)
+                stage = dict(key)
+                stage["calls"] = histogram.count if histogram else 0
+                stage["seconds"] = round(histogram.sum, 6) if histogram else 0.0
+                for counter, values in self._counters.items():
+                    stage[counter] = values.get(key, 0)
+                stages.append(stage)
+            return stages
+
+    def write_textfile(self, path: str) -> None:
+        # the node exporter may read the file at any time, it must be replaced atomically
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+    def push(
+        self,
+        gateway_url: str,
+        job: str,
+        grouping_key: Optional[dict[str, str]] = None,
+    ) -> None:
+        """
+        Push the metrics to the pushgateway, replacing only the ones of the group identified by job and grouping_key.
+        """
+        path = f"/metrics/job/{quote(job, safe='')}"
+        for label, value in (grouping_key or {}).items():
+            path += f"/{quote(label, safe='')}/{quote(value, safe='')}"
+        r = requests.put(
+            f"{gateway_url.rstrip('/')}{path}",
+            data=self.render_prometheus(),
+            headers={"Content-Type": "text/plain; version=0.0.4"},
+        )
+        r.raise_for_status()
+
+
+METRICS = Metrics()
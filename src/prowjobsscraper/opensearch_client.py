@@ -0,0 +1,69 @@
+import os
+from dataclasses import dataclass
+from typing import Mapping, Optional
+
+from opensearchpy import OpenSearch
+
+from prowjobsscraper.serializer import OrjsonSerializer
+
+
+@dataclass(frozen=True)
+class OpenSearchClientSettings:
+    """
+    OpenSearchClientSettings holds the transport settings shared by every OpenSearch client.
+    max_connections should match the number of concurrent bulk and scroll requests, timeout (in seconds)
+    applies to every request, bulk and scroll ones included.
+    """
+
+    http_compress: bool = True
+    max_connections: int = 10
+    timeout: int = 60
+    max_retries: int = 3
+    retry_on_timeout: bool = True
+    sniff: bool = False
+
+    @classmethod
+    def create_from_env(
+        cls, environ: Mapping[str, str] = os.environ
+    ) -> "OpenSearchClientSettings":
+        return cls(
+            http_compress=environ.get("ES_HTTP_COMPRESS", "true") == "true",
+            max_connections=int(environ.get("ES_MAX_CONNECTIONS", "10")),
+            timeout=int(environ.get("ES_TIMEOUT", "60")),
+            max_retries=int(environ.get("ES_MAX_RETRIES", "3")),
+            retry_on_timeout=environ.get("ES_RETRY_ON_TIMEOUT", "true") == "true",
+            sniff=environ.get("ES_SNIFF", "false") == "true",
+        )
+
+
+def create_opensearch_client(
+    url: Optional[str],
+    user: Optional[str],
+    password: Optional[str],
+    settings: OpenSearchClientSettings,
+    verify_certs: bool = True,
+) -> OpenSearch:
+    """
+    Create an OpenSearch client gzipping requests and responses and serializing documents with orjson.
+    """
+    sniff_options = {}
+    if settings.sniff:
+        sniff_options = {
+            "sniff_on_start": True,
+            "sniff_on_connection_fail": True,
+            "sniffer_timeout": 60,
+        }
+
+    return OpenSearch(
+        url,
+        http_auth=(user, password),
+        http_compress=settings.http_compress,
+        pool_maxsize=settings.max_connections,
+        timeout=settings.timeout,
+        max_retries=settings.max_retries,
+        retry_on_timeout=settings.retry_on_timeout,
+        verify_certs=verify_certs,
+        ssl_show_warn=verify_certs,
+        serializer=OrjsonSerializer(),
+        **sniff_options,
+    )
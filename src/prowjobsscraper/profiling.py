@@ -0,0 +1,92 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterator, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ProfilingSettings:
+    """
+    ProfilingSettings enables the profiling of a run: cpu with cProfile, memory with tracemalloc.
+    Profiles are written to output_dir, top_n hotspots of each profile are logged.
+    """
+
+    cpu: bool = False
+    memory: bool = False
+    output_dir: str = "."
+    top_n: int = 20
+
+    @classmethod
+    def create_from_env(
+        cls, environ: Mapping[str, str] = os.environ
+    ) -> "ProfilingSettings":
+        return cls(
+            cpu=environ.get("PROFILE_CPU", "false") == "true",
+            memory=environ.get("PROFILE_MEMORY", "false") == "true",
+            output_dir=environ.get("PROFILE_OUTPUT_DIR", "."),
+            top_n=int(environ.get("PROFILE_TOP_N", "20")),
+        )
+
+
+@contextmanager
+def profile_run(tool: str, settings: ProfilingSettings) -> Iterator[None]:
+    """
+    Profile the block according to settings. The cpu profile is written as {tool}-{time}.pstats, to be loaded with
+    pstats or snakeviz, the largest allocations still alive at the end of the block as {tool}-{time}-allocations.txt.
+    """
+    if not settings.cpu and not settings.memory:
+        yield
+        return
+
+    os.makedirs(settings.output_dir, exist_ok=True)
+    prefix = os.path.join(
+        settings.output_dir,
+        f"{tool}-{datetime.now(tz=timezone.utc).strftime('%Y%m%dT%H%M%S')}",
+    )
+
+    profiler: Optional[cProfile.Profile] = None
+    if settings.memory:
+        tracemalloc.start()
+    if settings.cpu:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            _write_cpu_profile(profiler, f"{prefix}.pstats", settings.top_n)
+        if settings.memory:
+            _write_memory_profile(f"{prefix}-allocations.txt", settings.top_n)
+            tracemalloc.stop()
+
+
+def _write_cpu_profile(profiler: cProfile.Profile, path: str, top_n: int) -> None:
+    profiler.dump_stats(path)
+
+    hotspots = io.StringIO()
+    pstats.Stats(profiler, stream=hotspots).sort_stats(
+        pstats.SortKey.CUMULATIVE
+    ).print_stats(top_n)
+    logger.info("CPU profile written to %s, hotspots:\n%s", path, hotspots.getvalue())
+
+
+def _write_memory_profile(path: str, top_n: int) -> None:
+    _, peak = tracemalloc.get_traced_memory()
+    statistics = tracemalloc.take_snapshot().statistics("lineno")
+
+    lines = [f"peak traced memory: {peak} bytes"]
+    lines += [str(s) for s in statistics[:top_n]]
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    logger.info(
+        "Memory profile written to %s, top allocations:\n%s", path, "\n".join(lines)
+    )
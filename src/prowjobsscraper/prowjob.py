@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+import re
 from datetime import datetime
 from typing import TYPE_CHECKING, Any, Final, Optional
 
@@ -25,6 +26,16 @@ _JOB_REHEARSE_PREFIX: Final[str] = "rehearse-"
 _JOB_PREFIX_TEMPLATE: Final[str] = "{type}-{org}-{repo}-{branch}-"
 
 
+def is_assisted_job_name(name: str) -> bool:
+    if not re.search("openshift.*assisted", name):
+        return False
+    elif "openshift-release-fast-forward" in name:
+        # exclude fast-forward jobs
+        return False
+
+    return True
+
+
 class EquinixMetadataOperationSystem(BaseModel):
     slug: str
     imageTag: str = Field(alias="image_tag")
@@ -84,6 +95,20 @@ class ProwJob(BaseModel):
     spec: ProwJobSpec
     status: ProwJobStatus
 
+    def is_assisted(self) -> bool:
+        if self.spec.hidden:
+            return False
+        if self.status.state not in ("success", "failure"):
+            return False
+        elif not is_assisted_job_name(self.spec.job):
+            return False
+        elif self.status.description and "Overridden" in self.status.description:
+            # exclude overridden builds
+            # the url points to github instead of prow
+            return False
+
+        return True
+
     @property
     def context(self) -> str:
         if self.spec.job.startswith(_JOB_REHEARSE_PREFIX):
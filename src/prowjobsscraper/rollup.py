@@ -0,0 +1,304 @@
+import logging
+import re
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from functools import partial
+from importlib import resources
+from typing import TYPE_CHECKING, Any, Callable, Final, Optional
+
+from opensearchpy import OpenSearch, helpers
+from pydantic import BaseModel
+
+from prowjobsscraper.equinix_usages import EquinixUsage
+from prowjobsscraper.event import JobDetails, JobEvent, JobRefs
+from prowjobsscraper.metrics import METRICS
+from prowjobsscraper.prowjob import ProwJob
+from prowjobsscraper.utils import generate_hash_from_strings
+
+if TYPE_CHECKING:
+    from prowjobsscraper.step import JobStep
+
+logger = logging.getLogger(__name__)
+
+# same tokens as the match query of jobs-auto-report on the analyzed step names
+PACKET_SETUP_STEP_NAME: Final[str] = "baremetalds-packet-setup"
+_PACKET_SETUP_TOKENS: Final[frozenset[str]] = frozenset(
+    PACKET_SETUP_STEP_NAME.split("-")
+)
+_TOKEN_SEPARATOR: Final[re.Pattern] = re.compile(r"[^a-z0-9]+")
+
+_SUCCESS: Final[str] = "success"
+_FAILURE: Final[str] = "failure"
+
+# attempts to write a row, merged again each time it was written meanwhile by another process
+_MAX_WRITE_ATTEMPTS: Final[int] = 5
+
+# merges the new runs or usages of a row with its stored version, if any
+_Merge = Callable[[Optional[dict[str, Any]]], dict[str, Any]]
+
+
+def is_packet_setup_step(name: str) -> bool:
+    return _PACKET_SETUP_TOKENS <= set(_TOKEN_SEPARATOR.split(name.lower()))
+
+
+def get_day(time: datetime) -> datetime:
+    return time.astimezone(timezone.utc).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+
+
+class RollupRun(BaseModel):
+    build_id: str
+    start_time: datetime
+    state: Optional[str]
+    # states of the packet setup steps of the run, one per machine lease
+    leases: list[str] = []
+
+
+class JobRollup(BaseModel):
+    """
+    JobRollup holds the runs of a job started the same day, ordered by start time, as well as their counts so that
+    they can be aggregated without reading the runs. The fields of the job specific to each run are cleared.
+    """
+
+    day: datetime
+    shard: int
+    job: JobDetails
+    runs: list[RollupRun]
+    successes: int
+    failures: int
+    lease_successes: int
+    lease_failures: int
+
+    @classmethod
+    def create(
+        cls, day: datetime, shard: int, job: JobDetails, runs: list[RollupRun]
+    ) -> "JobRollup":
+        runs = sorted(runs, key=lambda run: run.start_time)
+        leases = [lease for run in runs for lease in run.leases]
+        return cls(
+            day=day,
+            shard=shard,
+            job=job,
+            runs=runs,
+            successes=sum(1 for run in runs if run.state == _SUCCESS),
+            failures=sum(1 for run in runs if run.state == _FAILURE),
+            lease_successes=leases.count(_SUCCESS),
+            lease_failures=leases.count(_FAILURE),
+        )
+
+
+class UsageRollup(BaseModel):
+    """
+    UsageRollup holds the Equinix cost of a job run by plan, between the start of its first usage and the end of its
+    last one.
+    """
+
+    build_id: str
+    start_date: datetime
+    end_date: Optional[datetime]
+    cost_by_plan: dict[str, float]
+
+    @property
+    def total(self) -> float:
+        return sum(self.cost_by_plan.values())
+
+
+class RollupStoreElastic:
+    """
+    RollupStoreElastic maintains daily rollups of the jobs, their packet setup steps and their Equinix usages in a
+    single index, updated after each bulk index of the scraper, so that reports merge a few rollups instead of
+    scanning every event. The rollups of a job are written by the shard that scraped it, each shard having its own
+    rows, and a run already rolled up is replaced rather than counted twice.
+    """
+
+    def __init__(self, client: OpenSearch, index: str, shard_index: int = 0):
+        self._client = client
+        self._index = index
+        self._shard_index = shard_index
+        # rows are read, merged and written back, the updates of a process are serialized and the ones of other
+        # processes are detected by the sequence numbers of the rows
+        self._lock = threading.Lock()
+        if not self._client.indices.exists(index=index):
+            self._client.indices.create(
+                index=index,
+                body=resources.files("prowjobsscraper")
+                .joinpath("indices/rollups_schema.json")
+                .read_bytes(),
+            )
+
+    def update(
+        self, jobs: list[ProwJob], steps: list["JobStep"], usages: list[EquinixUsage]
+    ) -> None:
+        with self._lock, METRICS.time("rollup"):
+            merges = {
+                **self._get_job_rollup_merges(jobs, steps),
+                **self._get_usage_rollup_merges(usages),
+            }
+            if not merges:
+                return
+
+            self._write(merges)
+            self._client.indices.refresh(index=self._index)
+        METRICS.add_items("rollup", len(merges))
+
+    def _get_rows(self, ids: list[str]) -> dict[str, dict[str, Any]]:
+        rows = helpers.scan(
+            self._client,
+            index=self._index,
+            query={"query": {"ids": {"values": ids}}, "seq_no_primary_term": True},
+            ignore_unavailable=True,
+        )
+        return {row["_id"]: row for row in rows}
+
+    def _write(self, merges: dict[str, _Merge]) -> None:
+        """
+        Merge the rows with their stored version and write them back, unless they were written meanwhile by another
+        process, such as a backfill of the same shard. The conflicting rows are read and merged again.
+        """
+        ids = list(merges)
+        for _ in range(_MAX_WRITE_ATTEMPTS):
+            rows = self._get_rows(ids)
+            documents = (
+                self._gen_document(id, merges[id](rows.get(id)), rows.get(id))
+                for id in ids
+            )
+            _, errors = helpers.bulk(self._client, documents, raise_on_error=False)
+
+            ids = []
+            for error in errors:
+                ((_, item),) = error.items()
+                if item.get("status") != 409:
+                    raise helpers.BulkIndexError(
+                        f"{len(errors)} rollups cannot be written", errors
+                    )
+                ids.append(item["_id"])
+            if not ids:
+                return
+            logger.info("%d rollups written meanwhile are merged again", len(ids))
+
+        raise RuntimeError(
+            f"{len(ids)} rollups cannot be written after {_MAX_WRITE_ATTEMPTS} attempts"
+        )
+
+    def _gen_document(
+        self, id: str, source: dict[str, Any], row: Optional[dict[str, Any]]
+    ) -> dict[str, Any]:
+        if row is None:
+            # fails if the row was created meanwhile
+            return {"_index": self._index, "_op_type": "create", "_id": id, **source}
+        return {
+            "_index": self._index,
+            "_op_type": "index",
+            "_id": id,
+            "if_seq_no": row["_seq_no"],
+            "if_primary_term": row["_primary_term"],
+            **source,
+        }
+
+    def _get_job_rollup_merges(
+        self, jobs: list[ProwJob], steps: list["JobStep"]
+    ) -> dict[str, _Merge]:
+        leases = defaultdict(list)
+        for s in steps:
+            if s.build_id is not None and is_packet_setup_step(s.name):
+                leases[s.build_id].append(s.state)
+
+        new_runs: dict[str, list[RollupRun]] = defaultdict(list)
+        rollup_jobs: dict[str, tuple[datetime, JobDetails]] = {}
+        for j in jobs:
+            details = JobEvent.create_from_prow_job(j).job
+            if details.build_id is None or details.start_time is None:
+                continue
+
+            day = get_day(details.start_time)
+            id = generate_hash_from_strings(
+                "job", day.isoformat(), details.name, str(self._shard_index)
+            )
+            new_runs[id].append(
+                RollupRun(
+                    build_id=details.build_id,
+                    start_time=details.start_time,
+                    state=details.state,
+                    leases=leases.get(details.build_id, []),
+                )
+            )
+            rollup_jobs[id] = day, self._clear_run_fields(details)
+
+        return {
+            id: partial(self._merge_job_rollup, *rollup_jobs[id], runs)
+            for id, runs in new_runs.items()
+        }
+
+    def _merge_job_rollup(
+        self,
+        day: datetime,
+        job: JobDetails,
+        runs: list[RollupRun],
+        row: Optional[dict[str, Any]],
+    ) -> dict[str, Any]:
+        runs_by_build_id = {}
+        if row is not None:
+            existing = JobRollup.parse_obj(row["_source"]["job_rollup"])
+            runs_by_build_id = {run.build_id: run for run in existing.runs}
+        runs_by_build_id.update((run.build_id, run) for run in runs)
+
+        rollup = JobRollup.create(
+            day, self._shard_index, job, list(runs_by_build_id.values())
+        )
+        return {"job_rollup": rollup.dict()}
+
+    @staticmethod
+    def _clear_run_fields(job: JobDetails) -> JobDetails:
+        return job.copy(
+            update={
+                "build_id": None,
+                "duration": 0,
+                "equinix": None,
+                "refs": JobRefs(
+                    base_ref=job.refs.base_ref, org=job.refs.org, repo=job.refs.repo
+                ),
+                "start_time": None,
+                "state": None,
+                "url": None,
+            }
+        )
+
+    def _get_usage_rollup_merges(self, usages: list[EquinixUsage]) -> dict[str, _Merge]:
+        usages_by_build_id = defaultdict(list)
+        for u in usages:
+            usages_by_build_id[u.job_build_id].append(u)
+
+        return {
+            generate_hash_from_strings("usage", build_id): partial(
+                self._merge_usage_rollup, build_id, build_usages
+            )
+            for build_id, build_usages in usages_by_build_id.items()
+        }
+
+    @staticmethod
+    def _merge_usage_rollup(
+        build_id: str,
+        build_usages: list[EquinixUsage],
+        row: Optional[dict[str, Any]],
+    ) -> dict[str, Any]:
+        start_dates = [u.start_date for u in build_usages]
+        end_dates = [u.end_date for u in build_usages]
+        cost_by_plan = {}
+        if row is not None:
+            existing = UsageRollup.parse_obj(row["_source"]["usage_rollup"])
+            start_dates.append(existing.start_date)
+            end_dates.append(existing.end_date)
+            cost_by_plan = existing.cost_by_plan
+        # a usage replaces the previous one of the same plan, as in the usage index
+        cost_by_plan.update((u.plan, u.total) for u in build_usages)
+
+        known_end_dates = [d for d in end_dates if d is not None]
+        rollup = UsageRollup(
+            build_id=build_id,
+            start_date=min(start_dates),
+            end_date=max(known_end_dates) if known_end_dates else None,
+            cost_by_plan=cost_by_plan,
+        )
+        return {"usage_rollup": rollup.dict()}
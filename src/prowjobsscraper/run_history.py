@@ -0,0 +1,48 @@
+import logging
+import resource
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+
+from opensearchpy import OpenSearch
+
+from prowjobsscraper.event import RunEvent, RunStoreElastic
+from prowjobsscraper.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+
+def get_peak_rss() -> int:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@contextmanager
+def record_run(
+    client: OpenSearch, run_index_basename: str, tool: str
+) -> Iterator[None]:
+    """
+    Index a summary of the run of the block in the run history: its duration, the stages recorded in METRICS,
+    the documents read and written, its peak RSS and its errors. A failure to index the summary is only logged,
+    so that it doesn't hide the outcome of the run.
+    """
+    start_time = datetime.now(tz=timezone.utc)
+    error: Optional[str] = None
+    try:
+        yield
+    except Exception as e:
+        error = repr(e)
+        raise
+    finally:
+        run = RunEvent.create_from_metrics(
+            tool=tool,
+            start_time=start_time,
+            end_time=datetime.now(tz=timezone.utc),
+            metrics=METRICS,
+            peak_rss=get_peak_rss(),
+            error=error,
+        )
+        try:
+            RunStoreElastic(client, run_index_basename).index_run(run)
+        except Exception as e:
+            logger.warning("Run summary cannot be indexed: %s", e)
@@ -1,60 +1,212 @@
+import asyncio
 import logging
-import re
-
-from prowjobsscraper import equinix_metadata, equinix_usages, event, prowjob, step
+from typing import Optional
+
+from prowjobsscraper import (
+    artifacts,
+    equinix_metadata,
+    equinix_usages,
+    event,
+    prowjob,
+    rollup,
+    step,
+    utils,
+)
+from prowjobsscraper.metrics import METRICS
 
 logger = logging.getLogger(__name__)
 
 
 class Scraper:
+    """
+    Scraper indexes the assisted jobs, their steps and the Equinix usages. The work can be split across shard_count
+    replicas: each one only scrapes the jobs whose build id hashes to its shard_index, and the usages are only
+    scraped by the first shard. When a rollup_store is given, the daily rollups are updated after each bulk index.
+    """
+
     def __init__(
         self,
         event_store: event.EventStoreElastic,
         step_extractor: step.StepExtractor,
         equinix_metadate_extractor: equinix_metadata.EquinixMetadataExtractor,
         equinix_usages_extractor: equinix_usages.EquinixUsagesExtractor,
+        artifact_fetcher: Optional[artifacts.ArtifactFetcher] = None,
+        shard_index: int = 0,
+        shard_count: int = 1,
+        rollup_store: Optional[rollup.RollupStoreElastic] = None,
     ):
+        if not 0 <= shard_index < shard_count:
+            raise ValueError(
+                f"shard index {shard_index} is out of range for {shard_count} shards"
+            )
+
         self._event_store = event_store
         self._step_extractor = step_extractor
         self._equinix_metadata_extractor = equinix_metadate_extractor
         self._equinix_usages_extractor = equinix_usages_extractor
+        self._artifact_fetcher = artifact_fetcher
+        self._shard_index = shard_index
+        self._shard_count = shard_count
+        self._rollup_store = rollup_store
 
     def execute(self, jobs: prowjob.ProwJobs):
         logger.info("%s jobs will be processed", len(jobs.items))
+        steps = self._scrape_jobs(jobs, self._event_store.scan_build_ids())
+
+        # Retrieve equinix machines usages not already stored
+        usages = []
+        if self._scrapes_usages():
+            known_usages_identifiers = self._event_store.scan_usages_identifiers()
+            unfiltered_usages = self._equinix_usages_extractor.get_project_usages()
+            usages = [
+                usage
+                for usage in unfiltered_usages
+                if self._should_index_usage(usage, known_usages_identifiers)
+            ]
+
+        # Store jobs and steps into their respective indices
+        logger.info("%s jobs will be pushed to ES", len(jobs.items))
+        self._event_store.index_prow_jobs(jobs.items)
 
-        # filter out non-assisted jobs
-        jobs.items = [j for j in jobs.items if self._is_assisted_job(j)]
+        logger.info("%s steps will be pushed to ES", len(steps))
+        self._event_store.index_job_steps(steps, jobs.items)
+
+        logger.info("%s equinix usages will be pushed to ES", len(usages))
+        self._event_store.index_equinix_usages(usages)
+
+        self._materialize_job_costs(jobs, usages)
+        self._update_rollups(jobs, steps, usages)
+
+    def backfill(self, jobs: prowjob.ProwJobs, known_jobs_build_ids: set[str]):
+        """
+        Same as execute for jobs rebuilt from their GCS history, without the Equinix usages that execute
+        retrieves for the last week. The build ids already stored are scanned once by the caller for every batch.
+        """
+        logger.info("%s jobs will be backfilled", len(jobs.items))
+        steps = self._scrape_jobs(jobs, known_jobs_build_ids)
+
+        logger.info("%s jobs will be pushed to ES", len(jobs.items))
+        self._event_store.index_prow_jobs(jobs.items)
+
+        logger.info("%s steps will be pushed to ES", len(steps))
+        self._event_store.index_job_steps(steps, jobs.items)
+
+        self._materialize_job_costs(jobs, [])
+        self._update_rollups(jobs, steps, [])
+
+    def _scrape_jobs(
+        self, jobs: prowjob.ProwJobs, known_jobs_build_ids: set[str]
+    ) -> list[step.JobStep]:
+        # filter out non-assisted jobs and the ones of other shards
+        jobs.items = [j for j in jobs.items if j.is_assisted() and self._is_in_shard(j)]
 
         # filter out jobs already stored
-        known_jobs_build_ids = self._event_store.scan_build_ids()
         jobs.items = [
             j for j in jobs.items if j.status.build_id not in known_jobs_build_ids
         ]
 
-        # Retrieve equinix metadata for each job
-        self._equinix_metadata_extractor.hydrate(jobs)
+        # Retrieve equinix metadata and executed steps for each job
+        with METRICS.time("scrape_artifacts"):
+            if self._artifact_fetcher is not None:
+                steps = self._artifact_fetcher.fetch(jobs)
+            else:
+                self._equinix_metadata_extractor.hydrate(jobs)
+                steps = self._step_extractor.parse_prow_jobs(jobs)
+        METRICS.add_items("scrape_artifacts", len(steps))
+        return steps
+
+    async def execute_async(self, jobs: prowjob.ProwJobs, max_concurrency: int):
+        """
+        Same as execute, but stages that don't depend on each other are run concurrently:
+        the Equinix usages are retrieved while the artifacts of the jobs are downloaded,
+        up to max_concurrency jobs are processed at a time and the indices are fed in parallel.
+        Blocking I/O is offloaded to threads so that the existing clients can be shared.
+        """
+        logger.info("%s jobs will be processed", len(jobs.items))
 
-        # Retrieve executed steps for each job
-        steps = self._step_extractor.parse_prow_jobs(jobs)
+        # filter out non-assisted jobs and the ones of other shards
+        jobs.items = [j for j in jobs.items if j.is_assisted() and self._is_in_shard(j)]
 
-        # Retrieve equinix machines usages not already stored
-        known_usages_identifiers = self._event_store.scan_usages_identifiers()
-        unfiltered_usages = self._equinix_usages_extractor.get_project_usages()
-        usages = [
-            usage
-            for usage in unfiltered_usages
-            if self._should_index_usage(usage, known_usages_identifiers)
+        # Retrieve equinix machines usages not already stored in the background
+        usages_future = None
+        if self._scrapes_usages():
+            usages_future = asyncio.gather(
+                asyncio.to_thread(self._event_store.scan_usages_identifiers),
+                asyncio.to_thread(self._equinix_usages_extractor.get_project_usages),
+            )
+
+        # filter out jobs already stored
+        known_jobs_build_ids = await asyncio.to_thread(self._event_store.scan_build_ids)
+        jobs.items = [
+            j for j in jobs.items if j.status.build_id not in known_jobs_build_ids
         ]
 
-        # Store jobs and steps into their respective indices
+        # Retrieve equinix metadata and executed steps for each job
+        semaphore = asyncio.Semaphore(max_concurrency)
+        with METRICS.time("scrape_artifacts"):
+            jobs_steps = await asyncio.gather(
+                *(self._process_job_async(j, semaphore) for j in jobs.items)
+            )
+        steps = [s for job_steps in jobs_steps for s in job_steps]
+        METRICS.add_items("scrape_artifacts", len(steps))
+
+        usages = []
+        if usages_future is not None:
+            known_usages_identifiers, unfiltered_usages = await usages_future
+            usages = [
+                usage
+                for usage in unfiltered_usages
+                if self._should_index_usage(usage, known_usages_identifiers)
+            ]
+
+        # Store jobs, steps and usages into their respective indices
         logger.info("%s jobs will be pushed to ES", len(jobs.items))
-        self._event_store.index_prow_jobs(jobs.items)
-
         logger.info("%s steps will be pushed to ES", len(steps))
-        self._event_store.index_job_steps(steps)
-
         logger.info("%s equinix usages will be pushed to ES", len(usages))
-        self._event_store.index_equinix_usages(usages)
+        await asyncio.gather(
+            asyncio.to_thread(self._event_store.index_prow_jobs, jobs.items),
+            asyncio.to_thread(self._event_store.index_job_steps, steps, jobs.items),
+            asyncio.to_thread(self._event_store.index_equinix_usages, usages),
+        )
+        await asyncio.to_thread(self._materialize_job_costs, jobs, usages)
+        await asyncio.to_thread(self._update_rollups, jobs, steps, usages)
+
+    def _materialize_job_costs(
+        self, jobs: prowjob.ProwJobs, usages: list[equinix_usages.EquinixUsage]
+    ) -> None:
+        # the usages of a job may be indexed before or after it
+        build_ids = {u.job_build_id for u in usages}
+        build_ids.update(j.status.build_id for j in jobs.items if j.status.build_id)
+        with METRICS.time("materialize_job_costs"):
+            self._event_store.materialize_job_costs(build_ids)
+
+    def _update_rollups(
+        self,
+        jobs: prowjob.ProwJobs,
+        steps: list[step.JobStep],
+        usages: list[equinix_usages.EquinixUsage],
+    ) -> None:
+        if self._rollup_store is not None:
+            self._rollup_store.update(jobs.items, steps, usages)
+
+    async def _process_job_async(
+        self, job: prowjob.ProwJob, semaphore: asyncio.Semaphore
+    ) -> list[step.JobStep]:
+        async with semaphore:
+            if self._artifact_fetcher is not None:
+                return await asyncio.to_thread(self._artifact_fetcher.fetch_job, job)
+
+            await asyncio.to_thread(self._equinix_metadata_extractor.hydrate_job, job)
+            return await asyncio.to_thread(self._step_extractor.parse_prow_job, job)
+
+    def _is_in_shard(self, job: prowjob.ProwJob) -> bool:
+        return utils.is_in_shard(
+            job.status.build_id or "", self._shard_index, self._shard_count
+        )
+
+    def _scrapes_usages(self) -> bool:
+        # usages are not sharded, they are scraped by the first shard only
+        return self._shard_index == 0
 
     def _should_index_usage(
         self,
@@ -62,21 +214,3 @@ class Scraper:
         known_usages_identifiers: set[equinix_usages.EquinixUsageIdentifier],
     ) -> bool:
         return usage.to_identifier() not in known_usages_identifiers
-
-    @staticmethod
-    def _is_assisted_job(j: prowjob.ProwJob) -> bool:
-        if j.spec.hidden:
-            return False
-        if j.status.state not in ("success", "failure"):
-            return False
-        elif not re.search("openshift.*assisted", j.spec.job):
-            return False
-        elif "openshift-release-fast-forward" in j.spec.job:
-            # exclude fast-forward jobs
-            return False
-        elif j.status.description and "Overridden" in j.status.description:
-            # exclude overridden builds
-            # the url points to github instead of prow
-            return False
-
-        return True
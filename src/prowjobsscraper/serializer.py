@@ -0,0 +1,39 @@
+from typing import Any
+
+import orjson
+from opensearchpy.exceptions import SerializationError
+from opensearchpy.serializer import JSONSerializer
+from pydantic import BaseModel
+
+
+class OrjsonSerializer(JSONSerializer):
+    """
+    OrjsonSerializer is a drop-in replacement of opensearch-py default serializer relying on orjson.
+    Datetimes and UUIDs are serialized natively, the same way JSONSerializer does, pydantic models are
+    serialized through their dict and other types fall back on JSONSerializer.default.
+    """
+
+    def default(self, data: Any) -> Any:
+        if isinstance(data, BaseModel):
+            return data.dict()
+
+        return super().default(data)
+
+    def loads(self, s: str) -> Any:
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError as e:
+            raise SerializationError(s, e)
+
+    def dumps(self, data: Any) -> Any:
+        # don't serialize strings
+        if isinstance(data, str):
+            return data
+
+        try:
+            # opensearch-py helpers expect a str to compute the size of bulk chunks
+            return orjson.dumps(
+                data, default=self.default, option=orjson.OPT_NON_STR_KEYS
+            ).decode()
+        except orjson.JSONEncodeError as e:
+            raise SerializationError(data, e)
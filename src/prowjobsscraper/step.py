@@ -1,52 +1,50 @@
 import logging
 from datetime import timedelta
-from typing import Optional
+from typing import NamedTuple, Optional
 
 from google.cloud import exceptions, storage  # type: ignore
-from junitparser import Failure, JUnitXml, TestCase  # type: ignore
-from pydantic import BaseModel, HttpUrl
 
+from prowjobsscraper import junit as junit_parser
 from prowjobsscraper import utils
+from prowjobsscraper.metrics import METRICS
 from prowjobsscraper.prowjob import ProwJob, ProwJobs
 
 logger = logging.getLogger(__name__)
 
 
-class JobStep(BaseModel):
+class JobStep(NamedTuple):
     """
-    A JobStep represents a step in a ProwJob.
+    A JobStep represents a step in a ProwJob. The job is only referenced by its build id,
+    its details are joined in when the step is indexed.
     """
 
-    job: ProwJob
+    build_id: Optional[str]
     name: str
     state: str
-    duration: timedelta
+    # in seconds
+    duration: int
     details: Optional[str] = None
 
     @classmethod
-    def create_from_junit_testcase(cls, job: ProwJob, case: TestCase) -> "JobStep":
-        state = "success"
-        details = None
-        for res in case.result:
-            if isinstance(res, Failure):
-                state = "failure"
-                details = res.text
-                break
+    def create_from_junit_testcase(
+        cls, job: ProwJob, case: junit_parser.JUnitTestCase
+    ) -> "JobStep":
+        state = "failure" if case.failed else "success"
 
         duration = timedelta(0)
         try:
-            if case.time:
-                duration = timedelta(seconds=float(case.time))
+            if case.time and (seconds := float(case.time.replace(",", ""))):
+                duration = timedelta(seconds=seconds)
         except ValueError:
             logger.warning(
                 "Cannot parse duration in junit because it is malformed, job: %s", job
             )
         return cls(
-            job=job,
+            build_id=job.status.build_id,
             name=case.name,
             state=state,
-            duration=duration,
-            details=details,
+            duration=duration.seconds,
+            details=case.failure,
         )
 
 
@@ -66,31 +64,40 @@ class StepExtractor:
         """
         steps = []
         for j in jobs.items:
-            steps.extend(self._create_job_steps(j))
+            steps.extend(self.parse_prow_job(j))
         return steps
 
-    def _get_bucket_and_path_to_junit(self, url: HttpUrl) -> tuple[str, str]:
-        base_path = utils.get_gcs_base_path_from_job_url(url)
-        junit_path = "/".join([base_path, "artifacts", "junit_operator.xml"])
-        return self._gcs_bucket_name, junit_path
-
-    def _download_junit(self, job: ProwJob) -> str:
+    def get_junit_path(self, job: ProwJob) -> str:
         if job.status.url is None:
             raise ValueError("job.status.url is not set")
 
-        bucket_name, blob_path = self._get_bucket_and_path_to_junit(job.status.url)
-        return utils.download_from_gcs_as_string(self._client, bucket_name, blob_path)
+        base_path = utils.get_gcs_base_path_from_job_url(job.status.url)
+        return "/".join([base_path, "artifacts", "junit_operator.xml"])
+
+    def _download_junit(self, job: ProwJob) -> str:
+        with METRICS.time("gcs_download", artifact="junit"):
+            junit = utils.download_from_gcs_as_string(
+                self._client, self._gcs_bucket_name, self.get_junit_path(job)
+            )
+        METRICS.add_bytes("gcs_download", len(junit), artifact="junit")
+        return junit
 
     def _parse_junit_suite_into_steps(self, job: ProwJob, junit: str) -> list[JobStep]:
-        steps = []
-        xml = JUnitXml.fromstring(junit)
-        for suite in xml:
-            for case in suite:
+        with METRICS.time("junit_parse"):
+            steps = []
+            for case in junit_parser.parse_testcases(junit):
+                # a step is identified by its name when indexed
+                if case.name is None:
+                    logger.warning("Skipping testcase without name, job: %s", job)
+                    continue
                 steps.append(JobStep.create_from_junit_testcase(job, case))
-
+        METRICS.add_items("junit_parse", len(steps))
         return steps
 
-    def _create_job_steps(self, job: ProwJob) -> list[JobStep]:
+    def parse_prow_job(self, job: ProwJob) -> list[JobStep]:
+        """
+        Retrieve the junit file of a single ProwJob and parse it into JobSteps.
+        """
         try:
             junit = self._download_junit(job)
         except exceptions.ClientError as e:
@@ -98,3 +105,13 @@ class StepExtractor:
             return []
 
         return self._parse_junit_suite_into_steps(job, junit)
+
+    def create_job_steps(self, job: ProwJob, junit: Optional[str]) -> list[JobStep]:
+        """
+        Parse an already downloaded junit file into JobSteps, None meaning that the job has no junit file.
+        """
+        if junit is None:
+            logger.info("No junit file found for job: %s", job)
+            return []
+
+        return self._parse_junit_suite_into_steps(job, junit)
@@ -1,9 +1,12 @@
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 import mmh3
-from google.cloud import storage  # type: ignore
+import requests
 from pydantic import HttpUrl
 
+if TYPE_CHECKING:
+    from google.cloud import storage  # type: ignore
+
 
 def get_gcs_base_path_from_job_url(
     url: Optional[HttpUrl],
@@ -15,13 +18,47 @@ def get_gcs_base_path_from_job_url(
     return "/".join(base_path)
 
 
-def download_from_gcs_as_string(client: storage.Client, bucket: str, path: str) -> str:
-    gcs_bucket = client.bucket(bucket)
-    gcs_blob = gcs_bucket.blob(path)
+def download_from_gcs_as_string(
+    client: "storage.Client", bucket: str, path: str
+) -> str:
+    return download_blob_as_string(client.bucket(bucket), path)
+
+
+def download_blob_as_string(bucket: "storage.Bucket", path: str) -> str:
+    gcs_blob = bucket.blob(path)
     return gcs_blob.download_as_string()
 
 
+def create_anonymous_gcs_client(connection_pool_size: int) -> "storage.Client":
+    """
+    Create an anonymous GCS client, as storage.Client.create_anonymous_client does, on a session keeping up to
+    connection_pool_size connections, requests keeping at most 10 connections per host by default.
+    """
+    from google.auth.credentials import AnonymousCredentials
+    from google.cloud import storage  # type: ignore
+
+    session = requests.Session()
+    session.mount(
+        "https://",
+        requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=connection_pool_size
+        ),
+    )
+    client = storage.Client(
+        project="<none>", credentials=AnonymousCredentials(), _http=session
+    )
+    client.project = None
+    return client
+
+
 def generate_hash_from_strings(*strings) -> str:
     joined_string = "".join(strings)
     hashed_string = str(mmh3.hash(joined_string))
     return hashed_string
+
+
+def is_in_shard(key: str, shard_index: int, shard_count: int) -> bool:
+    """
+    Keys are spread evenly across shard_count shards by their murmur3 hash, each key belongs to exactly one shard.
+    """
+    return mmh3.hash(key, signed=False) % shard_count == shard_index
@@ -4,6 +4,7 @@ from unittest.mock import MagicMock, patch
 
 import pkg_resources
 import pytest
+from freezegun import freeze_time
 
 from elasticsearch_cleanup import main
 
@@ -16,6 +17,8 @@ def mock_config():
         config.ES_PASSWORD = ""
         config.ES_INDEX_FIELDS_PAIRS = "jobs-*: job.build_id"
         config.DRY_RUN = "false"
+        config.INCREMENTAL = "false"
+        config.ES_STATE_INDEX = "cleanup-state"
 
         yield config
 
@@ -44,7 +47,7 @@ def mock_opensearch_helpers(job_documents) -> MagicMock:
 
 @pytest.fixture(autouse=True)
 def mock_opensearch_client() -> MagicMock:
-    with patch("elasticsearch_cleanup.main.OpenSearch") as opensearch:
+    with patch("elasticsearch_cleanup.main.create_opensearch_client") as opensearch:
         yield opensearch()
 
 
@@ -95,3 +98,53 @@ def test_dry_run_flow_should_be_successfull(
     mock_opensearch_helpers.scan.assert_called_once()
     mock_opensearch_helpers.bulk.assert_not_called()
     mock_opensearch_client.indices.refresh.assert_not_called()
+
+
+@pytest.fixture()
+def mock_state_helpers() -> MagicMock:
+    with patch("elasticsearch_cleanup.state.helpers") as state_helpers:
+        state_helpers.scan.return_value = [{"_id": "jobs-2022.30:job.build_id"}]
+        yield state_helpers
+
+
+@freeze_time("2023-01-01 12:00:00")
+def test_incremental_flow_should_skip_already_cleaned_indices(
+    mock_opensearch_helpers, mock_opensearch_client, mock_config, mock_state_helpers
+):
+    mock_config.INCREMENTAL = "true"
+    mock_opensearch_client.indices.get.return_value = {
+        "jobs-2022.30": {},
+        "jobs-2022.40": {},
+        "jobs-2022.51": {},
+        "jobs-2022.52": {},
+    }
+
+    main.main()
+
+    scanned_indices = [
+        c.kwargs["index"] for c in mock_opensearch_helpers.scan.call_args_list
+    ]
+    assert scanned_indices == ["jobs-2022.40", "jobs-2022.51", "jobs-2022.52"]
+    assert mock_opensearch_helpers.bulk.call_count == 3
+
+    mock_opensearch_client.index.assert_called_once()
+    assert mock_opensearch_client.index.call_args.kwargs["index"] == "cleanup-state"
+    assert (
+        mock_opensearch_client.index.call_args.kwargs["id"]
+        == "jobs-2022.40:job.build_id"
+    )
+
+
+@freeze_time("2023-01-01 12:00:00")
+def test_incremental_dry_run_flow_should_not_record_cleaned_indices(
+    mock_opensearch_helpers, mock_opensearch_client, mock_config, mock_state_helpers
+):
+    mock_config.INCREMENTAL = "true"
+    mock_config.DRY_RUN = "true"
+    mock_opensearch_client.indices.get.return_value = {"jobs-2022.40": {}}
+
+    main.main()
+
+    mock_opensearch_helpers.scan.assert_called_once()
+    mock_opensearch_helpers.bulk.assert_not_called()
+    mock_opensearch_client.index.assert_not_called()
@@ -1,8 +1,11 @@
+from datetime import datetime
+
 import pytest
 
 from elasticsearch_cleanup.models import IndexFieldSelector
 from elasticsearch_cleanup.utils import (
     get_value_from_dict,
+    is_live_weekly_index,
     parse_index_and_fields_pairs,
 )
 
@@ -33,3 +36,17 @@ def test_parse_index_and_fields_pairs():
 
     assert list(parse_index_and_fields_pairs(pairs_string)) == expected
     assert list(parse_index_and_fields_pairs(pairs_string_2)) == expected
+
+
+@pytest.mark.parametrize(
+    "index, is_live",
+    [
+        ("jobs-2022.52", True),
+        ("jobs-2022.51", True),
+        ("jobs-2022.50", False),
+        ("jobs-2021.52", False),
+        ("jobs", True),
+    ],
+)
+def test_is_live_weekly_index(index, is_live):
+    assert is_live_weekly_index(index, datetime(2023, 1, 1, 12)) == is_live
@@ -0,0 +1,104 @@
+from datetime import datetime, timezone
+from typing import Any
+
+from jobsautoreport.decoder import decode_trusted
+from prowjobsscraper.equinix_usages import EquinixUsage, EquinixUsageEvent
+from prowjobsscraper.event import (
+    JobDetails,
+    JobEquinixDetails,
+    JobRefs,
+    StepDetails,
+    StepEvent,
+)
+from prowjobsscraper.serializer import OrjsonSerializer
+
+
+def _to_document(data: dict[str, Any]) -> dict[str, Any]:
+    # same round trip as an indexed document
+    serializer = OrjsonSerializer()
+    return serializer.loads(serializer.dumps(data))
+
+
+def _create_job_details() -> JobDetails:
+    return JobDetails(
+        build_id="1549300279667593216",
+        cloud_cluster_profile="packet-assisted",
+        cloud="packet-edge",
+        context="e2e-metal-assisted",
+        duration=2053,
+        equinix=JobEquinixDetails(
+            facility="dc13",
+            hostname="ipi-ci-op-yvdlzmdn-98f49-1551908182547238912",
+            id="47bd6216-1345-4813-aa19-c0b5648b744a",
+            metro="dc",
+            os_image_tag="1864658f8cc7117649908fe0acafa264f13d5b1b",
+            os_slug="rocky_8",
+            plan="c3.medium.x86",
+        ),
+        name="pull-ci-openshift-assisted-service-master-edge-e2e-metal-assisted",
+        refs=JobRefs(
+            base_ref="master", org="openshift", pull="4121", repo="assisted-service"
+        ),
+        start_time=datetime(2022, 7, 19, 8, 7, 1, tzinfo=timezone.utc),
+        state="failure",
+        type="presubmit",
+        url="https://prow.ci.openshift.org/view/gs/origin-ci-test/pr-logs/pull/openshift_assisted-service/4121/pull-ci-openshift-assisted-service-master-edge-e2e-metal-assisted/1549300279667593216",
+        variant="edge",
+    )
+
+
+def test_decode_trusted_job_should_equal_validated_job():
+    document = _to_document(_create_job_details().dict())
+    document["unknown"] = "value"
+
+    job = decode_trusted(JobDetails, document)
+
+    assert job == JobDetails.parse_obj(document)
+    assert job.start_time == JobDetails.parse_obj(document).start_time
+    assert job.equinix is not None
+    assert job.equinix.plan == "c3.medium.x86"
+    assert "unknown" not in job.dict()
+
+
+def test_decode_trusted_step_event_should_equal_validated_step_event():
+    job = _create_job_details()
+    job.equinix = None
+    document = _to_document(
+        StepEvent(
+            job=job,
+            step=StepDetails(details=None, duration=20, name="step", state="success"),
+        ).dict()
+    )
+
+    step_event = decode_trusted(StepEvent, document)
+
+    assert step_event == StepEvent.parse_obj(document)
+    assert isinstance(step_event.job.refs, type(job.refs))
+    assert step_event.job.equinix is None
+
+
+def test_decode_trusted_usage_event_should_equal_validated_usage_event():
+    usage = EquinixUsage.parse_obj(
+        {
+            "description": None,
+            "end_date": "2023-03-31T23:59:59Z",
+            "facility": "am6",
+            "metro": "am",
+            "name": "ipi-ci-op-tb33cyhd-20a45-1638140834400440320",
+            "plan": "Outbound Bandwidth",
+            "plan_version": "Outbound Bandwidth",
+            "price": 0.05,
+            "quantity": 4,
+            "start_date": "2023-03-01T00:00:00Z",
+            "total": 0.2,
+            "type": "Instance",
+            "unit": "GB",
+        }
+    )
+    document = _to_document(EquinixUsageEvent.create_from_equinix_usage(usage).dict())
+
+    usage_event = decode_trusted(EquinixUsageEvent, document)
+
+    assert usage_event == EquinixUsageEvent.parse_obj(document)
+    assert usage_event.usage.start_date == usage.start_date
+    assert usage_event.usage.job_build_id == usage.job_build_id
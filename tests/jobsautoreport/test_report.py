@@ -19,7 +19,14 @@ from jobsautoreport.models import (
 )
 from jobsautoreport.report import Reporter
 from prowjobsscraper.equinix_usages import EquinixUsage, EquinixUsageEvent
-from prowjobsscraper.event import JobDetails, JobRefs, StepDetails, StepEvent
+from prowjobsscraper.event import (
+    JobDetails,
+    JobEquinixCost,
+    JobPlanCost,
+    JobRefs,
+    StepDetails,
+    StepEvent,
+)
 
 
 @pytest.fixture
@@ -576,8 +583,9 @@ def test__get_periodics_report(
     reporter = Reporter(querier=MagicMock())
     assert (
         reporter._get_periodics_report(
-            periodic_subsystem_and_e2e_jobs=mock_periodic_jobs,
-            usages=mock_usage_events,
+            periodic_subsystem_and_e2e_jobs=Reporter._attach_equinix_costs(
+                mock_periodic_jobs, mock_usage_events
+            ),
         )
         == expected_periodic_jobs_report
     )
@@ -591,8 +599,9 @@ def test__get_presubmits_report(
     reporter = Reporter(querier=MagicMock())
     assert (
         reporter._get_presubmits_report(
-            presubmit_subsystem_and_e2e_jobs=mock_presubmit_jobs,
-            usages=mock_usage_events,
+            presubmit_subsystem_and_e2e_jobs=Reporter._attach_equinix_costs(
+                mock_presubmit_jobs, mock_usage_events
+            ),
             rehearsal_jobs=[],
         )
         == expected_presubmit_jobs_report
@@ -607,8 +616,9 @@ def test__get_postsubmits_report(
     reporter = Reporter(querier=MagicMock())
     assert (
         reporter._get_postsubmits_report(
-            postsubmit_jobs=mock_postsubmit_jobs,
-            usages=mock_usage_events,
+            postsubmit_jobs=Reporter._attach_equinix_costs(
+                mock_postsubmit_jobs, mock_usage_events
+            ),
         )
         == expected_postsubmit_jobs_report
     )
@@ -632,7 +642,9 @@ def test__get_equinix_cost(
     reporter = Reporter(querier=MagicMock())
     assert (
         reporter._get_equinix_cost(
-            assisted_components_jobs=mock_assisted_components_jobs,
+            assisted_components_jobs=Reporter._attach_equinix_costs(
+                mock_assisted_components_jobs, mock_usage_events
+            ),
             usages=mock_usage_events,
         )
         == expected_equinix_cost_report
@@ -650,3 +662,55 @@ def test_get_report_should_successfully_create_report(
     expected_report.to_date = now
     report = reporter.get_report(from_date=a_week_ago, to_date=now)
     assert report == expected_report
+
+
+def test_get_report_should_serve_cached_windows(
+    expected_report: Report,
+    mock_querier: MagicMock,
+):
+    report_cache = MagicMock()
+    report_cache.get.side_effect = lambda from_date, to_date: (
+        expected_report if from_date == expected_report.from_date else None
+    )
+    reporter = Reporter(querier=mock_querier, report_cache=report_cache)
+
+    report = reporter.get_report(
+        from_date=expected_report.from_date, to_date=expected_report.to_date
+    )
+
+    assert report == expected_report
+    mock_querier.query_jobs.assert_not_called()
+
+    now = datetime.now()
+    report = reporter.get_report(from_date=expected_report.to_date, to_date=now)
+
+    mock_querier.query_jobs.assert_called_once()
+    report_cache.put.assert_called_once_with(report)
+
+
+def test_get_report_should_use_costs_materialized_on_jobs(
+    mock_periodic_jobs: list[JobDetails],
+):
+    mock_querier = MagicMock()
+    mock_querier.query_jobs.return_value = [
+        job.copy(
+            update={
+                "equinix_cost": JobEquinixCost(
+                    total=2.5,
+                    plans=[JobPlanCost(plan="c3.medium.x86", total=2.5)],
+                )
+            }
+        )
+        for job in mock_periodic_jobs
+    ]
+    mock_querier.query_packet_setup_step_events.return_value = []
+    mock_querier.query_usage_events.return_value = []
+    reporter = Reporter(querier=mock_querier)
+    now = datetime.now()
+
+    report = reporter.get_report(from_date=now - timedelta(weeks=1), to_date=now)
+
+    assert report.equinix_cost_report.cost_by_job_type == JobTypeMetrics(
+        metrics={"periodic": 2.5 * len(mock_periodic_jobs)}
+    )
+    assert report.equinix_cost_report.total_equinix_machines_cost == 0
@@ -0,0 +1,71 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+from freezegun import freeze_time
+
+from jobsautoreport.models import Report, ReportInterval
+from jobsautoreport.report_cache import ReportCache
+from prowjobsscraper.inmemory_opensearch import InMemoryOpenSearch
+
+
+def _window(report: Report, from_day: int, to_day: int) -> Report:
+    return report.copy(
+        update={
+            "from_date": datetime(2024, 5, from_day, tzinfo=timezone.utc),
+            "to_date": datetime(2024, 5, to_day, tzinfo=timezone.utc),
+        }
+    )
+
+
+def test_report_cache_should_serve_reports_of_the_same_interval_and_version(
+    mock_report_1: Report,
+):
+    client = InMemoryOpenSearch()
+    report_cache = ReportCache(client, "report-cache", ReportInterval.WEEK, "1.0")
+    report = _window(mock_report_1, 1, 8)
+
+    assert report_cache.get(report.from_date, report.to_date) is None
+    report_cache.put(report)
+
+    assert report_cache.get(report.from_date, report.to_date) == report
+    for other_cache in (
+        ReportCache(client, "report-cache", ReportInterval.MONTH, "1.0"),
+        ReportCache(client, "report-cache", ReportInterval.WEEK, "1.1"),
+    ):
+        assert other_cache.get(report.from_date, report.to_date) is None
+
+
+def test_report_cache_should_invalidate_reports_cached_before_date_once(
+    mock_report_1: Report,
+):
+    report_cache = ReportCache(
+        InMemoryOpenSearch(), "report-cache", ReportInterval.WEEK, "1.0"
+    )
+    cached_before = datetime(2024, 5, 10, tzinfo=timezone.utc)
+    assert report_cache.invalidate(cached_before) == 0
+
+    for from_day, to_day in ((1, 8), (8, 15), (15, 22)):
+        with freeze_time(datetime(2024, 5, to_day, tzinfo=timezone.utc)):
+            report_cache.put(_window(mock_report_1, from_day, to_day))
+
+    assert report_cache.invalidate(cached_before) == 1
+    assert report_cache.invalidate(cached_before) == 0
+    assert (
+        report_cache.get(
+            datetime(2024, 5, 1, tzinfo=timezone.utc),
+            datetime(2024, 5, 8, tzinfo=timezone.utc),
+        )
+        is None
+    )
+    assert report_cache.get(
+        datetime(2024, 5, 8, tzinfo=timezone.utc),
+        datetime(2024, 5, 15, tzinfo=timezone.utc),
+    )
+
+
+def test_report_cache_should_not_fail_when_index_is_unavailable():
+    client = MagicMock()
+    client.search.side_effect = ConnectionError("cluster unavailable")
+    report_cache = ReportCache(client, "report-cache", ReportInterval.WEEK, "1.0")
+
+    assert report_cache.invalidate(datetime(2024, 5, 10, tzinfo=timezone.utc)) == 0
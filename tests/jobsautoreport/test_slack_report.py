@@ -64,6 +64,8 @@ def mock_plotter() -> MagicMock:
             plotter_graph_creation_returned_value
         )
         plotter.create_pie_chart.return_value = plotter_graph_creation_returned_value
+        # send_report creates its own plotter
+        plotter.return_value = plotter
         yield plotter
 
 
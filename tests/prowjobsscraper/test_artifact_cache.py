@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from freezegun import freeze_time
+
+from prowjobsscraper.artifact_cache import ArtifactCache
+
+
+def test_cache_should_return_present_and_missing_artifacts(tmp_path):
+    cache = ArtifactCache(
+        path=str(tmp_path / "cache.db"), ttl=timedelta(hours=1), max_size=1024
+    )
+    cache.set_present("bucket/present", b"content")
+    cache.set_missing("bucket/missing")
+
+    present = cache.get("bucket/present")
+    missing = cache.get("bucket/missing")
+
+    assert present is not None and present.content == b"content"
+    assert missing is not None and missing.is_missing
+    assert cache.get("bucket/unknown") is None
+
+
+def test_cache_should_persist_across_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ArtifactCache(path=path, ttl=timedelta(hours=1), max_size=1024)
+    cache.set_missing("bucket/missing")
+    cache.close()
+
+    cache = ArtifactCache(path=path, ttl=timedelta(hours=1), max_size=1024)
+    missing = cache.get("bucket/missing")
+
+    assert missing is not None and missing.is_missing
+
+
+def test_cache_entries_should_expire(tmp_path):
+    with freeze_time("2023-01-01 12:00:00") as frozen_time:
+        cache = ArtifactCache(
+            path=str(tmp_path / "cache.db"), ttl=timedelta(hours=1), max_size=1024
+        )
+        cache.set_present("bucket/present", b"content")
+
+        frozen_time.tick(timedelta(minutes=59))
+        assert cache.get("bucket/present") is not None
+
+        frozen_time.tick(timedelta(minutes=2))
+        assert cache.get("bucket/present") is None
+
+
+def test_cache_should_evict_least_recently_used_artifacts(tmp_path):
+    with freeze_time("2023-01-01 12:00:00") as frozen_time:
+        cache = ArtifactCache(
+            path=str(tmp_path / "cache.db"), ttl=timedelta(hours=1), max_size=10
+        )
+        cache.set_present("bucket/first", b"1234")
+        frozen_time.tick()
+        cache.set_present("bucket/second", b"1234")
+        frozen_time.tick()
+        cache.get("bucket/first")
+        frozen_time.tick()
+        cache.set_present("bucket/third", b"1234")
+
+        assert cache.get("bucket/first") is not None
+        assert cache.get("bucket/second") is None
+        assert cache.get("bucket/third") is not None
@@ -0,0 +1,147 @@
+from datetime import timedelta
+from typing import Optional
+from unittest.mock import MagicMock
+
+import pkg_resources
+from google.cloud import exceptions
+
+from prowjobsscraper import utils
+from prowjobsscraper.artifact_cache import ArtifactCache
+from prowjobsscraper.artifacts import ArtifactFetcher
+from prowjobsscraper.equinix_metadata import EquinixMetadataExtractor
+from prowjobsscraper.prowjob import ProwJobs
+from prowjobsscraper.step import StepExtractor
+
+_BASE_PATH = "pr-logs/pull/openshift_assisted-service/4121/pull-ci-openshift-assisted-service-master-edge-e2e-metal-assisted/1549300279667593216/artifacts"
+_METADATA_PATH = f"{_BASE_PATH}/e2e-metal-assisted/baremetalds-packet-gather-metadata/artifacts/equinix-metadata.json"
+_JUNIT_PATH = f"{_BASE_PATH}/junit_operator.xml"
+
+
+def _create_fetcher(
+    storage_client: MagicMock, cache: Optional[ArtifactCache] = None
+) -> ArtifactFetcher:
+    return ArtifactFetcher(
+        client=storage_client,
+        gcs_bucket_name="origin-ci-test",
+        step_extractor=StepExtractor(storage_client, "origin-ci-test"),
+        equinix_metadata_extractor=EquinixMetadataExtractor(
+            storage_client, "origin-ci-test"
+        ),
+        max_workers=2,
+        cache=cache,
+    )
+
+
+def test_fetch_should_route_artifacts_to_their_extractor():
+    jobs = ProwJobs.create_from_string(
+        pkg_resources.resource_string(__name__, "equinix_assets/prowjobs.json")
+    )
+    artifacts = {
+        _METADATA_PATH: pkg_resources.resource_string(
+            __name__, "equinix_assets/equinix-metadata.json"
+        ),
+        _JUNIT_PATH: pkg_resources.resource_string(
+            __name__, "step_assets/junit_operator.xml"
+        ),
+    }
+
+    def blob_side_effect(path: str) -> MagicMock:
+        blob = MagicMock()
+        blob.download_as_string.return_value = artifacts[path]
+        return blob
+
+    storage_client = MagicMock()
+    bucket = MagicMock()
+    storage_client.bucket.return_value = bucket
+    bucket.blob.side_effect = blob_side_effect
+
+    steps = _create_fetcher(storage_client).fetch(jobs)
+
+    storage_client.bucket.assert_called_once_with("origin-ci-test")
+    assert {c.args[0] for c in bucket.blob.call_args_list} == set(artifacts)
+    assert jobs.items[0].equinixMetadata is not None
+    assert jobs.items[0].equinixMetadata.plan == "c3.medium.x86"
+    assert {s.name for s in steps} == {"step1", "step2", "step3"}
+    for s in steps:
+        assert s.build_id == jobs.items[0].status.build_id
+
+
+def test_fetch_should_not_fail_when_artifacts_are_missing():
+    jobs = ProwJobs.create_from_string(
+        pkg_resources.resource_string(__name__, "equinix_assets/prowjobs.json")
+    )
+
+    storage_client = MagicMock()
+    bucket = MagicMock()
+    blob = MagicMock()
+    storage_client.bucket.return_value = bucket
+    bucket.blob.return_value = blob
+    blob.download_as_string.side_effect = exceptions.ClientError("test")
+
+    steps = _create_fetcher(storage_client).fetch_job(jobs.items[0])
+
+    assert bucket.blob.call_count == 2
+    assert jobs.items[0].equinixMetadata is None
+    assert steps == []
+
+
+def test_fetch_should_skip_metadata_when_non_equinix_job():
+    jobs = ProwJobs.create_from_string(
+        pkg_resources.resource_string(__name__, "equinix_assets/prowjobs.json")
+    )
+    jobs.items[0].metadata.labels.cloudClusterProfile = (
+        "not-equinix-cloud-cluster-profile"
+    )
+
+    storage_client = MagicMock()
+    bucket = MagicMock()
+    blob = MagicMock()
+    storage_client.bucket.return_value = bucket
+    bucket.blob.return_value = blob
+    blob.download_as_string.side_effect = exceptions.ClientError("test")
+
+    _create_fetcher(storage_client).fetch(jobs)
+
+    bucket.blob.assert_called_once_with(_JUNIT_PATH)
+
+
+def test_fetch_should_not_request_cached_artifacts_again(tmp_path):
+    jobs = ProwJobs.create_from_string(
+        pkg_resources.resource_string(__name__, "equinix_assets/prowjobs.json")
+    )
+    junit = pkg_resources.resource_string(__name__, "step_assets/junit_operator.xml")
+
+    def blob_side_effect(path: str) -> MagicMock:
+        blob = MagicMock()
+        if path == _JUNIT_PATH:
+            blob.download_as_string.return_value = junit
+        else:
+            blob.download_as_string.side_effect = exceptions.NotFound("test")
+        return blob
+
+    storage_client = MagicMock()
+    bucket = MagicMock()
+    storage_client.bucket.return_value = bucket
+    bucket.blob.side_effect = blob_side_effect
+
+    cache = ArtifactCache(
+        path=str(tmp_path / "cache.db"), ttl=timedelta(hours=1), max_size=1 << 20
+    )
+    first_steps = _create_fetcher(storage_client, cache).fetch(jobs.copy(deep=True))
+    assert bucket.blob.call_count == 2
+
+    bucket.blob.reset_mock()
+    second_steps = _create_fetcher(storage_client, cache).fetch(jobs.copy(deep=True))
+
+    bucket.blob.assert_not_called()
+    assert first_steps == second_steps
+    assert {s.name for s in second_steps} == {"step1", "step2", "step3"}
+
+
+def test_anonymous_gcs_client_should_keep_a_connection_per_download():
+    client = utils.create_anonymous_gcs_client(connection_pool_size=32)
+
+    assert client.project is None
+    assert (
+        client._http.get_adapter("https://storage.googleapis.com")._pool_maxsize == 32
+    )
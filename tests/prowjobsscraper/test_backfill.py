@@ -0,0 +1,221 @@
+import json
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import orjson
+import pkg_resources
+import pytest
+from freezegun import freeze_time
+from google.cloud import exceptions
+
+from prowjobsscraper import backfill, event, prowjob, scraper, utils
+from prowjobsscraper.inmemory_opensearch import InMemoryOpenSearch
+
+_BUCKET = "test-platform-results"
+_JOB = "pull-ci-openshift-assisted-service-master-edge-e2e-metal-assisted"
+_RUN_PATH = f"pr-logs/pull/openshift_assisted-service/4121/{_JOB}/1549300279667593216"
+
+
+class _Listing(list):
+    def __init__(self, blobs=(), prefixes=()):
+        super().__init__(blobs)
+        self.prefixes = set(prefixes)
+
+
+def _blob(name: str, content: str = "") -> MagicMock:
+    blob = MagicMock()
+    blob.name = name
+    blob.download_as_text.return_value = content
+    return blob
+
+
+def _load_prowjob() -> dict:
+    return json.loads(
+        pkg_resources.resource_string(__name__, "scraper_assets/prowjob.json")
+    )["items"][0]
+
+
+def test_build_id_lower_bound_should_match_prow_build_ids():
+    # build 1549300279667593216 started at 2022-07-19T07:49:05.937Z
+    assert (
+        backfill.get_build_id_lower_bound(
+            datetime(2022, 7, 19, 7, 49, 5, 937000, tzinfo=timezone.utc)
+        )
+        == "1549300279667589120"
+    )
+    assert (
+        backfill.get_build_id_lower_bound(datetime(2022, 7, 19, tzinfo=timezone.utc))
+        < "1549300279667593216"
+        < backfill.get_build_id_lower_bound(datetime(2022, 7, 20, tzinfo=timezone.utc))
+    )
+
+
+def test_job_history_should_list_assisted_job_names():
+    client = MagicMock()
+    client.list_blobs.side_effect = lambda bucket, prefix, **kwargs: {
+        "logs/": _Listing(
+            prefixes=[
+                "logs/periodic-ci-openshift-assisted-test-infra-master-e2e/",
+                "logs/periodic-ci-openshift-release-master-nightly-4.15-e2e-aws/",
+                "logs/periodic-openshift-release-fast-forward-assisted-service/",
+            ]
+        ),
+        "pr-logs/directory/": _Listing(prefixes=[f"pr-logs/directory/{_JOB}/"]),
+    }[prefix]
+
+    job_history = backfill.JobHistory(client=client, gcs_bucket_name=_BUCKET)
+
+    assert job_history.list_job_names() == [
+        "periodic-ci-openshift-assisted-test-infra-master-e2e",
+        _JOB,
+    ]
+
+
+def test_job_history_should_list_job_runs_of_the_date_range():
+    client = MagicMock()
+    client.list_blobs.side_effect = lambda bucket, prefix, **kwargs: {
+        f"logs/{_JOB}/": _Listing(prefixes=[f"logs/{_JOB}/1549300279667593216/"]),
+        f"pr-logs/directory/{_JOB}/": _Listing(
+            blobs=[
+                _blob(
+                    f"pr-logs/directory/{_JOB}/1549300279667593216.txt",
+                    f"gs://{_BUCKET}/{_RUN_PATH}\n",
+                ),
+                _blob(f"pr-logs/directory/{_JOB}/1549300279667593216.json"),
+            ]
+        ),
+    }[prefix]
+
+    job_history = backfill.JobHistory(client=client, gcs_bucket_name=_BUCKET)
+    paths = job_history.list_job_runs(
+        _JOB,
+        datetime(2022, 7, 19, tzinfo=timezone.utc),
+        datetime(2022, 7, 20, tzinfo=timezone.utc),
+    )
+
+    assert paths == [f"logs/{_JOB}/1549300279667593216", _RUN_PATH]
+    for call in client.list_blobs.call_args_list:
+        prefix = call.kwargs["prefix"]
+        assert call.kwargs["start_offset"] == f"{prefix}1549182227051446272"
+        assert call.kwargs["end_offset"] == f"{prefix}1549544614917046272"
+
+
+def test_job_history_should_complete_prow_job_with_finished_json(monkeypatch):
+    prowjob = _load_prowjob()
+    prowjob["status"] = {
+        "state": "pending",
+        "startTime": "2022-07-19T07:49:05Z",
+        "build_id": "1549300279667593216",
+    }
+    artifacts = {
+        f"{_RUN_PATH}/prowjob.json": orjson.dumps(prowjob),
+        f"{_RUN_PATH}/finished.json": orjson.dumps(
+            {"timestamp": 1658218998, "passed": False, "result": "FAILURE"}
+        ),
+    }
+
+    def download(bucket, path):
+        if path not in artifacts:
+            raise exceptions.NotFound(path)
+        return artifacts[path]
+
+    monkeypatch.setattr(utils, "download_blob_as_string", download)
+    job_history = backfill.JobHistory(client=MagicMock(), gcs_bucket_name=_BUCKET)
+
+    job = job_history.get_prow_job(_RUN_PATH)
+
+    assert job is not None
+    assert job.is_assisted()
+    assert job.status.state == "failure"
+    assert job.status.completionTime == datetime(
+        2022, 7, 19, 8, 23, 18, tzinfo=timezone.utc
+    )
+    assert (
+        job.status.url == f"https://prow.ci.openshift.org/view/gs/{_BUCKET}/{_RUN_PATH}"
+    )
+    assert utils.get_gcs_base_path_from_job_url(job.status.url) == _RUN_PATH
+    assert job_history.get_prow_job(f"logs/{_JOB}/1") is None
+
+
+def test_backfiller_should_resume_from_state(tmp_path):
+    state_path = tmp_path / "backfill-state.json"
+    state_path.write_bytes(
+        orjson.dumps(
+            {
+                "completed_shards": [
+                    "2022-07-19T00:00:00+00:00/2022-07-20T00:00:00+00:00"
+                ]
+            }
+        )
+    )
+    job_history = MagicMock()
+    job_history.list_job_names.return_value = [_JOB]
+
+    def list_job_runs(job_name, start, end):
+        if start.day == 21:
+            raise exceptions.ServiceUnavailable("listing failed")
+        return [f"{_RUN_PATH}-{start.day}"]
+
+    job_history.list_job_runs.side_effect = list_job_runs
+    job_history.get_prow_job.return_value = None
+    scraper = MagicMock()
+    event_store = MagicMock()
+    event_store.scan_build_ids.return_value = {"1"}
+    event_store.scan_build_ids_started_between.return_value = {"2"}
+
+    backfiller = backfill.Backfiller(
+        job_history, scraper, event_store, max_workers=2, state_path=str(state_path)
+    )
+    with pytest.raises(RuntimeError):
+        backfiller.run(
+            datetime(2022, 7, 19, tzinfo=timezone.utc),
+            datetime(2022, 7, 21, 12, tzinfo=timezone.utc),
+            timedelta(days=1),
+        )
+
+    assert sorted(c.args[0] for c in job_history.get_prow_job.call_args_list) == [
+        f"{_RUN_PATH}-20"
+    ]
+    assert scraper.backfill.call_count == 1
+    assert scraper.backfill.call_args.args[1] == {"1", "2"}
+    assert orjson.loads(state_path.read_bytes()) == {
+        "completed_shards": [
+            "2022-07-19T00:00:00+00:00/2022-07-20T00:00:00+00:00",
+            "2022-07-20T00:00:00+00:00/2022-07-21T00:00:00+00:00",
+        ]
+    }
+
+
+def test_backfiller_should_skip_jobs_stored_in_older_weekly_indices():
+    client = InMemoryOpenSearch()
+    job = prowjob.ProwJob.parse_obj(_load_prowjob())
+    with freeze_time(job.status.startTime):
+        event.EventStoreElastic(
+            client=client,
+            job_index_basename="jobs",
+            step_index_basename="steps",
+            usage_index_basename="usages",
+        ).index_prow_jobs([job])
+
+    event_store = event.EventStoreElastic(
+        client=client,
+        job_index_basename="jobs",
+        step_index_basename="steps",
+        usage_index_basename="usages",
+    )
+    job_history = MagicMock()
+    job_history.list_job_names.return_value = [_JOB]
+    job_history.list_job_runs.return_value = [_RUN_PATH]
+    job_history.get_prow_job.return_value = job.copy(deep=True)
+    step_extractor = MagicMock()
+    step_extractor.parse_prow_jobs.return_value = []
+    scrape = scraper.Scraper(event_store, step_extractor, MagicMock(), MagicMock())
+
+    backfill.Backfiller(job_history, scrape, event_store, max_workers=1).run(
+        datetime(2022, 7, 19, tzinfo=timezone.utc),
+        datetime(2022, 7, 20, tzinfo=timezone.utc),
+        timedelta(days=1),
+    )
+
+    assert client.count(index="jobs-*") == {"count": 1}
+    step_extractor.parse_prow_jobs.assert_called_once_with(prowjob.ProwJobs(items=[]))
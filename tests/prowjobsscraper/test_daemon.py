@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta, timezone
+from types import ModuleType
+from unittest.mock import MagicMock
+
+import pytest
+
+from prowjobsscraper import daemon
+
+# a Wednesday
+_NOW = datetime(2024, 5, 15, 10, 30, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "schedule, next_run_time",
+    [
+        ("@hourly", datetime(2024, 5, 15, 11, tzinfo=timezone.utc)),
+        ("@daily", datetime(2024, 5, 16, tzinfo=timezone.utc)),
+        ("@weekly", datetime(2024, 5, 19, tzinfo=timezone.utc)),
+        ("@monthly", datetime(2024, 6, 1, tzinfo=timezone.utc)),
+        ("900", datetime(2024, 5, 15, 10, 45, tzinfo=timezone.utc)),
+    ],
+)
+def test_get_next_run_time(schedule: str, next_run_time: datetime):
+    assert daemon.get_next_run_time(schedule, _NOW) == next_run_time
+
+
+def test_get_next_run_time_should_reject_invalid_schedules():
+    with pytest.raises(ValueError):
+        daemon.get_next_run_time("0 * * * *", _NOW)
+
+
+def test_weekly_schedule_should_move_to_next_sunday_on_sunday():
+    sunday = datetime(2024, 5, 19, 0, 0, 1, tzinfo=timezone.utc)
+
+    assert daemon.get_next_run_time("@weekly", sunday) == datetime(
+        2024, 5, 26, tzinfo=timezone.utc
+    )
+
+
+def test_settings_should_be_read_from_config():
+    config = ModuleType("config")
+    config.DAEMON_SCRAPE_SCHEDULE = ""
+    config.DAEMON_REPORT_SCHEDULE = ""
+    config.DAEMON_CLEANUP_SCHEDULE = "@daily"
+    config.DAEMON_JITTER = "0"
+    config.DAEMON_SCAN_CACHE_TTL = "86400"
+    config.ES_RUN_INDEX = "daemon-runs"
+
+    settings = daemon.DaemonSettings.create_from_config(config)
+
+    assert settings == daemon.DaemonSettings(
+        scrape_schedule="",
+        cleanup_schedule="@daily",
+        jitter=0,
+        run_index="daemon-runs",
+    )
+    assert (
+        daemon.create_tasks(MagicMock(), daemon.DaemonSettings(scrape_schedule=""))
+        == []
+    )
+
+
+class _Clock:
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+def test_scheduler_should_run_due_tasks_one_at_a_time():
+    clock = _Clock(_NOW)
+    runs = []
+
+    def scrape():
+        runs.append(("scrape", clock.now))
+        # a long run, the cleanup waits for it and the missed scrapes are coalesced
+        clock.now += timedelta(hours=2)
+
+    def cleanup():
+        runs.append(("cleanup", clock.now))
+        raise RuntimeError("cluster unavailable")
+
+    scheduler = daemon.Scheduler(
+        [
+            daemon.Task("scrape", "@hourly", scrape),
+            daemon.Task("cleanup", "@daily", cleanup),
+        ],
+        jitter=0,
+        clock=clock,
+    )
+
+    assert scheduler.run_pending() == datetime(2024, 5, 15, 11, tzinfo=timezone.utc)
+    assert runs == []
+
+    clock.now = datetime(2024, 5, 16, 0, 0, 1, tzinfo=timezone.utc)
+    next_run_time = scheduler.run_pending()
+
+    assert runs == [
+        ("scrape", datetime(2024, 5, 16, 0, 0, 1, tzinfo=timezone.utc)),
+        ("cleanup", datetime(2024, 5, 16, 2, 0, 1, tzinfo=timezone.utc)),
+    ]
+    assert next_run_time == datetime(2024, 5, 16, 3, tzinfo=timezone.utc)
+
+
+def test_scheduler_should_delay_runs_by_jitter():
+    scheduler = daemon.Scheduler(
+        [daemon.Task("scrape", "@hourly", MagicMock())],
+        jitter=60,
+        clock=_Clock(_NOW),
+    )
+
+    next_run_time = scheduler.run_pending()
+
+    assert next_run_time is not None
+    assert (
+        datetime(2024, 5, 15, 11, tzinfo=timezone.utc)
+        <= next_run_time
+        <= datetime(2024, 5, 15, 11, 1, tzinfo=timezone.utc)
+    )
+
+
+def test_scheduler_should_not_run_tasks_once_stopped():
+    clock = _Clock(_NOW)
+    task = MagicMock()
+    scheduler = daemon.Scheduler(
+        [daemon.Task("scrape", "@hourly", task)], jitter=0, clock=clock
+    )
+
+    scheduler.stop()
+    clock.now += timedelta(hours=1)
+    scheduler.run_forever()
+
+    task.assert_not_called()
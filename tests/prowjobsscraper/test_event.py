@@ -1,7 +1,10 @@
+import json
+from datetime import timedelta
 from unittest.mock import MagicMock, call, patch
 
 import pkg_resources
 from freezegun import freeze_time
+from opensearchpy import helpers
 
 from prowjobsscraper import event, step
 from prowjobsscraper.equinix_usages import (
@@ -9,6 +12,8 @@ from prowjobsscraper.equinix_usages import (
     EquinixUsageEvent,
     EquinixUsageIdentifier,
 )
+from prowjobsscraper.inmemory_opensearch import InMemoryOpenSearch
+from prowjobsscraper.prowjob import ProwJob
 from prowjobsscraper.utils import generate_hash_from_strings
 
 _FREEZE_TIME = "2023-01-01 12:00:00"
@@ -193,8 +198,13 @@ def test_scan_usage_identifiers_from_usages_index_when_results_are_expected(scan
 def test_index_job_step_when_successful(bulk):
     expected_step_index = f"steps-{_EXPECTED_CURRENT_INDEX_SUFFIX}"
 
-    job_step = step.JobStep.parse_raw(
-        pkg_resources.resource_string(__name__, f"event_assets/jobstep.json")
+    job_step = step.JobStep(
+        **json.loads(
+            pkg_resources.resource_string(__name__, f"event_assets/jobstep.json")
+        )
+    )
+    prow_job = ProwJob.parse_raw(
+        pkg_resources.resource_string(__name__, f"event_assets/prowjob.json")
     )
 
     es_client = MagicMock()
@@ -205,11 +215,11 @@ def test_index_job_step_when_successful(bulk):
         usage_index_basename="usages",
     )
 
-    event_store.index_job_steps(steps=[job_step])
+    event_store.index_job_steps(steps=[job_step], jobs=[prow_job])
     bulk.assert_called_once()
     assert bulk.call_args.args[0] == es_client
 
-    step_event = event.StepEvent.create_from_job_step(job_step)
+    step_event = event.StepEvent.create_from_job_step(job_step, prow_job)
     expected_job_step = dict()
     expected_job_step["_index"] = expected_step_index
     expected_job_step["_op_type"] = "update"
@@ -282,10 +292,14 @@ def test_index_equinix_usages_when_successful(bulk):
 def test_index_prow_job_when_successful(bulk):
     expected_job_index = f"jobs-{_EXPECTED_CURRENT_INDEX_SUFFIX}"
 
-    job_step = step.JobStep.parse_raw(
-        pkg_resources.resource_string(__name__, f"event_assets/jobstep.json")
+    job_step = step.JobStep(
+        **json.loads(
+            pkg_resources.resource_string(__name__, f"event_assets/jobstep.json")
+        )
+    )
+    prow_job = ProwJob.parse_raw(
+        pkg_resources.resource_string(__name__, f"event_assets/prowjob.json")
     )
-    prow_job = job_step.job
 
     es_client = MagicMock()
     event_store = event.EventStoreElastic(
@@ -307,7 +321,8 @@ def test_index_prow_job_when_successful(bulk):
     expected_prow_job["_op_type"] = "update"
     expected_prow_job["_id"] = job_event.job.build_id
     expected_prow_job["doc_as_upsert"] = True
-    expected_prow_job["doc"] = job_event.dict()
+    # the materialized cost of a job indexed again is not reset
+    expected_prow_job["doc"] = job_event.dict(exclude={"job": {"equinix_cost"}})
 
     indexed_prow_job = list(bulk.call_args.args[1])
 
@@ -316,11 +331,46 @@ def test_index_prow_job_when_successful(bulk):
     es_client.indices.refresh.assert_called_once_with(index=expected_job_index)
 
 
+@freeze_time(_FREEZE_TIME)
+@patch("opensearchpy.helpers.bulk", return_value=[])
+def test_index_job_steps_should_share_job_document_between_steps(bulk):
+    job_step = step.JobStep(
+        **json.loads(
+            pkg_resources.resource_string(__name__, f"event_assets/jobstep.json")
+        )
+    )
+    prow_job = ProwJob.parse_raw(
+        pkg_resources.resource_string(__name__, f"event_assets/prowjob.json")
+    )
+    other_job_step = job_step._replace(name="other-step", state="failure")
+
+    event_store = event.EventStoreElastic(
+        client=MagicMock(),
+        job_index_basename="jobs",
+        step_index_basename="steps",
+        usage_index_basename="usages",
+    )
+    event_store.index_job_steps(steps=[job_step, other_job_step], jobs=[prow_job])
+
+    indexed_job_steps = list(bulk.call_args.args[1])
+
+    assert [d["doc"] for d in indexed_job_steps] == [
+        event.StepEvent.create_from_job_step(job_step, prow_job).dict(),
+        event.StepEvent.create_from_job_step(other_job_step, prow_job).dict(),
+    ]
+    assert indexed_job_steps[0]["doc"]["job"] is indexed_job_steps[1]["doc"]["job"]
+
+
 def test_job_step_successfully_parse_into_step_event():
-    job_step = step.JobStep.parse_raw(
-        pkg_resources.resource_string(__name__, f"event_assets/jobstep.json")
+    job_step = step.JobStep(
+        **json.loads(
+            pkg_resources.resource_string(__name__, f"event_assets/jobstep.json")
+        )
     )
-    step_event = event.StepEvent.create_from_job_step(job_step)
+    prow_job = ProwJob.parse_raw(
+        pkg_resources.resource_string(__name__, f"event_assets/prowjob.json")
+    )
+    step_event = event.StepEvent.create_from_job_step(job_step, prow_job)
 
     expected_step_event = event.StepEvent.parse_raw(
         pkg_resources.resource_string(
@@ -329,3 +379,140 @@ def test_job_step_successfully_parse_into_step_event():
     )
 
     assert step_event == expected_step_event
+
+
+@freeze_time(_FREEZE_TIME)
+@patch("opensearchpy.helpers.bulk", return_value=[])
+def test_index_job_steps_should_skip_steps_of_unknown_jobs(bulk):
+    job_step = step.JobStep(
+        **json.loads(
+            pkg_resources.resource_string(__name__, f"event_assets/jobstep.json")
+        )
+    )
+    unknown_job_step = job_step._replace(build_id="unknown")
+    prow_job = ProwJob.parse_raw(
+        pkg_resources.resource_string(__name__, f"event_assets/prowjob.json")
+    )
+
+    event_store = event.EventStoreElastic(
+        client=MagicMock(),
+        job_index_basename="jobs",
+        step_index_basename="steps",
+        usage_index_basename="usages",
+    )
+    event_store.index_job_steps(steps=[unknown_job_step, job_step], jobs=[prow_job])
+
+    indexed_job_steps = list(bulk.call_args.args[1])
+
+    assert [d["doc"] for d in indexed_job_steps] == [
+        event.StepEvent.create_from_job_step(job_step, prow_job).dict()
+    ]
+
+
+def test_scans_should_be_cached_and_updated_with_indexed_documents():
+    client = InMemoryOpenSearch()
+    event_store = event.EventStoreElastic(
+        client=client,
+        job_index_basename="jobs",
+        step_index_basename="steps",
+        usage_index_basename="usages",
+        scan_cache_ttl=timedelta(hours=1),
+    )
+    job = ProwJob.parse_raw(
+        pkg_resources.resource_string(__name__, "event_assets/prowjob.json")
+    )
+    usage = EquinixUsage.parse_obj(
+        {
+            "facility": "am6",
+            "metro": "am",
+            "name": "ipi-ci-op-tb33cyhd-20a45-1638140834400440320",
+            "plan": "c3.medium.x86",
+            "plan_version": "c3.medium.x86",
+            "price": 1.5,
+            "quantity": 2,
+            "start_date": "2023-03-01T00:00:00Z",
+            "total": 3,
+            "type": "Instance",
+            "unit": "hour",
+        }
+    )
+
+    with patch.object(helpers, "scan", wraps=helpers.scan) as scan:
+        assert event_store.scan_build_ids() == set()
+        assert event_store.scan_usages_identifiers() == set()
+        event_store.index_prow_jobs([job])
+        event_store.index_equinix_usages([usage])
+
+        assert event_store.scan_build_ids() == {job.status.build_id}
+        assert event_store.scan_usages_identifiers() == {usage.to_identifier()}
+        assert scan.call_count == 2
+
+
+def test_indices_should_roll_over_when_the_week_changes():
+    client = InMemoryOpenSearch()
+    job = ProwJob.parse_raw(
+        pkg_resources.resource_string(__name__, "event_assets/prowjob.json")
+    )
+
+    with freeze_time(_FREEZE_TIME) as frozen_time:
+        event_store = event.EventStoreElastic(
+            client=client,
+            job_index_basename="jobs",
+            step_index_basename="steps",
+            usage_index_basename="usages",
+        )
+        frozen_time.tick(timedelta(weeks=1))
+        event_store.index_prow_jobs([job])
+
+    assert client.count(index=f"jobs-{_EXPECTED_CURRENT_INDEX_SUFFIX}") == {"count": 0}
+    assert client.count(index="jobs-2023.01") == {"count": 1}
+
+
+def test_job_costs_should_be_materialized_on_job_documents():
+    client = InMemoryOpenSearch()
+    event_store = event.EventStoreElastic(
+        client=client,
+        job_index_basename="jobs",
+        step_index_basename="steps",
+        usage_index_basename="usages",
+    )
+    job = ProwJob.parse_raw(
+        pkg_resources.resource_string(__name__, "event_assets/prowjob.json")
+    )
+    usages = [
+        EquinixUsage.parse_obj(
+            {
+                "facility": "am6",
+                "metro": "am",
+                "name": f"ipi-ci-op-tb33cyhd-20a45-{job.status.build_id}",
+                "plan": plan,
+                "plan_version": plan,
+                "price": 1.5,
+                "quantity": 2,
+                "start_date": "2023-03-01T00:00:00Z",
+                "total": total,
+                "type": "Instance",
+                "unit": "hour",
+            }
+        )
+        for plan, total in [("c3.medium.x86", 3), ("m3.large.x86", 2)]
+    ]
+
+    # the usages arrive before the job, which is materialized again once indexed
+    event_store.index_equinix_usages(usages)
+    event_store.materialize_job_costs([job.status.build_id])
+    event_store.index_prow_jobs([job])
+    event_store.materialize_job_costs([job.status.build_id])
+    # a job scraped again keeps its cost
+    event_store.index_prow_jobs([job])
+
+    (document,) = client.search(index="jobs-*")["hits"]["hits"]
+    assert event.JobEvent.parse_obj(
+        document["_source"]
+    ).job.equinix_cost == event.JobEquinixCost(
+        total=5,
+        plans=[
+            event.JobPlanCost(plan="c3.medium.x86", total=3),
+            event.JobPlanCost(plan="m3.large.x86", total=2),
+        ],
+    )
@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+# the configuration of the entry points is read from the environment when they are imported
+_ENVIRONMENT = {
+    "ES_URL": "http://localhost:9200",
+    "ES_USER": "user",
+    "ES_PASSWORD": "password",
+    "ES_JOB_INDEX": "jobs",
+    "ES_STEP_INDEX": "steps",
+    "ES_USAGE_INDEX": "usages",
+    "JOB_LIST_URL": "http://localhost/prowjobs.js",
+    "EQUINIX_PROJECT_ID": "project",
+    "EQUINIX_PROJECT_TOKEN": "token",
+    "SLACK_BOT_TOKEN": "token",
+    "SLACK_CHANNEL_ID": "channel",
+    "REPORT_INTERVAL": "week",
+    "FEATURE_SUCCESS_RATES": "true",
+    "FEATURE_EQUINIX_USAGE": "true",
+    "FEATURE_EQUINIX_COST": "true",
+    "FEATURE_TRENDS": "true",
+    "FEATURE_FLAKINESS_RATES": "true",
+}
+
+# generous, the entry points import in about half a second on a single CPU
+_IMPORT_TIME_BUDGET_US = 3_000_000
+
+
+def _import(module: str) -> dict[str, int]:
+    """
+    Import the module in a new interpreter and return the cumulative import time, in microseconds, of every module
+    it loaded.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env={**os.environ, **_ENVIRONMENT},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    import_times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        import_times[name.strip()] = int(cumulative)
+    return import_times
+
+
+@pytest.mark.parametrize(
+    "entry_point, unused_modules",
+    [
+        ("prowjobsscraper.main", ["slack_sdk", "plotly", "pandas", "pkg_resources"]),
+        (
+            "jobsautoreport.main",
+            ["plotly", "pandas", "numpy", "google.cloud.storage", "pkg_resources"],
+        ),
+        (
+            "elasticsearch_cleanup.main",
+            ["slack_sdk", "plotly", "google.cloud.storage", "pkg_resources"],
+        ),
+        (
+            "prowjobsscraper.daemon",
+            ["slack_sdk", "plotly", "google.cloud.storage", "pkg_resources"],
+        ),
+    ],
+)
+def test_entry_points_should_only_import_the_modules_they_use(
+    entry_point: str, unused_modules: list[str]
+):
+    import_times = _import(entry_point)
+
+    assert [module for module in unused_modules if module in import_times] == []
+    assert import_times[entry_point] < _IMPORT_TIME_BUDGET_US
@@ -0,0 +1,284 @@
+from datetime import datetime, timezone
+
+import pkg_resources
+import pytest
+from opensearchpy import helpers
+from opensearchpy.exceptions import NotFoundError, RequestError
+
+from elasticsearch_cleanup import consts
+from elasticsearch_cleanup.main import remove_duplicates_from_index
+from jobsautoreport.query import Querier
+from prowjobsscraper import event
+from prowjobsscraper.inmemory_opensearch import InMemoryOpenSearch
+from prowjobsscraper.prowjob import ProwJob
+
+
+@pytest.fixture()
+def client() -> InMemoryOpenSearch:
+    client = InMemoryOpenSearch()
+    helpers.bulk(
+        client,
+        [
+            {
+                "_index": "jobs-2023.01",
+                "_id": "1",
+                "job": {
+                    "name": "pull-ci-openshift-assisted-service-master-e2e",
+                    "state": "success",
+                    "start_time": datetime(2023, 1, 2, tzinfo=timezone.utc),
+                    "duration": 10,
+                },
+            },
+            {
+                "_index": "jobs-2023.01",
+                "_id": "2",
+                "job": {
+                    "name": "periodic-ci-openshift-assisted-test-infra-master-e2e",
+                    "state": "failure",
+                    "start_time": datetime(2023, 1, 3, tzinfo=timezone.utc),
+                    "duration": 20,
+                },
+            },
+            {
+                "_index": "jobs-2023.02",
+                "_id": "3",
+                "job": {
+                    "name": "pull-ci-openshift-assisted-installer-master-e2e",
+                    "state": "success",
+                    "start_time": datetime(2023, 1, 10, tzinfo=timezone.utc),
+                    "duration": 30,
+                },
+            },
+        ],
+    )
+    return client
+
+
+def _scan_ids(client: InMemoryOpenSearch, query: dict, index: str = "jobs-*"):
+    return sorted(hit["_id"] for hit in helpers.scan(client, index=index, query=query))
+
+
+def test_bulk_should_upsert_and_delete_documents(client):
+    successes, errors = helpers.bulk(
+        client,
+        [
+            {
+                "_op_type": "update",
+                "_index": "jobs-2023.01",
+                "_id": "1",
+                "doc": {"job": {"state": "failure"}},
+                "doc_as_upsert": True,
+            },
+            {
+                "_op_type": "update",
+                "_index": "jobs-2023.01",
+                "_id": "4",
+                "doc": {"job": {"state": "success"}},
+                "doc_as_upsert": True,
+            },
+            {"_op_type": "delete", "_index": "jobs-2023.02", "_id": "3"},
+        ],
+    )
+
+    assert (successes, errors) == (3, [])
+    job = client.get(index="jobs-2023.01", id="1")["_source"]["job"]
+    assert job["state"] == "failure"
+    assert job["duration"] == 10
+    assert _scan_ids(client, {"query": {"match_all": {}}}) == ["1", "2", "4"]
+
+
+def test_bulk_should_only_write_documents_of_the_expected_sequence_number(client):
+    (hit,) = helpers.scan(
+        client,
+        index="jobs-2023.01",
+        query={"query": {"ids": {"values": ["1"]}}, "seq_no_primary_term": True},
+    )
+    documents = [
+        {
+            "_op_type": "index",
+            "_index": "jobs-2023.01",
+            "_id": "1",
+            "if_seq_no": hit["_seq_no"],
+            "if_primary_term": hit["_primary_term"],
+            "job": {"state": state},
+        }
+        for state in ("failure", "error")
+    ]
+    documents.append({"_op_type": "create", "_index": "jobs-2023.01", "_id": "2"})
+
+    successes, errors = helpers.bulk(client, documents, raise_on_error=False)
+
+    assert successes == 1
+    assert [(e[op]["_id"], e[op]["status"]) for e in errors for op in e] == [
+        ("1", 409),
+        ("2", 409),
+    ]
+    assert client.get(index="jobs-2023.01", id="1")["_source"]["job"] == {
+        "state": "failure"
+    }
+
+
+def test_scan_should_filter_documents(client):
+    assert _scan_ids(
+        client,
+        {
+            "query": {
+                "bool": {
+                    "filter": [
+                        {
+                            "range": {
+                                "job.start_time": {
+                                    "gte": datetime(2023, 1, 2, tzinfo=timezone.utc),
+                                    "lte": datetime(2023, 1, 5, tzinfo=timezone.utc),
+                                }
+                            }
+                        },
+                        {"terms": {"job.state": ["success", "error"]}},
+                    ]
+                }
+            }
+        },
+    ) == ["1"]
+    assert _scan_ids(
+        client,
+        {
+            "query": {
+                "match": {
+                    "job.name": {"query": "assisted-test-infra", "operator": "and"}
+                }
+            }
+        },
+    ) == ["2"]
+    assert _scan_ids(
+        client, {"query": {"bool": {"must_not": {"term": {"job.state": "failure"}}}}}
+    ) == ["1", "3"]
+
+
+def test_scan_should_resolve_index_patterns(client):
+    query = {"query": {"match_all": {}}}
+
+    assert _scan_ids(client, query, index="jobs-2023.02,steps-*") == ["3"]
+    assert _scan_ids(client, query, index="jobs-2023.01,jobs-2023.02") == [
+        "1",
+        "2",
+        "3",
+    ]
+    with pytest.raises(NotFoundError):
+        _scan_ids(client, query, index="jobs-2023.03")
+    assert (
+        list(
+            helpers.scan(
+                client, index="jobs-2023.03", query=query, ignore_unavailable=True
+            )
+        )
+        == []
+    )
+
+
+def test_scan_should_page_through_scroll(client):
+    hits = list(
+        helpers.scan(
+            client, index="jobs-*", query={"_source": ["job.duration"]}, size=1
+        )
+    )
+
+    assert [hit["_source"] for hit in hits] == [
+        {"job": {"duration": 10}},
+        {"job": {"duration": 20}},
+        {"job": {"duration": 30}},
+    ]
+    assert client._scrolls == {}
+
+
+def test_search_should_sort_and_aggregate(client):
+    response = client.search(
+        index="jobs-*",
+        body={
+            "size": 2,
+            "sort": [{"job.duration": {"order": "desc"}}],
+            "aggs": {
+                "states": {
+                    "terms": {"field": "job.state"},
+                    "aggs": {"duration": {"sum": {"field": "job.duration"}}},
+                },
+                "max_duration": {"max": {"field": "job.duration"}},
+            },
+        },
+    )
+
+    assert response["hits"]["total"]["value"] == 3
+    assert [hit["_id"] for hit in response["hits"]["hits"]] == ["3", "2"]
+    assert [
+        hit["_id"]
+        for hit in client.search(
+            index="jobs-*",
+            body={"sort": consts.OPENSEARCH_QUERY_ALL_INDEX_DOCUMENTS["sort"]},
+        )["hits"]["hits"]
+    ] == ["1", "2", "3"]
+    assert response["aggregations"]["max_duration"] == {"value": 30}
+    assert response["aggregations"]["states"]["buckets"] == [
+        {"key": "success", "doc_count": 2, "duration": {"value": 40.0}},
+        {"key": "failure", "doc_count": 1, "duration": {"value": 20.0}},
+    ]
+
+
+def test_indices_should_be_created_and_resolved(client):
+    client.indices.create(index="steps-2023.01", body={"mappings": {"dynamic": True}})
+
+    assert client.indices.exists(index="steps-2023.01")
+    assert not client.indices.exists(index="steps-2023.02")
+    assert sorted(client.indices.get(index="jobs-*,steps-*")) == [
+        "jobs-2023.01",
+        "jobs-2023.02",
+        "steps-2023.01",
+    ]
+    with pytest.raises(RequestError):
+        client.indices.create(index="steps-2023.01")
+    assert client.indices.create(index="steps-2023.01", ignore=400)["status"] == 400
+
+
+def test_event_store_documents_should_be_queried_by_querier():
+    client = InMemoryOpenSearch()
+    job = ProwJob.parse_raw(
+        pkg_resources.resource_string(__name__, "event_assets/prowjob.json")
+    )
+    event_store = event.EventStoreElastic(
+        client=client,
+        job_index_basename="jobs",
+        step_index_basename="steps",
+        usage_index_basename="usages",
+    )
+    event_store.index_prow_jobs([job])
+    querier = Querier(
+        opensearch_client=client,
+        jobs_index="jobs-*",
+        steps_index="steps-*",
+        usages_index="usages-*",
+    )
+
+    jobs = querier.query_jobs(
+        from_date=job.status.startTime, to_date=job.status.completionTime
+    )
+
+    assert event_store.scan_build_ids() == {job.status.build_id}
+    assert jobs == [event.JobEvent.create_from_prow_job(job).job]
+
+
+def test_cleanup_should_remove_duplicates(client):
+    client.index(index="builds-2023.01", id="10", body={"job": {"build_id": "a"}})
+    client.index(index="builds-2023.01", id="9", body={"job": {"build_id": "a"}})
+    client.index(index="builds-2023.01", id="11", body={"job": {"build_id": "b"}})
+
+    remove_duplicates_from_index(
+        opensearch_client=client,
+        index="builds-2023.01",
+        comparison_fields=["job.build_id"],
+        dry_run_mode=False,
+    )
+
+    # helpers.scan replaces the sort of the query with the index order
+    assert _scan_ids(client, {"query": {"match_all": {}}}, index="builds-*") == [
+        "10",
+        "11",
+    ]
+    assert client.count(index="builds-*") == {"count": 2}
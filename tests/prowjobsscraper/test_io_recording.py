@@ -0,0 +1,161 @@
+import gzip
+import os
+import subprocess
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+from google.cloud import exceptions
+from opensearchpy.exceptions import NotFoundError
+from pytest_httpserver import HTTPServer
+from slack_sdk import WebClient
+
+from prowjobsscraper import io_recording, utils
+from prowjobsscraper.opensearch_client import (
+    OpenSearchClientSettings,
+    create_opensearch_client,
+)
+
+
+def test_record_io_should_replay_http_responses(httpserver: HTTPServer, tmp_path):
+    path = str(tmp_path / "recording.jsonl.gz")
+    httpserver.expect_request("/prowjobs.js").respond_with_json(
+        {"items": []}, headers={"ETag": '"v1"'}
+    )
+    httpserver.expect_request("/usages").respond_with_json({"usages": [1]})
+
+    with io_recording.record_io(io_recording.RECORD, path):
+        requests.get(httpserver.url_for("/prowjobs.js"))
+        requests.get(httpserver.url_for("/usages?created[after]=1"))
+    httpserver.clear()
+
+    with io_recording.record_io(io_recording.REPLAY, path):
+        prow_response = requests.get(httpserver.url_for("/prowjobs.js"))
+        # requests embedding the current time are served by path
+        usages_response = requests.get(httpserver.url_for("/usages?created[after]=2"))
+        with pytest.raises(io_recording.ReplayError):
+            requests.get(httpserver.url_for("/prowjobs.js"))
+
+    assert prow_response.json() == {"items": []}
+    assert prow_response.headers["ETag"] == '"v1"'
+    assert usages_response.json() == {"usages": [1]}
+    assert httpserver.log == []
+
+
+def test_record_io_should_replay_gcs_downloads(monkeypatch, tmp_path):
+    path = str(tmp_path / "recording.jsonl.gz")
+
+    def download(bucket, path):
+        if path == "missing":
+            raise exceptions.NotFound("missing")
+        return b"<testsuites/>"
+
+    monkeypatch.setattr(utils, "download_blob_as_string", download)
+    bucket = MagicMock()
+    bucket.name = "test-platform-results"
+
+    with io_recording.record_io(io_recording.RECORD, path):
+        utils.download_blob_as_string(bucket, "junit.xml")
+        with pytest.raises(exceptions.NotFound):
+            utils.download_blob_as_string(bucket, "missing")
+    monkeypatch.setattr(utils, "download_blob_as_string", MagicMock())
+
+    with io_recording.record_io(io_recording.REPLAY, path):
+        assert utils.download_blob_as_string(bucket, "junit.xml") == b"<testsuites/>"
+        with pytest.raises(exceptions.NotFound):
+            utils.download_blob_as_string(bucket, "missing")
+
+    utils.download_blob_as_string.assert_not_called()
+
+
+def test_record_io_should_replay_opensearch_responses(httpserver: HTTPServer, tmp_path):
+    path = str(tmp_path / "recording.jsonl.gz")
+    httpserver.expect_request("/jobs/_search").respond_with_json(
+        {"hits": {"hits": [{"_id": "1"}]}}
+    )
+    httpserver.expect_request("/jobs/_doc/2").respond_with_json(
+        {"found": False}, status=404
+    )
+    client = create_opensearch_client(
+        httpserver.url_for("/"),
+        "user",
+        "password",
+        settings=OpenSearchClientSettings(max_retries=0),
+    )
+
+    with io_recording.record_io(io_recording.RECORD, path):
+        client.search(index="jobs", body={"query": {"match_all": {}}})
+        with pytest.raises(NotFoundError):
+            client.get(index="jobs", id="2")
+    httpserver.clear()
+
+    with io_recording.record_io(io_recording.REPLAY, path):
+        response = client.search(index="jobs", body={"query": {"match_all": {}}})
+        with pytest.raises(NotFoundError):
+            client.get(index="jobs", id="2")
+
+    assert response == {"hits": {"hits": [{"_id": "1"}]}}
+    assert httpserver.log == []
+
+
+def test_record_io_should_replay_slack_responses(httpserver: HTTPServer, tmp_path):
+    path = str(tmp_path / "recording.jsonl.gz")
+    httpserver.expect_request("/api/chat.postMessage").respond_with_json(
+        {"ok": True, "ts": "1234.5"}
+    )
+    client = WebClient(token="token", base_url=httpserver.url_for("/api/"))
+
+    with io_recording.record_io(io_recording.RECORD, path):
+        client.chat_postMessage(channel="channel", text="report")
+    httpserver.clear()
+
+    with io_recording.record_io(io_recording.REPLAY, path):
+        response = client.chat_postMessage(channel="channel", text="report")
+
+    assert response["ts"] == "1234.5"
+    assert httpserver.log == []
+
+
+def test_record_io_should_do_nothing_when_mode_is_not_set(tmp_path):
+    original = requests.api.request
+
+    with io_recording.record_io("", str(tmp_path / "recording.jsonl.gz")) as archive:
+        assert requests.api.request is original
+
+    assert archive is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_scraper_should_replay_its_setup_without_calling_opensearch(tmp_path):
+    path = tmp_path / "recording.jsonl.gz"
+    with gzip.open(path, "wb"):
+        pass
+    # the configuration is read from the environment when the scraper is imported
+    environment = {
+        **os.environ,
+        "ES_URL": "http://127.0.0.1:9",
+        "ES_USER": "user",
+        "ES_PASSWORD": "password",
+        "ES_JOB_INDEX": "jobs",
+        "ES_STEP_INDEX": "steps",
+        "ES_USAGE_INDEX": "usages",
+        "ES_ROLLUP_INDEX": "rollups",
+        "JOB_LIST_URL": "http://127.0.0.1:9/prowjobs.js",
+        "EQUINIX_PROJECT_ID": "project",
+        "EQUINIX_PROJECT_TOKEN": "token",
+        "IO_RECORDING_MODE": io_recording.REPLAY,
+        "IO_RECORDING_PATH": str(path),
+    }
+
+    result = subprocess.run(
+        [sys.executable, "-m", "prowjobsscraper.main"],
+        env=environment,
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode != 0
+    # the indices created by the event store are the first calls, served from the empty archive
+    assert "ReplayError: no recorded opensearch response" in result.stderr
+    assert "ConnectionError" not in result.stderr
@@ -0,0 +1,131 @@
+import copy
+import json
+from typing import Any
+
+import pkg_resources
+import pytest
+from pytest_httpserver import HTTPServer
+from werkzeug import Request, Response
+
+from prowjobsscraper.job_list import JobListFetcher
+
+_ETAG = '"v1"'
+
+
+def _create_job_list(build_ids: list[str]) -> dict[str, Any]:
+    job = json.loads(
+        pkg_resources.resource_string(
+            __name__, f"prowjob_assets/valid_prow_response.json"
+        )
+    )["items"][0]
+
+    items = []
+    for build_id in build_ids:
+        item = copy.deepcopy(job)
+        item["status"]["build_id"] = build_id
+        items.append(item)
+    return {"items": items}
+
+
+def _serve_job_list(httpserver: HTTPServer, job_list: dict[str, Any], etag: str):
+    def handler(request: Request) -> Response:
+        if request.headers.get("If-None-Match") == etag:
+            return Response(status=304)
+        return Response(
+            json.dumps(job_list), headers={"ETag": etag}, content_type="text/plain"
+        )
+
+    httpserver.clear()
+    httpserver.expect_request("/jobs").respond_with_handler(handler)
+
+
+def test_fetch_without_snapshot_should_return_every_job(httpserver: HTTPServer):
+    _serve_job_list(httpserver, _create_job_list(["1", "2"]), _ETAG)
+
+    fetcher = JobListFetcher(httpserver.url_for("/jobs"))
+    jobs = fetcher.fetch()
+    fetcher.save_snapshot()
+
+    assert [j.status.build_id for j in jobs.items] == ["1", "2"]
+    request, _ = httpserver.log[0]
+    assert request.headers["Accept-Encoding"] == "gzip"
+    assert "If-None-Match" not in request.headers
+
+
+def test_fetch_should_reuse_snapshot_kept_in_memory(httpserver: HTTPServer):
+    _serve_job_list(httpserver, _create_job_list(["1", "2"]), _ETAG)
+    fetcher = JobListFetcher(httpserver.url_for("/jobs"))
+    fetcher.fetch()
+    fetcher.save_snapshot()
+
+    assert fetcher.fetch() is None
+
+    _serve_job_list(httpserver, _create_job_list(["1", "2", "3"]), '"v2"')
+    jobs = fetcher.fetch()
+
+    assert [j.status.build_id for j in jobs.items] == ["3"]
+
+
+def test_fetch_should_return_none_when_job_list_is_not_modified(
+    httpserver: HTTPServer, tmp_path
+):
+    _serve_job_list(httpserver, _create_job_list(["1", "2"]), _ETAG)
+    snapshot_path = str(tmp_path / "snapshot.json")
+
+    fetcher = JobListFetcher(httpserver.url_for("/jobs"), snapshot_path)
+    assert len(fetcher.fetch().items) == 2
+    fetcher.save_snapshot()
+
+    assert JobListFetcher(httpserver.url_for("/jobs"), snapshot_path).fetch() is None
+    request, _ = httpserver.log[-1]
+    assert request.headers["If-None-Match"] == _ETAG
+
+
+def test_fetch_should_only_return_new_or_changed_jobs(httpserver: HTTPServer, tmp_path):
+    snapshot_path = str(tmp_path / "snapshot.json")
+    _serve_job_list(httpserver, _create_job_list(["1", "2"]), _ETAG)
+    fetcher = JobListFetcher(httpserver.url_for("/jobs"), snapshot_path)
+    fetcher.fetch()
+    fetcher.save_snapshot()
+
+    job_list = _create_job_list(["1", "2", "3"])
+    job_list["items"][1]["status"]["state"] = "success"
+    _serve_job_list(httpserver, job_list, '"v2"')
+    jobs = JobListFetcher(httpserver.url_for("/jobs"), snapshot_path).fetch()
+
+    assert [j.status.build_id for j in jobs.items] == ["2", "3"]
+
+
+def test_fetch_should_return_every_job_when_snapshot_is_not_saved(
+    httpserver: HTTPServer, tmp_path
+):
+    snapshot_path = str(tmp_path / "snapshot.json")
+    _serve_job_list(httpserver, _create_job_list(["1", "2"]), _ETAG)
+    JobListFetcher(httpserver.url_for("/jobs"), snapshot_path).fetch()
+
+    jobs = JobListFetcher(httpserver.url_for("/jobs"), snapshot_path).fetch()
+
+    assert len(jobs.items) == 2
+
+
+@pytest.mark.parametrize("parse_workers", [1, 2])
+def test_fetch_should_only_return_assisted_jobs(httpserver: HTTPServer, parse_workers):
+    job_list = _create_job_list([str(i) for i in range(10)])
+    job_list["items"][3]["status"]["state"] = "pending"
+    job_list["items"][6]["spec"]["job"] = "periodic-ci-openshift-release-master-e2e"
+    _serve_job_list(httpserver, job_list, _ETAG)
+
+    jobs = JobListFetcher(
+        httpserver.url_for("/jobs"), parse_workers=parse_workers
+    ).fetch()
+
+    assert [j.status.build_id for j in jobs.items] == [
+        "0",
+        "1",
+        "2",
+        "4",
+        "5",
+        "7",
+        "8",
+        "9",
+    ]
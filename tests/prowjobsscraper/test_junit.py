@@ -0,0 +1,60 @@
+import pkg_resources
+import pytest
+
+from prowjobsscraper.junit import JUnitTestCase, parse_testcases
+
+_NESTED_JUNIT = b"""
+<testsuites>
+  <testcase name="orphan"/>
+  <testsuite name="a">
+    <testsuite name="nested">
+      <testcase name="n1" time="1,000.5"/>
+      <testsuite name="deeper"><testcase name="d1"/></testsuite>
+    </testsuite>
+    <testcase name="a1" time="0">
+      <error>error</error>
+      <skipped/>
+      <failure message="m">first</failure>
+      <failure>second</failure>
+    </testcase>
+    <group><testsuite name="hidden"><testcase name="h"/></testsuite></group>
+    <testcase name="a2"><system-out>out</system-out><failure/></testcase>
+  </testsuite>
+  <testsuite name="b"><testcase time="3"/></testsuite>
+</testsuites>
+"""
+
+
+def test_parse_testcases_with_valid_junit():
+    junit = pkg_resources.resource_string(__name__, "step_assets/junit_operator.xml")
+
+    testcases = parse_testcases(junit)
+
+    assert [(t.name, t.time, t.failed) for t in testcases] == [
+        ("step1", "1.664e-06", False),
+        ("step2", "20.173183541", False),
+        ("step3", "610", True),
+    ]
+    assert testcases[0].failure is None
+    assert testcases[2].failure.startswith("subsystem/agent_test.go:206")
+
+
+def test_parse_testcases_should_follow_junitparser_ordering():
+    assert parse_testcases(_NESTED_JUNIT) == [
+        JUnitTestCase(name="a1", time="0", failed=True, failure="first"),
+        JUnitTestCase(name="a2", time=None, failed=True, failure=None),
+        JUnitTestCase(name="n1", time="1,000.5", failed=False, failure=None),
+        JUnitTestCase(name="d1", time=None, failed=False, failure=None),
+        JUnitTestCase(name=None, time="3", failed=False, failure=None),
+    ]
+
+
+def test_parse_testcases_with_testsuite_root():
+    junit = '<testsuite><testcase name="x"/><testsuite><testcase name="y"/></testsuite></testsuite>'
+
+    assert [t.name for t in parse_testcases(junit)] == ["x", "y"]
+
+
+def test_parse_testcases_with_invalid_root_should_fail():
+    with pytest.raises(ValueError):
+        parse_testcases("<report><testsuite/></report>")
@@ -0,0 +1,138 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from pytest_httpserver import HTTPServer
+
+from prowjobsscraper import event
+from prowjobsscraper.metrics import METRICS, Metrics
+
+
+def test_time_should_record_durations_and_errors():
+    metrics = Metrics()
+
+    with metrics.time("gcs_download", artifact="junit"):
+        pass
+    with pytest.raises(ValueError):
+        with metrics.time("gcs_download", artifact="junit"):
+            raise ValueError("test")
+    metrics.add_bytes("gcs_download", 42, artifact="junit")
+    metrics.add_items("junit_parse", 3)
+
+    assert metrics.summary() == [
+        {
+            "stage": "gcs_download",
+            "artifact": "junit",
+            "calls": 2,
+            "seconds": pytest.approx(0, abs=0.1),
+            "items": 0,
+            "bytes": 42,
+            "errors": 1,
+        },
+        {
+            "stage": "junit_parse",
+            "calls": 0,
+            "seconds": 0.0,
+            "items": 3,
+            "bytes": 0,
+            "errors": 0,
+        },
+    ]
+
+
+def test_render_prometheus_should_export_histograms_and_counters():
+    metrics = Metrics()
+    metrics.observe("es_bulk", 0.2, index="jobs")
+    metrics.observe("es_bulk", 20, index="jobs")
+    metrics.add_items("es_bulk", 10, index="jobs")
+
+    lines = metrics.render_prometheus().splitlines()
+
+    assert "# TYPE prow_jobs_scraper_stage_duration_seconds histogram" in lines
+    assert (
+        'prow_jobs_scraper_stage_duration_seconds_bucket{stage="es_bulk",index="jobs",le="0.1"} 0'
+        in lines
+    )
+    assert (
+        'prow_jobs_scraper_stage_duration_seconds_bucket{stage="es_bulk",index="jobs",le="0.25"} 1'
+        in lines
+    )
+    assert (
+        'prow_jobs_scraper_stage_duration_seconds_bucket{stage="es_bulk",index="jobs",le="+Inf"} 2'
+        in lines
+    )
+    assert (
+        'prow_jobs_scraper_stage_duration_seconds_count{stage="es_bulk",index="jobs"} 2'
+        in lines
+    )
+    assert (
+        'prow_jobs_scraper_stage_items_total{stage="es_bulk",index="jobs"} 10' in lines
+    )
+
+
+def test_write_textfile_should_write_prometheus_format(tmp_path):
+    metrics = Metrics()
+    metrics.add_items("prow_fetch", 5)
+    path = tmp_path / "scraper.prom"
+
+    metrics.write_textfile(str(path))
+
+    assert path.read_text() == metrics.render_prometheus()
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_push_should_put_metrics_to_pushgateway(httpserver: HTTPServer):
+    metrics = Metrics()
+    metrics.add_items("prow_fetch", 5)
+    httpserver.expect_request(
+        "/metrics/job/prow-jobs-scraper",
+        method="PUT",
+        data=metrics.render_prometheus(),
+    ).respond_with_data("")
+
+    metrics.push(httpserver.url_for("/"), job="prow-jobs-scraper")
+
+    httpserver.check_assertions()
+
+
+def test_push_should_group_metrics_by_grouping_key(httpserver: HTTPServer):
+    metrics = Metrics()
+    metrics.add_items("prow_fetch", 5)
+    httpserver.expect_request(
+        "/metrics/job/prow-jobs-scraper-backfill/stage/backfill/shard/1",
+        method="PUT",
+        data=metrics.render_prometheus(),
+    ).respond_with_data("")
+
+    metrics.push(
+        httpserver.url_for("/"),
+        job="prow-jobs-scraper-backfill",
+        grouping_key={"stage": "backfill", "shard": "1"},
+    )
+
+    httpserver.check_assertions()
+
+
+@patch("opensearchpy.helpers.bulk")
+@patch("opensearchpy.helpers.scan")
+def test_event_store_should_record_indexed_and_scanned_documents(scan, bulk):
+    METRICS.reset()
+    scan.return_value = [{"_source": {"job": {"build_id": "1"}}}]
+    event_store = event.EventStoreElastic(
+        client=MagicMock(),
+        job_index_basename="jobs",
+        step_index_basename="steps",
+        usage_index_basename="usages",
+    )
+
+    def bulk_side_effect(client, actions):
+        list(actions)
+
+    bulk.side_effect = bulk_side_effect
+    event_store.scan_build_ids()
+    event_store.index_prow_jobs([])
+
+    summary = {s["stage"]: s for s in METRICS.summary()}
+    assert summary["es_scan"]["index"] == "jobs"
+    assert summary["es_scan"]["items"] == 1
+    assert summary["es_bulk"]["calls"] == 1
+    assert summary["es_bulk"]["items"] == 0
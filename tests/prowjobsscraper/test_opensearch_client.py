@@ -0,0 +1,53 @@
+from prowjobsscraper.opensearch_client import (
+    OpenSearchClientSettings,
+    create_opensearch_client,
+)
+from prowjobsscraper.serializer import OrjsonSerializer
+
+
+def test_settings_should_have_defaults_when_env_is_empty():
+    assert OpenSearchClientSettings.create_from_env({}) == OpenSearchClientSettings()
+
+
+def test_settings_should_be_read_from_env():
+    settings = OpenSearchClientSettings.create_from_env(
+        {
+            "ES_HTTP_COMPRESS": "false",
+            "ES_MAX_CONNECTIONS": "4",
+            "ES_TIMEOUT": "120",
+            "ES_MAX_RETRIES": "5",
+            "ES_RETRY_ON_TIMEOUT": "false",
+            "ES_SNIFF": "true",
+        }
+    )
+
+    assert settings == OpenSearchClientSettings(
+        http_compress=False,
+        max_connections=4,
+        timeout=120,
+        max_retries=5,
+        retry_on_timeout=False,
+        sniff=True,
+    )
+
+
+def test_client_should_be_configured_from_settings():
+    client = create_opensearch_client(
+        "https://localhost:9200",
+        "user",
+        "password",
+        settings=OpenSearchClientSettings(max_connections=4, timeout=120),
+        verify_certs=False,
+    )
+
+    transport = client.transport
+    assert isinstance(transport.serializer, OrjsonSerializer)
+    assert transport.max_retries == 3
+    assert transport.retry_on_timeout
+    assert not transport.sniff_on_start
+
+    connection = transport.get_connection()
+    assert connection.http_compress
+    assert connection.headers["accept-encoding"] == "gzip,deflate"
+    assert connection.timeout == 120
+    assert connection.pool.pool.maxsize == 4
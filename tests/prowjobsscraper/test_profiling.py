@@ -0,0 +1,49 @@
+import pstats
+
+from prowjobsscraper.profiling import ProfilingSettings, profile_run
+
+
+def test_settings_should_have_defaults_when_env_is_empty():
+    assert ProfilingSettings.create_from_env({}) == ProfilingSettings()
+
+
+def test_settings_should_be_read_from_env():
+    settings = ProfilingSettings.create_from_env(
+        {
+            "PROFILE_CPU": "true",
+            "PROFILE_MEMORY": "true",
+            "PROFILE_OUTPUT_DIR": "/tmp/profiles",
+            "PROFILE_TOP_N": "5",
+        }
+    )
+
+    assert settings == ProfilingSettings(
+        cpu=True, memory=True, output_dir="/tmp/profiles", top_n=5
+    )
+
+
+def test_profile_run_should_not_write_profiles_when_disabled(tmp_path):
+    with profile_run("test", ProfilingSettings(output_dir=str(tmp_path))):
+        pass
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_profile_run_should_write_profiles(tmp_path, caplog):
+    caplog.set_level("INFO")
+    settings = ProfilingSettings(
+        cpu=True, memory=True, output_dir=str(tmp_path / "profiles"), top_n=5
+    )
+
+    with profile_run("test", settings):
+        data = [str(i) for i in range(10000)]
+
+    paths = sorted((tmp_path / "profiles").iterdir())
+    assert [p.name.startswith("test-") for p in paths] == [True, True]
+    allocations, cpu_profile = paths
+    assert allocations.name.endswith("-allocations.txt")
+    assert allocations.read_text().startswith("peak traced memory: ")
+    assert cpu_profile.suffix == ".pstats"
+    assert pstats.Stats(str(cpu_profile)).total_calls > 0
+    assert "hotspots" in caplog.text
+    assert "top allocations" in caplog.text
@@ -0,0 +1,210 @@
+from datetime import datetime, timedelta, timezone
+
+import pkg_resources
+import pytest
+
+from jobsautoreport.query import Querier, RollupQuerier
+from jobsautoreport.report import Reporter
+from prowjobsscraper import event, rollup
+from prowjobsscraper.equinix_usages import EquinixUsage
+from prowjobsscraper.inmemory_opensearch import InMemoryOpenSearch
+from prowjobsscraper.prowjob import ProwJob
+from prowjobsscraper.step import JobStep
+
+_PRESUBMIT = "pull-ci-openshift-assisted-service-master-edge-e2e-metal-assisted"
+_PERIODIC = "periodic-ci-openshift-assisted-service-master-e2e-metal-assisted"
+_START = datetime(2022, 7, 18, 8, tzinfo=timezone.utc)
+
+
+def _create_job(name: str, build_id: str, start_time: datetime, state: str) -> ProwJob:
+    job = ProwJob.parse_raw(
+        pkg_resources.resource_string(__name__, "event_assets/prowjob.json")
+    )
+    job.spec.job = name
+    job.spec.type = "periodic" if name == _PERIODIC else "presubmit"
+    job.status.build_id = build_id
+    job.status.state = state
+    job.status.startTime = start_time
+    job.status.completionTime = start_time + timedelta(hours=1)
+    return job
+
+
+def _create_usage(build_id: str, plan: str, total: float) -> EquinixUsage:
+    return EquinixUsage(
+        description=None,
+        facility="dc13",
+        metro="dc",
+        name=f"ipi-ci-op-yvdlzmdn-98f49-{build_id}",
+        plan=plan,
+        plan_version=plan,
+        price=total,
+        quantity=1,
+        total=total,
+        type="DeviceUsage",
+        instance=None,
+        unit="hour",
+        start_date=_START,
+        end_date=_START + timedelta(hours=2),
+    )
+
+
+def _create_packet_setup_step(build_id: str, state: str) -> JobStep:
+    return JobStep(
+        build_id=build_id,
+        name="e2e-metal-assisted-baremetalds-packet-setup",
+        state=state,
+        duration=60,
+    )
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("baremetalds-packet-setup", True),
+        ("e2e-metal-assisted-baremetalds-packet-setup", True),
+        ("e2e-metal-assisted-baremetalds-packet-teardown", False),
+    ],
+)
+def test_is_packet_setup_step(name: str, expected: bool):
+    assert rollup.is_packet_setup_step(name) == expected
+
+
+def test_rollup_store_should_merge_runs_of_the_same_job_and_day():
+    client = InMemoryOpenSearch()
+    rollup_store = rollup.RollupStoreElastic(client, "rollups")
+
+    rollup_store.update(
+        [
+            _create_job(_PRESUBMIT, "2", _START + timedelta(hours=2), "failure"),
+            _create_job(_PRESUBMIT, "3", _START + timedelta(days=1), "success"),
+        ],
+        [_create_packet_setup_step("2", "failure")],
+        [_create_usage("2", "c3.medium.x86", 1.5)],
+    )
+    rollup_store.update(
+        [
+            _create_job(_PRESUBMIT, "1", _START, "success"),
+            # scraped again, the run is replaced
+            _create_job(_PRESUBMIT, "2", _START + timedelta(hours=2), "success"),
+        ],
+        [],
+        [
+            _create_usage("2", "c3.medium.x86", 2),
+            _create_usage("2", "m3.large.x86", 3),
+        ],
+    )
+
+    rows = client.search(
+        index="rollups",
+        body={"query": {"exists": {"field": "job_rollup"}}, "sort": "job_rollup.day"},
+    )["hits"]["hits"]
+    job_rollups = [rollup.JobRollup.parse_obj(r["_source"]["job_rollup"]) for r in rows]
+    assert [[run.build_id for run in r.runs] for r in job_rollups] == [
+        ["1", "2"],
+        ["3"],
+    ]
+    assert job_rollups[0].day == datetime(2022, 7, 18, tzinfo=timezone.utc)
+    assert job_rollups[0].successes == 2
+    assert job_rollups[0].failures == 0
+    assert job_rollups[0].job.build_id is None
+    assert job_rollups[0].job.refs.pull is None
+    assert job_rollups[0].runs[1].leases == []
+
+    rows = client.search(
+        index="rollups", body={"query": {"exists": {"field": "usage_rollup"}}}
+    )["hits"]["hits"]
+    assert [
+        rollup.UsageRollup.parse_obj(r["_source"]["usage_rollup"]) for r in rows
+    ] == [
+        rollup.UsageRollup(
+            build_id="2",
+            start_date=_START,
+            end_date=_START + timedelta(hours=2),
+            cost_by_plan={"c3.medium.x86": 2, "m3.large.x86": 3},
+        )
+    ]
+
+
+def test_report_from_rollups_should_match_report_from_events():
+    client = InMemoryOpenSearch()
+    event_store = event.EventStoreElastic(
+        client=client,
+        job_index_basename="jobs",
+        step_index_basename="steps",
+        usage_index_basename="usages",
+    )
+    rollup_store = rollup.RollupStoreElastic(client, "rollups")
+    jobs = [
+        _create_job(_PRESUBMIT, "1", _START, "success"),
+        _create_job(_PRESUBMIT, "2", _START + timedelta(hours=2), "failure"),
+        _create_job(_PRESUBMIT, "3", _START + timedelta(days=1), "success"),
+        _create_job(_PERIODIC, "4", _START, "failure"),
+        _create_job(_PERIODIC, "5", _START + timedelta(days=1), "success"),
+        _create_job(_PERIODIC, "6", _START + timedelta(days=2), "failure"),
+    ]
+    steps = [
+        _create_packet_setup_step("1", "success"),
+        _create_packet_setup_step("2", "failure"),
+        _create_packet_setup_step("4", "success"),
+    ]
+    usages = [
+        _create_usage("1", "c3.medium.x86", 2),
+        _create_usage("4", "c3.medium.x86", 4),
+        _create_usage("4", "m3.large.x86", 5),
+    ]
+    for batch in (slice(0, 3), slice(3, None)):
+        event_store.index_prow_jobs(jobs[batch])
+        event_store.index_job_steps(steps, jobs[batch])
+        rollup_store.update(jobs[batch], steps, [])
+    event_store.index_equinix_usages(usages)
+    rollup_store.update([], [], usages)
+
+    from_date = datetime(2022, 7, 18, tzinfo=timezone.utc)
+    to_date = datetime(2022, 7, 25, tzinfo=timezone.utc)
+    report = Reporter(
+        Querier(
+            opensearch_client=client,
+            jobs_index="jobs-*",
+            steps_index="steps-*",
+            usages_index="usages-*",
+        )
+    ).get_report(from_date, to_date)
+    rollup_report = Reporter(
+        RollupQuerier(opensearch_client=client, rollup_index="rollups")
+    ).get_report(from_date, to_date)
+
+    assert report.presubmits_report.total == 3
+    assert report.equinix_usage_report.total_machines_leased == 3
+    assert report.equinix_cost_report.total_equinix_machines_cost == 11
+    assert rollup_report == report
+
+
+def test_rollup_store_should_merge_rows_written_meanwhile_by_another_process():
+    client = InMemoryOpenSearch()
+    rollup_store = rollup.RollupStoreElastic(client, "rollups")
+    # a backfill running with the same shard index
+    other_rollup_store = rollup.RollupStoreElastic(client, "rollups")
+    bulk = client.bulk
+
+    def bulk_after_other_update(build_id: str):
+        def interleaved_bulk(*args, **kwargs):
+            client.bulk = bulk
+            other_rollup_store.update(
+                [_create_job(_PRESUBMIT, build_id, _START, "success")], [], []
+            )
+            return bulk(*args, **kwargs)
+
+        return interleaved_bulk
+
+    # the row is created meanwhile, then updated meanwhile
+    for build_id, other_build_id in (("1", "2"), ("3", "4")):
+        client.bulk = bulk_after_other_update(other_build_id)
+        rollup_store.update(
+            [_create_job(_PRESUBMIT, build_id, _START, "failure")], [], []
+        )
+
+    (row,) = client.search(index="rollups")["hits"]["hits"]
+    job_rollup = rollup.JobRollup.parse_obj(row["_source"]["job_rollup"])
+    assert sorted(run.build_id for run in job_rollup.runs) == ["1", "2", "3", "4"]
+    assert job_rollup.successes == 2
+    assert job_rollup.failures == 2
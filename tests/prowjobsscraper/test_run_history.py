@@ -0,0 +1,83 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from prowjobsscraper import run_history
+from prowjobsscraper.event import RunEvent
+from prowjobsscraper.metrics import METRICS, Metrics
+
+
+def test_create_from_metrics_should_summarize_stages():
+    metrics = Metrics()
+    metrics.observe("es_scan", 1.5, index="jobs")
+    metrics.add_items("es_scan", 10, index="jobs")
+    metrics.add_items("es_bulk", 4, index="jobs")
+    metrics.add_items("es_bulk", 6, index="steps")
+    metrics.add_errors("gcs_download", 2, artifact="junit")
+    start_time = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    end_time = datetime(2024, 1, 1, 0, 1, 30, tzinfo=timezone.utc)
+
+    run = RunEvent.create_from_metrics(
+        tool="prow-jobs-scraper",
+        start_time=start_time,
+        end_time=end_time,
+        metrics=metrics,
+        peak_rss=1024,
+        error="ValueError('test')",
+    ).run
+
+    assert run.duration == 90
+    assert run.documents_read == 10
+    assert run.documents_written == 10
+    assert run.errors == 3
+    assert run.peak_rss == 1024
+    assert [(s.name, s.labels) for s in run.stages] == [
+        ("es_bulk", {"index": "jobs"}),
+        ("es_bulk", {"index": "steps"}),
+        ("es_scan", {"index": "jobs"}),
+        ("gcs_download", {"artifact": "junit"}),
+    ]
+    assert run.stages[2].seconds == 1.5
+    assert run.stages[2].calls == 1
+
+
+@patch("opensearchpy.helpers.bulk")
+def test_record_run_should_index_run_summary(bulk):
+    METRICS.reset()
+    documents = []
+    bulk.side_effect = lambda client, actions: documents.extend(actions)
+
+    with run_history.record_run(MagicMock(), "runs", "jobs-auto-report"):
+        METRICS.add_items("es_scan", 5, index="jobs")
+
+    assert len(documents) == 1
+    assert documents[0]["_index"].startswith("runs-")
+    run = documents[0]["doc"]["run"]
+    assert run["tool"] == "jobs-auto-report"
+    assert run["documents_read"] == 5
+    assert run["peak_rss"] > 0
+    assert run["error"] is None
+
+
+@patch("opensearchpy.helpers.bulk")
+def test_record_run_should_index_error_and_reraise(bulk):
+    METRICS.reset()
+    documents = []
+    bulk.side_effect = lambda client, actions: documents.extend(actions)
+
+    with pytest.raises(ValueError):
+        with run_history.record_run(MagicMock(), "runs", "elasticsearch-cleanup"):
+            raise ValueError("test")
+
+    run = documents[0]["doc"]["run"]
+    assert run["error"] == "ValueError('test')"
+    assert run["errors"] == 1
+
+
+@patch("opensearchpy.helpers.bulk")
+def test_record_run_should_not_fail_when_summary_cannot_be_indexed(bulk):
+    bulk.side_effect = Exception("unavailable")
+
+    with run_history.record_run(MagicMock(), "runs", "prow-jobs-scraper"):
+        pass
@@ -1,3 +1,5 @@
+import asyncio
+import json
 from datetime import datetime, timezone
 from typing import Literal
 from unittest.mock import MagicMock
@@ -239,10 +241,15 @@ def test_should_index_usage():
 
 
 def test_jobs_and_steps_are_indexed():
-    jobstep = step.JobStep.parse_raw(
-        pkg_resources.resource_string(__name__, f"scraper_assets/jobstep.json")
+    jobstep = step.JobStep(
+        **json.loads(
+            pkg_resources.resource_string(__name__, f"scraper_assets/jobstep.json")
+        )
     )
-    jobs = prowjob.ProwJobs(items=[jobstep.job])
+    job = prowjob.ProwJob.parse_raw(
+        pkg_resources.resource_string(__name__, f"scraper_assets/jobstep_prowjob.json")
+    )
+    jobs = prowjob.ProwJobs(items=[job])
 
     event_store = MagicMock()
     event_store.scan_build_ids_from_index.return_value = []
@@ -252,14 +259,138 @@ def test_jobs_and_steps_are_indexed():
 
     equinix_metadata_extractor = MagicMock()
     equinix_usages_extractor = MagicMock()
+    rollup_store = MagicMock()
 
     scrape = scraper.Scraper(
         event_store,
         step_extractor,
         equinix_metadata_extractor,
         equinix_usages_extractor,
+        rollup_store=rollup_store,
     )
     scrape.execute(jobs.copy(deep=True))
     equinix_metadata_extractor.hydrate.assert_called_once()
     event_store.index_prow_jobs.assert_called_once_with(jobs.items)
-    event_store.index_job_steps.assert_called_once_with([jobstep])
+    event_store.index_job_steps.assert_called_once_with([jobstep], jobs.items)
+    rollup_store.update.assert_called_once_with(jobs.items, [jobstep], [])
+
+
+def test_jobs_and_steps_are_indexed_in_async_mode():
+    jobstep = step.JobStep(
+        **json.loads(
+            pkg_resources.resource_string(__name__, f"scraper_assets/jobstep.json")
+        )
+    )
+    job = prowjob.ProwJob.parse_raw(
+        pkg_resources.resource_string(__name__, f"scraper_assets/jobstep_prowjob.json")
+    )
+    jobs = prowjob.ProwJobs(items=[job])
+
+    event_store = MagicMock()
+    event_store.scan_build_ids.return_value = set()
+    event_store.scan_usages_identifiers.return_value = set()
+
+    step_extractor = MagicMock()
+    step_extractor.parse_prow_job.return_value = [jobstep]
+
+    equinix_metadata_extractor = MagicMock()
+    equinix_usages_extractor = MagicMock()
+    equinix_usages_extractor.get_project_usages.return_value = []
+
+    scrape = scraper.Scraper(
+        event_store,
+        step_extractor,
+        equinix_metadata_extractor,
+        equinix_usages_extractor,
+    )
+    asyncio.run(scrape.execute_async(jobs.copy(deep=True), max_concurrency=2))
+
+    equinix_metadata_extractor.hydrate_job.assert_called_once()
+    step_extractor.parse_prow_job.assert_called_once()
+    event_store.index_prow_jobs.assert_called_once_with(jobs.items)
+    event_store.index_job_steps.assert_called_once_with([jobstep], jobs.items)
+    event_store.index_equinix_usages.assert_called_once_with([])
+
+
+def test_existing_jobs_in_event_store_are_filtered_out_in_async_mode():
+    jobstep = step.JobStep(
+        **json.loads(
+            pkg_resources.resource_string(__name__, f"scraper_assets/jobstep.json")
+        )
+    )
+    job = prowjob.ProwJob.parse_raw(
+        pkg_resources.resource_string(__name__, f"scraper_assets/jobstep_prowjob.json")
+    )
+    jobs = prowjob.ProwJobs(items=[job])
+
+    event_store = MagicMock()
+    event_store.scan_build_ids.return_value = {job.status.build_id}
+    event_store.scan_usages_identifiers.return_value = set()
+
+    step_extractor = MagicMock()
+    equinix_metadata_extractor = MagicMock()
+    equinix_usages_extractor = MagicMock()
+    equinix_usages_extractor.get_project_usages.return_value = []
+
+    scrape = scraper.Scraper(
+        event_store,
+        step_extractor,
+        equinix_metadata_extractor,
+        equinix_usages_extractor,
+    )
+    asyncio.run(scrape.execute_async(jobs.copy(deep=True), max_concurrency=2))
+
+    equinix_metadata_extractor.hydrate_job.assert_not_called()
+    step_extractor.parse_prow_job.assert_not_called()
+    event_store.index_prow_jobs.assert_called_once_with([])
+    event_store.index_job_steps.assert_called_once_with([], [])
+
+
+def test_jobs_are_split_across_shards():
+    job = prowjob.ProwJob.parse_raw(
+        pkg_resources.resource_string(__name__, f"scraper_assets/jobstep_prowjob.json")
+    )
+    jobs = prowjob.ProwJobs(
+        items=[
+            job.copy(
+                deep=True,
+                update={"status": job.status.copy(update={"build_id": str(i)})},
+            )
+            for i in range(20)
+        ]
+    )
+
+    indexed_build_ids = []
+    for shard_index in range(3):
+        event_store = MagicMock()
+        event_store.scan_build_ids.return_value = set()
+        equinix_usages_extractor = MagicMock()
+        scrape = scraper.Scraper(
+            event_store,
+            MagicMock(),
+            MagicMock(),
+            equinix_usages_extractor,
+            shard_index=shard_index,
+            shard_count=3,
+        )
+        scrape.execute(jobs.copy(deep=True))
+
+        shard_jobs = event_store.index_prow_jobs.call_args[0][0]
+        assert 0 < len(shard_jobs) < len(jobs.items)
+        indexed_build_ids.extend(j.status.build_id for j in shard_jobs)
+        # usages are only scraped by the first shard
+        assert equinix_usages_extractor.get_project_usages.called == (shard_index == 0)
+
+    assert sorted(indexed_build_ids, key=int) == [str(i) for i in range(20)]
+
+
+def test_shard_index_must_be_lower_than_shard_count():
+    with pytest.raises(ValueError):
+        scraper.Scraper(
+            MagicMock(),
+            MagicMock(),
+            MagicMock(),
+            MagicMock(),
+            shard_index=2,
+            shard_count=2,
+        )
@@ -0,0 +1,74 @@
+import json
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pkg_resources
+import pytest
+from opensearchpy.exceptions import SerializationError
+from opensearchpy.serializer import JSONSerializer
+
+from prowjobsscraper import event
+from prowjobsscraper.equinix_usages import EquinixUsage, EquinixUsageEvent
+from prowjobsscraper.prowjob import ProwJob
+from prowjobsscraper.serializer import OrjsonSerializer
+
+
+def test_serializer_should_produce_the_same_documents_as_default_serializer():
+    prow_job = ProwJob.parse_raw(
+        pkg_resources.resource_string(__name__, f"event_assets/prowjob.json")
+    )
+    usage = EquinixUsage.parse_obj(
+        {
+            "end_date": "2023-03-31T23:59:59Z",
+            "facility": "am6",
+            "metro": "am",
+            "name": "ipi-ci-op-tb33cyhd-20a45-1638140834400440320",
+            "plan": "Outbound Bandwidth",
+            "plan_version": "Outbound Bandwidth",
+            "price": 0.05,
+            "quantity": 4,
+            "start_date": "2023-03-01T00:00:00Z",
+            "total": 0.2,
+            "type": "Instance",
+            "unit": "GB",
+        }
+    )
+    documents = [
+        event.JobEvent.create_from_prow_job(prow_job).dict(),
+        EquinixUsageEvent.create_from_equinix_usage(usage).dict(),
+        {
+            "naive": datetime(2023, 1, 1, 12, 30, 15, 123),
+            "aware": datetime(2023, 1, 1, tzinfo=timezone.utc),
+            "id": uuid.UUID("47bd6216-1345-4813-aa19-c0b5648b744a"),
+            "price": Decimal("0.05"),
+            "details": "\x1b[91mFAIL!\x1b[0m é",
+        },
+    ]
+
+    for d in documents:
+        assert OrjsonSerializer().dumps(d) == JSONSerializer().dumps(d)
+
+
+def test_serializer_should_serialize_pydantic_models():
+    job_refs = event.JobRefs(base_ref="master", org="openshift", pull=None, repo=None)
+
+    assert json.loads(OrjsonSerializer().dumps({"refs": job_refs})) == {
+        "refs": job_refs.dict()
+    }
+
+
+def test_serializer_should_not_serialize_strings_again():
+    assert OrjsonSerializer().dumps('{"a":1}') == '{"a":1}'
+
+
+def test_serializer_should_load_json():
+    assert OrjsonSerializer().loads('{"hits":{"total":1}}') == {"hits": {"total": 1}}
+
+
+def test_serializer_should_raise_serialization_errors():
+    with pytest.raises(SerializationError):
+        OrjsonSerializer().dumps({"a": object()})
+
+    with pytest.raises(SerializationError):
+        OrjsonSerializer().loads("{")
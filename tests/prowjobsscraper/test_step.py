@@ -1,5 +1,4 @@
 import json
-from datetime import timedelta
 from unittest.mock import MagicMock
 
 import pkg_resources
@@ -58,7 +57,7 @@ def test_step_extractor_with_valid_junit_should_return_steps():
                 __name__, f"step_assets/expected_{s.name}.json"
             )
         )
-        assert s.json(exclude_unset=True) == json.dumps(expected)
+        assert s == step.JobStep(**expected)
 
 
 def test_step_extractor_with_malformed_junit_should_return_steps():
@@ -84,5 +83,20 @@ def test_step_extractor_with_malformed_junit_should_return_steps():
         "pr-logs/pull/openshift_assisted-service/4121/pull-ci-openshift-assisted-service-master-edge-e2e-metal-assisted/1549300279667593216/artifacts/junit_operator.xml"
     )
     assert len(steps) == 1
-    assert steps[0].duration == timedelta(0)
+    assert steps[0].duration == 0
     assert steps[0].name == "step1"
+
+
+def test_step_extractor_should_skip_testcases_without_name():
+    jobs = ProwJobs.create_from_string(
+        pkg_resources.resource_string(__name__, f"step_assets/prowjobs.json")
+    )
+    junit = """<testsuite>
+        <testcase name="step1" time="10"/>
+        <testcase time="20"/>
+    </testsuite>"""
+
+    step_extractor = step.StepExtractor(MagicMock(), "origin-ci-test")
+    steps = step_extractor.create_job_steps(jobs.items[0], junit)
+
+    assert [s.name for s in steps] == ["step1"]